@@ -11,7 +11,8 @@ from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 from .models import (Agent, Function, ScheduleType, DailyRotationPlan, RotationPeriod,
                      ShiftSchedule, ShiftSchedulePeriod, ShiftScheduleWeek, ShiftScheduleDailyPlan, 
-                     Department, Team, TeamPosition, PublicHoliday, TeamPositionAgentAssignment, TeamPositionRotationAssignment)
+                     Department, Team, TeamPosition, PublicHoliday, TeamPositionAgentAssignment, TeamPositionRotationAssignment,
+                     PlannedShift)
 from .views import (agent_export, agent_import, department_export, department_import, function_export, function_import, 
                     scheduletype_export, scheduletype_import, dailyrotationplan_export, dailyrotationplan_import, 
                     shiftschedule_export, shiftschedule_import, shiftscheduleperiod_export, shiftscheduleperiod_import, 
@@ -71,6 +72,7 @@ class AgentAdmin(admin.ModelAdmin):
             'opts': self.model._meta,
             'has_change_permission': True,
             'agent_count': Agent.objects.count(),
+            'default_password': Agent.DEFAULT_PASSWORD,
         })
 
 
@@ -763,6 +765,9 @@ class TeamPositionAdmin(admin.ModelAdmin):
             'teamposition_count': TeamPosition.objects.count(),
         })
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('team', 'function').with_assignments_as_of()
+    
     def get_current_agent(self, obj):
         """Display current agent assignment"""
         agent = obj.current_agent
@@ -905,3 +910,19 @@ class PublicHolidayAdmin(admin.ModelAdmin):
         }),
     )
     readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(PlannedShift)
+class PlannedShiftAdmin(admin.ModelAdmin):
+    """Read-only view of the materialized roster, maintained by core.planned_shifts"""
+    list_display = ('date', 'team_position', 'agent', 'start', 'end', 'schedule_type', 'is_holiday')
+    list_filter = ('team_position__team__department', 'team_position__team', 'schedule_type', 'is_holiday')
+    search_fields = ('agent__matricule', 'agent__last_name', 'team_position__team__designation')
+    list_select_related = ('team_position__team', 'team_position__function', 'agent', 'schedule_type')
+    date_hierarchy = 'date'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,37 @@
+"""
+Agent double-booking detection.
+
+TeamPositionAgentAssignment only forbids overlaps within a single position.
+find_conflicts() lists every pair of overlapping assignments of the same agent
+on different positions with a single sort-and-sweep pass over all assignment
+intervals: O(n log n + k) for n assignments and k conflicts.
+"""
+import heapq
+from collections import namedtuple
+
+from .models import TeamPositionAgentAssignment
+
+
+# Two assignments of the same agent overlapping between `start` and `end`
+Conflict = namedtuple('Conflict', ['agent_id', 'first_id', 'second_id', 'start', 'end'])
+
+
+def find_conflicts(assignments=None):
+    """Return every Conflict between assignments of the same agent, sorted by agent and date"""
+    if assignments is None:
+        assignments = TeamPositionAgentAssignment.objects.all()
+    rows = sorted(assignments.values_list('agent_id', 'start_date', 'end_date', 'pk', 'team_position_id'))
+
+    conflicts = []
+    current_agent = None
+    active = []  # heap of (end_date, pk, team_position_id) still open at the sweep position
+    for agent_id, start_date, end_date, pk, position_id in rows:
+        if agent_id != current_agent:
+            current_agent, active = agent_id, []
+        while active and active[0][0] < start_date:
+            heapq.heappop(active)
+        for other_end, other_pk, other_position_id in active:
+            if other_position_id != position_id:
+                conflicts.append(Conflict(agent_id, other_pk, pk, start_date, min(end_date, other_end)))
+        heapq.heappush(active, (end_date, pk, position_id))
+    return conflicts
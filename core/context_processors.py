@@ -1,16 +1,8 @@
-from .models import Agent
+from .decorators import get_request_agent
 
 
 def agent_context(request):
     """Add agent information to template context"""
-    context = {
-        'current_agent': None,
+    return {
+        'current_agent': get_request_agent(request),
     }
-    
-    if request.user.is_authenticated:
-        try:
-            context['current_agent'] = Agent.objects.get(user=request.user)
-        except Agent.DoesNotExist:
-            context['current_agent'] = None
-    
-    return context
\ No newline at end of file
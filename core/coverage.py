@@ -0,0 +1,41 @@
+"""
+Staffing coverage analysis.
+
+A position is covered on a day when its rotation yields a shift that day and
+an agent still in service is assigned to it. Shifts are streamed in date
+order from the materialized roster (PlannedShift), so a whole quarter costs
+the same two queries as a single day.
+"""
+from collections import defaultdict
+
+from .models import Agent, TeamPosition
+from .planned_shifts import iter_planned
+
+
+def coverage(start, end, positions=None):
+    """
+    Compute staffing coverage between start and end (inclusive).
+
+    Returns (days, gaps) where days is {date: {schedule_type_id: {'planned',
+    'covered'}}} and gaps is the list of uncovered shifts (roster Shift
+    tuples) in date order.
+    """
+    if positions is None:
+        positions = TeamPosition.objects.all()
+
+    shifts = iter_planned(positions, start, end)
+    departures = dict(
+        Agent.objects.filter(departure_date__isnull=False, departure_date__lt=end).values_list('id', 'departure_date')
+    )
+
+    days = defaultdict(lambda: defaultdict(lambda: {'planned': 0, 'covered': 0}))
+    gaps = []
+    for shift in shifts:
+        counts = days[shift.date][shift.schedule_type_id]
+        counts['planned'] += 1
+        departure = departures.get(shift.agent_id)
+        if shift.agent_id is not None and (departure is None or departure >= shift.date):
+            counts['covered'] += 1
+        else:
+            gaps.append(shift)
+    return days, gaps
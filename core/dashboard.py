@@ -0,0 +1,53 @@
+"""
+Dashboard counters.
+
+Every counter comes from a single SELECT of scalar COUNT subqueries, and the
+result is kept in the Django cache until one of the counted models gains or
+loses a row (see the signal handlers of core.signals), or for CACHE_TIMEOUT
+seconds at most: the default cache is local to each process, so the other
+processes never see that invalidation.
+"""
+from django.core.cache import cache
+from django.db import connection
+
+from .models import (Agent, DailyRotationPlan, Department, Function, PublicHoliday, RotationPeriod, ScheduleType,
+                     ShiftSchedule, Team)
+
+
+CACHE_KEY = 'dashboard_stats'
+CACHE_TIMEOUT = 60
+
+COUNTED_MODELS = {
+    'agents': Agent,
+    'functions': Function,
+    'teams': Team,
+    'departments': Department,
+    'schedule_types': ScheduleType,
+    'daily_rotation_plans': DailyRotationPlan,
+    'rotation_periods': RotationPeriod,
+    'shift_schedules': ShiftSchedule,
+    'public_holidays': PublicHoliday,
+}
+
+
+def _count_all():
+    names = list(COUNTED_MODELS)
+    columns = ', '.join(
+        f'(SELECT COUNT(*) FROM {connection.ops.quote_name(COUNTED_MODELS[name]._meta.db_table)})' for name in names
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT {columns}')
+        return dict(zip(names, cursor.fetchone()))
+
+
+def stats():
+    """Return {counter name: row count}, from the cache when possible"""
+    counts = cache.get(CACHE_KEY)
+    if counts is None:
+        counts = _count_all()
+        cache.set(CACHE_KEY, counts, timeout=CACHE_TIMEOUT)
+    return counts
+
+
+def invalidate():
+    cache.delete(CACHE_KEY)
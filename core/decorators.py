@@ -8,11 +8,24 @@ from .models import Agent
 def get_agent_from_user(user):
     """Get Agent instance from User"""
     try:
-        return Agent.objects.get(user=user)
+        return Agent.objects.select_related('user').get(user=user)
     except Agent.DoesNotExist:
         return None
 
 
+def get_request_agent(request):
+    """
+    Get the Agent of the request user, resolved at most once per request.
+    
+    AgentMiddleware normally sets `request.agent` up front; this also covers
+    requests that did not go through it.
+    """
+    if not hasattr(request, 'agent'):
+        user = getattr(request, 'user', None)
+        request.agent = get_agent_from_user(user) if user is not None and user.is_authenticated else None
+    return request.agent
+
+
 def permission_required(permission_level):
     """
     Decorator to check user permission level
@@ -22,7 +35,7 @@ def permission_required(permission_level):
         @wraps(view_func)
         @login_required
         def _wrapped_view(request, *args, **kwargs):
-            agent = get_agent_from_user(request.user)
+            agent = get_request_agent(request)
             
             if not agent:
                 # User is not an agent, only allow super admin access via Django admin
@@ -0,0 +1,192 @@
+"""
+Streaming global export.
+
+Every model is read in chunks with values_list() and encoded row by row into
+the same indented JSON the per-model exports produce. The ZIP archive is
+written to a sink that hands its bytes back after each row, so the response
+is streamed and memory stays bounded by one chunk of rows whatever the size
+of the export.
+"""
+import io
+import json
+import textwrap
+import zipfile
+from collections import namedtuple
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import (Agent, DailyRotationPlan, Department, Function, PublicHoliday, RotationPeriod, ScheduleType,
+                     ShiftSchedule, ShiftScheduleDailyPlan, ShiftSchedulePeriod, ShiftScheduleWeek, Team, TeamPosition,
+                     TeamPositionAgentAssignment, TeamPositionRotationAssignment)
+
+
+CHUNK_SIZE = 2000
+
+# In dependency order, so an archive can be restored entry by entry (see
+# core.imports). `fields` maps each exported key to the lookup it is read from.
+Export = namedtuple('Export', 'name model ordering fields')
+
+EXPORTS = [
+    Export('agents', Agent, ('matricule',), (
+        ('matricule', 'matricule'),
+        ('last_name', 'last_name'),
+        ('first_name', 'first_name'),
+        ('grade', 'grade'),
+        ('hire_date', 'hire_date'),
+        ('departure_date', 'departure_date'),
+        ('permission_level', 'permission_level'),
+    )),
+    Export('departments', Department, ('order', 'name'), (
+        ('name', 'name'),
+        ('order', 'order'),
+    )),
+    Export('functions', Function, ('designation',), (
+        ('designation', 'designation'),
+        ('description', 'description'),
+        ('status', 'status'),
+    )),
+    Export('schedule_types', ScheduleType, ('designation',), (
+        ('designation', 'designation'),
+        ('short_designation', 'short_designation'),
+        ('color', 'color'),
+    )),
+    Export('daily_rotation_plans', DailyRotationPlan, ('designation',), (
+        ('designation', 'designation'),
+        ('description', 'description'),
+        ('schedule_type_designation', 'schedule_type__designation'),
+    )),
+    Export('rotation_periods', RotationPeriod, ('daily_rotation_plan__designation', 'start_date', 'start_time'), (
+        ('daily_rotation_plan_designation', 'daily_rotation_plan__designation'),
+        ('start_date', 'start_date'),
+        ('end_date', 'end_date'),
+        ('start_time', 'start_time'),
+        ('end_time', 'end_time'),
+    )),
+    Export('shift_schedules', ShiftSchedule, ('name',), (
+        ('name', 'name'),
+        ('type', 'type'),
+        ('break_times', 'break_times'),
+    )),
+    Export('shift_schedule_periods', ShiftSchedulePeriod, ('shift_schedule__name', 'start_date'), (
+        ('shift_schedule_name', 'shift_schedule__name'),
+        ('start_date', 'start_date'),
+        ('end_date', 'end_date'),
+    )),
+    Export('shift_schedule_weeks', ShiftScheduleWeek,
+           ('period__shift_schedule__name', 'period__start_date', 'week_number'), (
+        ('shift_schedule_name', 'period__shift_schedule__name'),
+        ('period_start_date', 'period__start_date'),
+        ('period_end_date', 'period__end_date'),
+        ('week_number', 'week_number'),
+    )),
+    Export('shift_schedule_daily_plans', ShiftScheduleDailyPlan,
+           ('week__period__shift_schedule__name', 'week__period__start_date', 'week__week_number', 'weekday'), (
+        ('shift_schedule_name', 'week__period__shift_schedule__name'),
+        ('period_start_date', 'week__period__start_date'),
+        ('period_end_date', 'week__period__end_date'),
+        ('week_number', 'week__week_number'),
+        ('weekday', 'weekday'),
+        ('daily_rotation_plan_designation', 'daily_rotation_plan__designation'),
+    )),
+    Export('public_holidays', PublicHoliday, ('date',), (
+        ('designation', 'designation'),
+        ('date', 'date'),
+    )),
+    Export('teams', Team, ('department__order', 'department__name', 'designation'), (
+        ('designation', 'designation'),
+        ('description', 'description'),
+        ('color', 'color'),
+        ('department_name', 'department__name'),
+    )),
+    Export('team_positions', TeamPosition, ('team__department__name', 'team__designation', 'order'), (
+        ('department_name', 'team__department__name'),
+        ('team_designation', 'team__designation'),
+        ('order', 'order'),
+        ('function_designation', 'function__designation'),
+        ('considers_holidays', 'considers_holidays'),
+    )),
+    Export('team_position_agent_assignments', TeamPositionAgentAssignment,
+           ('team_position__team__department__name', 'team_position__team__designation', 'team_position__order',
+            'start_date'), (
+        ('department_name', 'team_position__team__department__name'),
+        ('team_designation', 'team_position__team__designation'),
+        ('position_order', 'team_position__order'),
+        ('agent_matricule', 'agent__matricule'),
+        ('start_date', 'start_date'),
+        ('end_date', 'end_date'),
+    )),
+    Export('team_position_rotation_assignments', TeamPositionRotationAssignment,
+           ('team_position__team__department__name', 'team_position__team__designation', 'team_position__order',
+            'start_date'), (
+        ('department_name', 'team_position__team__department__name'),
+        ('team_designation', 'team_position__team__designation'),
+        ('position_order', 'team_position__order'),
+        ('shift_schedule_name', 'rotation_plan__name'),
+        ('start_date', 'start_date'),
+        ('end_date', 'end_date'),
+    )),
+]
+
+
+def rows(export, chunk_size=CHUNK_SIZE):
+    """Yield the exported dicts of one model, reading chunk_size rows at a time"""
+    keys = [key for key, _ in export.fields]
+    queryset = export.model.objects.order_by(*export.ordering).values_list(*[lookup for _, lookup in export.fields])
+    for values in queryset.iterator(chunk_size=chunk_size):
+        yield dict(zip(keys, values))
+
+
+def json_chunks(items):
+    """Encode an iterable as a JSON array, one item at a time, exactly as json.dumps(list, indent=2) would"""
+    first = True
+    for item in items:
+        encoded = json.dumps(item, indent=2, ensure_ascii=False, cls=DjangoJSONEncoder)
+        yield ('[\n' if first else ',\n') + textwrap.indent(encoded, '  ')
+        first = False
+    yield '[]' if first else '\n]'
+
+
+class _Sink(io.RawIOBase):
+    """Unseekable file collecting what the ZIP writer emits until it is drained"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(entries):
+    """
+    Yield the bytes of a ZIP archive of `entries`, (name, iterable of str)
+    pairs, as they are compressed. Written to an unseekable sink, zipfile
+    stores each entry's sizes in a data descriptor after its content.
+    """
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, chunks in entries:
+            with archive.open(name, 'w', force_zip64=True) as entry:
+                for chunk in chunks:
+                    entry.write(chunk.encode())
+                    data = sink.drain()
+                    if data:
+                        yield data
+            yield sink.drain()
+    yield sink.drain()
+
+
+def global_export(prefix, chunk_size=CHUNK_SIZE):
+    """Stream the ZIP of every model's JSON export, entries named `<prefix>_<model>.json`"""
+    return stream_zip(
+        (f'{prefix}_{export.name}.json', json_chunks(rows(export, chunk_size)))
+        for export in EXPORTS
+    )
@@ -7,13 +7,15 @@ from .models import (Agent, Function, ScheduleType, DailyRotationPlan, RotationP
 class AgentForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         user = kwargs.pop('user', None)
+        current_agent = kwargs.pop('current_agent', None)
         super().__init__(*args, **kwargs)
         
         # Only show permission field to users who can manage permissions
         if user:
             try:
-                from .decorators import get_agent_from_user
-                current_agent = get_agent_from_user(user)
+                if current_agent is None:
+                    from .decorators import get_agent_from_user
+                    current_agent = get_agent_from_user(user)
                 if not (current_agent and current_agent.can_manage_permissions()):
                     # Remove permission field if user can't manage permissions
                     if 'permission_level' in self.fields:
@@ -215,18 +217,11 @@ class RotationPeriodForm(forms.ModelForm):
         
         # Check for overlapping periods within the same daily rotation plan
         if start_date and end_date and daily_rotation_plan:
-            overlapping_periods = RotationPeriod.objects.filter(
-                daily_rotation_plan=daily_rotation_plan,
-                start_date__lte=end_date,
-                end_date__gte=start_date
-            )
-            
-            # Exclude current instance if editing
-            if self.instance.pk:
-                overlapping_periods = overlapping_periods.exclude(pk=self.instance.pk)
+            overlapping_period = RotationPeriod.objects.filter(
+                daily_rotation_plan=daily_rotation_plan
+            ).exclude(pk=self.instance.pk).first_overlapping(start_date, end_date)
             
-            if overlapping_periods.exists():
-                overlapping_period = overlapping_periods.first()
+            if overlapping_period:
                 raise forms.ValidationError(
                     f'Cette période chevauche avec une période existante '
                     f'({overlapping_period.start_date.strftime("%d/%m/%Y")} - '
@@ -300,18 +295,11 @@ class ShiftSchedulePeriodForm(forms.ModelForm):
         
         # Check for overlapping periods within the same shift schedule
         if start_date and end_date and shift_schedule:
-            overlapping_periods = ShiftSchedulePeriod.objects.filter(
-                shift_schedule=shift_schedule,
-                start_date__lte=end_date,
-                end_date__gte=start_date
-            )
-            
-            # Exclude current instance if editing
-            if self.instance.pk:
-                overlapping_periods = overlapping_periods.exclude(pk=self.instance.pk)
+            overlapping_period = ShiftSchedulePeriod.objects.filter(
+                shift_schedule=shift_schedule
+            ).exclude(pk=self.instance.pk).first_overlapping(start_date, end_date)
             
-            if overlapping_periods.exists():
-                overlapping_period = overlapping_periods.first()
+            if overlapping_period:
                 raise forms.ValidationError(
                     f'Cette période chevauche avec une période existante '
                     f'({overlapping_period.start_date.strftime("%d/%m/%Y")} - '
@@ -0,0 +1,67 @@
+"""
+Per-year public-holiday bitmaps.
+
+Each year is stored in the Django cache as an int whose bit n is set when the
+(n + 1)-th day of the year is a PublicHoliday. Missing years are loaded with a
+single query, so checking any date range costs at most one query, and none
+once the years are cached. Bitmaps are dropped by the PublicHoliday signal
+handlers of core.signals. Those only reach the cache of the process making the
+change (the default cache is local to each process), so bitmaps also expire
+after CACHE_TIMEOUT seconds for the other processes to catch up.
+"""
+from datetime import date
+
+from django.core.cache import cache
+
+from .models import PublicHoliday
+
+
+CACHE_KEY = 'public_holidays:{year}'
+CACHE_TIMEOUT = 300
+
+
+def _key(year):
+    return CACHE_KEY.format(year=year)
+
+
+def _day_index(day):
+    return day.timetuple().tm_yday - 1
+
+
+def year_bitmaps(years):
+    """Return {year: bitmap} for the given years, loading uncached years with one query"""
+    years = set(years)
+    cached = cache.get_many([_key(year) for year in years])
+    bitmaps = {year: cached[_key(year)] for year in years if _key(year) in cached}
+
+    missing = years - set(bitmaps)
+    if missing:
+        loaded = dict.fromkeys(missing, 0)
+        holidays = PublicHoliday.objects.filter(
+            date__gte=date(min(missing), 1, 1), date__lte=date(max(missing), 12, 31)
+        ).values_list('date', flat=True)
+        for day in holidays:
+            if day.year in loaded:
+                loaded[day.year] |= 1 << _day_index(day)
+        cache.set_many({_key(year): bitmap for year, bitmap in loaded.items()}, timeout=CACHE_TIMEOUT)
+        bitmaps.update(loaded)
+    return bitmaps
+
+
+def holiday_mask(start, end):
+    """Return one boolean per day between start and end (inclusive), True on public holidays"""
+    if start > end:
+        return []
+    bitmaps = year_bitmaps(range(start.year, end.year + 1))
+    mask = []
+    for year in range(start.year, end.year + 1):
+        first = max(start, date(year, 1, 1))
+        length = (min(end, date(year, 12, 31)) - first).days + 1
+        bits = (bitmaps[year] >> _day_index(first)) & ((1 << length) - 1)
+        mask.extend(bit == '1' for bit in reversed(format(bits, f'0{length}b')))
+    return mask
+
+
+def invalidate(*years):
+    """Drop the cached bitmaps of the given years"""
+    cache.delete_many([_key(year) for year in years])
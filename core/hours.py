@@ -0,0 +1,69 @@
+"""
+Worked-hours accounting.
+
+Hours are computed in bulk from the materialized roster. Every shift adds its
+duration, as a whole number of minutes, to the agent working it on the day the
+shift starts, so a 22:00-06:00 night shift counts 8 hours on its first day.
+Shifts cancelled by a public holiday are already missing from the roster for
+positions that take holidays into account, and vacant shifts are ignored.
+Day totals are then rolled up into ISO weeks and months.
+"""
+from collections import defaultdict
+
+from .models import TeamPosition
+from .planned_shifts import iter_planned
+
+
+def worked_minutes(start, end, positions=None, agent_ids=None):
+    """Return {agent_id: {date: minutes}} for the shifts between start and end (inclusive)"""
+    if positions is None:
+        positions = TeamPosition.objects.all()
+    if agent_ids is not None:
+        agent_ids = set(agent_ids)
+        positions = positions.filter(
+            agent_assignments__agent_id__in=agent_ids,
+            agent_assignments__start_date__lte=end,
+            agent_assignments__end_date__gte=start,
+        ).distinct()
+
+    # Durations only depend on the (start, end) pair of the rotation period,
+    # so they are computed once per pair rather than once per shift.
+    durations = {}
+    minutes = defaultdict(lambda: defaultdict(int))
+    for shift in iter_planned(positions, start, end, ordered=False):
+        if shift.agent_id is None or (agent_ids is not None and shift.agent_id not in agent_ids):
+            continue
+        times = (shift.start.time(), shift.end.time())
+        duration = durations.get(times)
+        if duration is None:
+            duration = durations[times] = int((shift.end - shift.start).total_seconds()) // 60
+        minutes[shift.agent_id][shift.date] += duration
+    return minutes
+
+
+def worked_hours(start, end, positions=None, agent_ids=None):
+    """
+    Return worked hours per agent between start and end (inclusive).
+
+    The result is {agent_id: {'total', 'days', 'weeks', 'months'}} where days
+    are keyed by date, weeks by ISO week ('2025-W02') and months by 'YYYY-MM'.
+    """
+    report = {}
+    for agent_id, days in worked_minutes(start, end, positions, agent_ids).items():
+        weeks = defaultdict(int)
+        months = defaultdict(int)
+        for day, day_minutes in days.items():
+            iso_year, iso_week, _ = day.isocalendar()
+            weeks[f'{iso_year}-W{iso_week:02d}'] += day_minutes
+            months[f'{day.year}-{day.month:02d}'] += day_minutes
+        report[agent_id] = {
+            'total': _hours(sum(days.values())),
+            'days': {day: _hours(day_minutes) for day, day_minutes in sorted(days.items())},
+            'weeks': {week: _hours(week_minutes) for week, week_minutes in sorted(weeks.items())},
+            'months': {month: _hours(month_minutes) for month, month_minutes in sorted(months.items())},
+        }
+    return report
+
+
+def _hours(minutes):
+    return round(minutes / 60, 2)
@@ -0,0 +1,751 @@
+"""
+Global import: restore an archive produced by core.exports.global_export.
+
+Every entry is parsed and validated in memory first, natural keys
+(designation, name, matricule, period start date, position order) being resolved
+through dicts of the objects built from the previous entries. Only then, in a
+single transaction, are the current rows deleted and every model inserted
+with bulk_create in dependency order. Bulk writes bypass signals, so search
+indexes, caches and the materialized roster are rebuilt once at the end.
+
+The per-model imports go through the same loaders: the rows an entry
+references are read once per referenced model (see STORED_KEYS), so an
+import costs a fixed number of queries whatever its size. They either
+replace the whole table or sync it, diffing the imported rows against the
+stored ones on their natural key so that only the changes are written.
+"""
+import copy
+import datetime
+import json
+import re
+import time
+import zipfile
+from collections import defaultdict, namedtuple
+from operator import attrgetter
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import dashboard, holidays, planned_shifts, search
+from .exports import EXPORTS
+from .models import (Agent, DailyRotationPlan, Department, Function, PlannedShift, PublicHoliday, RotationPeriod,
+                     ScheduleType, ShiftSchedule, ShiftScheduleDailyPlan, ShiftSchedulePeriod, ShiftScheduleWeek, Team,
+                     TeamPosition, TeamPositionAgentAssignment, TeamPositionRotationAssignment)
+
+
+BATCH_SIZE = 1000
+
+COLOR_RE = re.compile(r'^#[0-9A-Fa-f]{6}$')
+SHORT_DESIGNATION_RE = re.compile(r'^[A-Z]{2,3}$')
+
+Timing = namedtuple('Timing', 'name count seconds')
+
+
+class ImportValidationError(ValueError):
+    """Every problem found in the imported data, raised before anything is written"""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} erreur(s) de validation")
+        self.errors = errors
+
+
+class NaturalKeys:
+    """Objects of each entry by natural key; a key shared by several rows cannot be referenced"""
+
+    def __init__(self):
+        self._objects = defaultdict(dict)
+        self._ambiguous = defaultdict(set)
+
+    def add(self, name, key, obj):
+        if key in self._objects[name]:
+            self._ambiguous[name].add(key)
+        self._objects[name][key] = obj
+
+    def get(self, name, key, label):
+        if key in self._ambiguous[name]:
+            raise ValueError(f'{label} "{_format_key(key)}" ambigu (plusieurs lignes)')
+        try:
+            return self._objects[name][key]
+        except KeyError:
+            raise ValueError(f'{label} "{_format_key(key)}" introuvable')
+
+
+def _format_key(key):
+    return ' / '.join(str(part) for part in key) if isinstance(key, tuple) else str(key)
+
+
+# Field parsing: each helper raises ValueError with a message for the row
+
+def _text(row, field):
+    value = row.get(field)
+    if value in (None, ''):
+        raise ValueError(f'champ "{field}" manquant ou vide')
+    return value
+
+
+def _int(row, field):
+    value = row.get(field)
+    if value in (None, '') or isinstance(value, bool):
+        raise ValueError(f'champ "{field}" manquant ou vide')
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'champ "{field}" invalide (entier attendu)')
+
+
+def _choice(row, field, choices, default=None):
+    value = (row.get(field) or default) if default else _text(row, field)
+    allowed = [choice for choice, _ in choices]
+    if value not in allowed:
+        raise ValueError(f'champ "{field}" invalide (valeurs possibles: {", ".join(allowed)})')
+    return value
+
+
+def _positive_int(row, field, minimum=1):
+    value = _int(row, field)
+    if value < minimum:
+        raise ValueError(f'champ "{field}" invalide (entier supérieur ou égal à {minimum} attendu)')
+    return value
+
+
+def _date(row, field, required=True):
+    value = row.get(field)
+    if value in (None, ''):
+        if required:
+            raise ValueError(f'champ "{field}" manquant ou vide')
+        return None
+    try:
+        return datetime.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'format de date invalide pour "{field}" (attendu: YYYY-MM-DD)')
+
+
+def _time(row, field):
+    value = _text(row, field)
+    try:
+        return datetime.time.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'format d\'heure invalide pour "{field}" (attendu: HH:MM:SS)')
+
+
+def _date_range(row, start_field='start_date', end_field='end_date'):
+    start, end = _date(row, start_field), _date(row, end_field)
+    if end < start:
+        raise ValueError('la date de fin doit être postérieure ou égale à la date de début')
+    return start, end
+
+
+# Loaders: build the unsaved object of one row, returned with its natural key
+
+def _agent(row, keys):
+    agent = Agent(
+        matricule=_text(row, 'matricule'),
+        last_name=_text(row, 'last_name'),
+        first_name=_text(row, 'first_name'),
+        grade=_choice(row, 'grade', Agent.GRADE_CHOICES),
+        departure_date=_date(row, 'departure_date', required=False),
+        permission_level=_choice(row, 'permission_level', Agent.PERMISSION_CHOICES, default='V'),
+    )
+    hire_date = _date(row, 'hire_date', required=False)
+    if hire_date:
+        agent.hire_date = hire_date
+    return agent.matricule, agent
+
+
+def _department(row, keys):
+    department = Department(name=_text(row, 'name'), order=_positive_int(row, 'order'))
+    return department.name, department
+
+
+def _function(row, keys):
+    status = row.get('status')
+    if status is not None and not isinstance(status, bool):
+        raise ValueError('le statut doit être true ou false')
+    function = Function(
+        designation=_text(row, 'designation'),
+        description=row.get('description'),
+        status=True if status is None else status,
+    )
+    return function.designation, function
+
+
+def _schedule_type(row, keys):
+    short_designation = (row.get('short_designation') or '').upper() or None
+    if short_designation and not SHORT_DESIGNATION_RE.match(short_designation):
+        raise ValueError('l\'abréviation doit contenir 2 ou 3 lettres majuscules uniquement')
+    color = _text(row, 'color')
+    if not COLOR_RE.match(color):
+        raise ValueError('la couleur doit être au format hexadécimal (ex: #FF0000)')
+    schedule_type = ScheduleType(
+        designation=_text(row, 'designation'),
+        short_designation=short_designation,
+        color=color,
+    )
+    return schedule_type.designation, schedule_type
+
+
+def _daily_rotation_plan(row, keys):
+    plan = DailyRotationPlan(
+        designation=_text(row, 'designation'),
+        description=row.get('description'),
+        schedule_type=keys.get('schedule_types', _text(row, 'schedule_type_designation'), "type d'horaire"),
+    )
+    return plan.designation, plan
+
+
+def _rotation_period(row, keys):
+    start_date, end_date = _date_range(row)
+    start_time, end_time = _time(row, 'start_time'), _time(row, 'end_time')
+    # Night shifts end the next morning
+    if start_time >= end_time and not (start_time >= datetime.time(16) and end_time <= datetime.time(12)):
+        raise ValueError('heure de fin invalide. Les équipes de nuit doivent commencer après 16:00 et finir avant 12:00')
+    designation = _text(row, 'daily_rotation_plan_designation')
+    return (designation, start_date), RotationPeriod(
+        daily_rotation_plan=keys.get('daily_rotation_plans', designation, 'rythme quotidien'),
+        start_date=start_date,
+        end_date=end_date,
+        start_time=start_time,
+        end_time=end_time,
+    )
+
+
+def _shift_schedule(row, keys):
+    schedule_type = _text(row, 'type')
+    if schedule_type not in ('day', 'shift'):
+        raise ValueError(f'type "{schedule_type}" invalide (doit être "day" ou "shift")')
+    schedule = ShiftSchedule(
+        name=_text(row, 'name'),
+        type=schedule_type,
+        break_times=2 if row.get('break_times') is None else _positive_int(row, 'break_times', minimum=0),
+    )
+    return schedule.name, schedule
+
+
+def _shift_schedule_period(row, keys):
+    name = _text(row, 'shift_schedule_name')
+    start_date, end_date = _date_range(row)
+    period = ShiftSchedulePeriod(
+        shift_schedule=keys.get('shift_schedules', name, 'planning de poste'),
+        start_date=start_date,
+        end_date=end_date,
+    )
+    # Periods of a schedule never overlap: the start date is enough, and a
+    # sync moves the end date of a period without recreating its weeks
+    return (name, start_date), period
+
+
+def _period_key(row):
+    return _text(row, 'shift_schedule_name'), _date(row, 'period_start_date')
+
+
+def _shift_schedule_week(row, keys):
+    period_key = _period_key(row)
+    week = ShiftScheduleWeek(
+        period=keys.get('shift_schedule_periods', period_key, 'période'),
+        week_number=_positive_int(row, 'week_number'),
+    )
+    return period_key + (week.week_number,), week
+
+
+def _weekday(row):
+    weekday = _int(row, 'weekday')
+    if not 1 <= weekday <= 7:
+        raise ValueError('le jour de la semaine doit être entre 1 (Lundi) et 7 (Dimanche)')
+    return weekday
+
+
+def _shift_schedule_daily_plan(row, keys):
+    week_key = _period_key(row) + (_int(row, 'week_number'),)
+    weekday = _weekday(row)
+    return week_key + (weekday,), ShiftScheduleDailyPlan(
+        week=keys.get('shift_schedule_weeks', week_key, 'semaine'),
+        weekday=weekday,
+        daily_rotation_plan=keys.get(
+            'daily_rotation_plans', _text(row, 'daily_rotation_plan_designation'), 'rythme quotidien'
+        ),
+    )
+
+
+def _public_holiday(row, keys):
+    holiday = PublicHoliday(designation=_text(row, 'designation'), date=_date(row, 'date'))
+    return holiday.date, holiday
+
+
+def _team(row, keys):
+    department_name = _text(row, 'department_name')
+    team = Team(
+        designation=_text(row, 'designation'),
+        description=row.get('description'),
+        color=_text(row, 'color'),
+        department=keys.get('departments', department_name, 'département'),
+    )
+    return (department_name, team.designation), team
+
+
+def _position_key(row, order_field='position_order'):
+    return _text(row, 'department_name'), _text(row, 'team_designation'), _int(row, order_field)
+
+
+def _team_position(row, keys):
+    key = _position_key(row, 'order')
+    position = TeamPosition(
+        team=keys.get('teams', key[:2], 'équipe'),
+        function=keys.get('functions', _text(row, 'function_designation'), 'fonction'),
+        order=key[2],
+        considers_holidays=row.get('considers_holidays', True),
+    )
+    return key, position
+
+
+def _agent_assignment(row, keys):
+    start_date, end_date = _date_range(row)
+    position_key = _position_key(row)
+    return position_key + (start_date,), TeamPositionAgentAssignment(
+        team_position=keys.get('team_positions', position_key, 'poste'),
+        agent=keys.get('agents', _text(row, 'agent_matricule'), 'agent'),
+        start_date=start_date,
+        end_date=end_date,
+    )
+
+
+def _rotation_assignment(row, keys):
+    start_date, end_date = _date_range(row)
+    position_key = _position_key(row)
+    return position_key + (start_date,), TeamPositionRotationAssignment(
+        team_position=keys.get('team_positions', position_key, 'poste'),
+        rotation_plan=keys.get('shift_schedules', _text(row, 'shift_schedule_name'), 'planning de poste'),
+        start_date=start_date,
+        end_date=end_date,
+    )
+
+
+LOADERS = {
+    'agents': _agent,
+    'departments': _department,
+    'functions': _function,
+    'schedule_types': _schedule_type,
+    'daily_rotation_plans': _daily_rotation_plan,
+    'rotation_periods': _rotation_period,
+    'shift_schedules': _shift_schedule,
+    'shift_schedule_periods': _shift_schedule_period,
+    'shift_schedule_weeks': _shift_schedule_week,
+    'shift_schedule_daily_plans': _shift_schedule_daily_plan,
+    'public_holidays': _public_holiday,
+    'teams': _team,
+    'team_positions': _team_position,
+    'team_position_agent_assignments': _agent_assignment,
+    'team_position_rotation_assignments': _rotation_assignment,
+}
+
+# Entries whose natural keys each loader resolves
+REFERENCES = {
+    'daily_rotation_plans': ('schedule_types',),
+    'rotation_periods': ('daily_rotation_plans',),
+    'shift_schedule_periods': ('shift_schedules',),
+    'shift_schedule_weeks': ('shift_schedule_periods',),
+    'shift_schedule_daily_plans': ('shift_schedule_weeks', 'daily_rotation_plans'),
+    'teams': ('departments',),
+    'team_positions': ('teams', 'functions'),
+    'team_position_agent_assignments': ('team_positions', 'agents'),
+    'team_position_rotation_assignments': ('team_positions', 'shift_schedules'),
+}
+
+# How to read the natural keys of the stored rows of an entry: one query, the
+# key built from the same attributes the loader reads from a row
+STORED_KEYS = {
+    'agents': (Agent.objects.all(), attrgetter('matricule')),
+    'departments': (Department.objects.all(), attrgetter('name')),
+    'functions': (Function.objects.all(), attrgetter('designation')),
+    'schedule_types': (ScheduleType.objects.all(), attrgetter('designation')),
+    'daily_rotation_plans': (DailyRotationPlan.objects.all(), attrgetter('designation')),
+    'shift_schedules': (ShiftSchedule.objects.all(), attrgetter('name')),
+    'shift_schedule_periods': (
+        ShiftSchedulePeriod.objects.select_related('shift_schedule').defer('cycle_matrix'),
+        attrgetter('shift_schedule.name', 'start_date'),
+    ),
+    'shift_schedule_weeks': (
+        ShiftScheduleWeek.objects.select_related('period__shift_schedule').defer('period__cycle_matrix'),
+        attrgetter('period.shift_schedule.name', 'period.start_date', 'week_number'),
+    ),
+    'rotation_periods': (
+        RotationPeriod.objects.select_related('daily_rotation_plan'),
+        attrgetter('daily_rotation_plan.designation', 'start_date'),
+    ),
+    'shift_schedule_daily_plans': (
+        ShiftScheduleDailyPlan.objects.select_related('week__period__shift_schedule').defer('week__period__cycle_matrix'),
+        attrgetter('week.period.shift_schedule.name', 'week.period.start_date', 'week.week_number', 'weekday'),
+    ),
+    'public_holidays': (PublicHoliday.objects.all(), attrgetter('date')),
+    'teams': (Team.objects.select_related('department'), attrgetter('department.name', 'designation')),
+    'team_positions': (
+        TeamPosition.objects.select_related('team__department'),
+        attrgetter('team.department.name', 'team.designation', 'order'),
+    ),
+    'team_position_agent_assignments': (
+        TeamPositionAgentAssignment.objects.select_related('team_position__team__department'),
+        attrgetter('team_position.team.department.name', 'team_position.team.designation', 'team_position.order',
+                   'start_date'),
+    ),
+    'team_position_rotation_assignments': (
+        TeamPositionRotationAssignment.objects.select_related('team_position__team__department'),
+        attrgetter('team_position.team.department.name', 'team_position.team.designation', 'team_position.order',
+                   'start_date'),
+    ),
+}
+
+
+# The per-model team and position exports nest what the global export flattens
+
+def _flatten_team(row):
+    department = row.get('department')
+    if isinstance(department, dict):
+        row = {**row, 'department_name': department.get('name')}
+    return row
+
+
+def _flatten_team_position(row):
+    team, function = row.get('team'), row.get('function')
+    if isinstance(team, dict):
+        row = {**row, 'department_name': team.get('department_name'), 'team_designation': team.get('designation')}
+    if isinstance(function, dict):
+        row = {**row, 'function_designation': function.get('designation')}
+    return row
+
+
+FLATTEN = {
+    'teams': _flatten_team,
+    'team_positions': _flatten_team_position,
+}
+
+
+# Entries added to the global export after its first version: archives made
+# before restore with these entries empty.
+OPTIONAL_ENTRIES = frozenset({
+    'public_holidays', 'teams', 'team_positions', 'team_position_agent_assignments',
+    'team_position_rotation_assignments',
+})
+
+
+def read_archive(file):
+    """Return {entry name: list of rows} of a global export ZIP, raising ImportValidationError when unusable"""
+    try:
+        archive = zipfile.ZipFile(file)
+    except zipfile.BadZipFile:
+        raise ImportValidationError(["Le fichier n'est pas une archive ZIP valide."])
+
+    # Entries are named `<date>_<name>.json`: pick the longest matching name
+    names = sorted((export.name for export in EXPORTS), key=len, reverse=True)
+    filenames = {}
+    for filename in archive.namelist():
+        name = next((name for name in names if filename.endswith(f'_{name}.json')), None)
+        if name:
+            filenames[name] = filename
+
+    errors = [f'Fichier "*_{export.name}.json" manquant dans l\'archive.'
+              for export in EXPORTS if export.name not in filenames and export.name not in OPTIONAL_ENTRIES]
+    entries = {name: [] for name in OPTIONAL_ENTRIES}
+    for name, filename in filenames.items():
+        try:
+            entries[name] = json.loads(archive.read(filename).decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            errors.append(f'Le fichier "{filename}" n\'est pas un JSON valide.')
+            continue
+        if not isinstance(entries[name], list):
+            errors.append(f'Le fichier "{filename}" doit contenir une liste.')
+    if errors:
+        raise ImportValidationError(errors)
+    return entries
+
+
+# Entries whose rows must not overlap the date range of a sibling, by parent
+# field: the overlap checks of the models probe a single row on that basis
+DATE_RANGE_PARENTS = {
+    'rotation_periods': 'daily_rotation_plan',
+    'shift_schedule_periods': 'shift_schedule',
+    'team_position_agent_assignments': 'team_position',
+    'team_position_rotation_assignments': 'team_position',
+}
+
+
+def _load(name, rows, keys, label, errors, unique=False):
+    """
+    Build the (natural key, unsaved object) pairs of one entry's rows and
+    register their keys, appending each row's error. With `unique`, a key
+    found on several rows is an error. Rows overlapping a sibling are errors
+    too (see DATE_RANGE_PARENTS).
+    """
+    parent = DATE_RANGE_PARENTS.get(name)
+    ranges = defaultdict(list)
+    loaded, seen = [], set()
+    for index, row in enumerate(rows, start=1):
+        try:
+            if not isinstance(row, dict):
+                raise ValueError('objet JSON attendu')
+            key, obj = LOADERS[name](row, keys)
+            if unique and key in seen:
+                raise ValueError(f'"{_format_key(key)}" en double dans le fichier')
+        except ValueError as e:
+            errors.append(f'{label} {index}: {e}')
+            continue
+        seen.add(key)
+        keys.add(name, key, obj)
+        loaded.append((key, obj))
+        if parent:
+            ranges[id(getattr(obj, parent))].append((obj.start_date, obj.end_date, index))
+    for siblings in ranges.values():
+        errors.extend(_overlap_errors(siblings, label))
+    return loaded
+
+
+def _overlap_errors(siblings, label):
+    """Report each (start_date, end_date, row index) range starting before the end of an earlier one"""
+    errors, latest = [], None
+    for start_date, end_date, index in sorted(siblings):
+        if latest and start_date <= latest[1]:
+            errors.append(f'{label} {index}: chevauche la ligne {latest[2]} ({latest[0]} - {latest[1]})')
+        if latest is None or end_date > latest[1]:
+            latest = (start_date, end_date, index)
+    return errors
+
+
+def parse(entries):
+    """Build the unsaved objects of every entry, raising ImportValidationError listing every invalid row"""
+    keys = NaturalKeys()
+    parsed, errors = [], []
+    for export in EXPORTS:
+        started = time.perf_counter()
+        objects = [obj for _, obj in _load(export.name, entries[export.name], keys, export.name, errors)]
+        parsed.append((export, objects, time.perf_counter() - started))
+    if errors:
+        raise ImportValidationError(errors)
+    return parsed
+
+
+def stored_keys(names):
+    """NaturalKeys of the rows currently stored for the given entries, one query per entry"""
+    keys = NaturalKeys()
+    for name in names:
+        queryset, key = STORED_KEYS[name]
+        for obj in queryset.all():
+            keys.add(name, key(obj), obj)
+    return keys
+
+
+def _mark_roster(model, obj):
+    """Flag the roster slice of a created row, its parents coming from stored_keys() so without a query"""
+    if model in (TeamPositionAgentAssignment, TeamPositionRotationAssignment):
+        planned_shifts.mark_position(obj.team_position_id, obj.start_date, obj.end_date)
+    elif model is RotationPeriod:
+        planned_shifts.mark_daily_rotation_plan(obj.daily_rotation_plan_id, obj.start_date, obj.end_date)
+    elif model is ShiftSchedulePeriod:
+        planned_shifts.mark_schedule(obj.shift_schedule_id, obj.start_date, obj.end_date)
+    elif model in (ShiftScheduleWeek, ShiftScheduleDailyPlan):
+        period = obj.period if model is ShiftScheduleWeek else obj.week.period
+        planned_shifts.mark_schedule(period.shift_schedule_id, period.start_date, period.end_date)
+    elif model is PublicHoliday:
+        planned_shifts.mark_date(obj.date)
+
+
+def _written(model, created=(), updated=()):
+    """
+    Do for bulk-written objects what the post_save receivers of core.signals
+    do, in bulk. `updated` holds (previous state, object) pairs: like a save,
+    an update refreshes the slices of both states. Names copied into other
+    search indexes are natural keys, so an update never changes them.
+    """
+    states = list(created) + [state for pair in updated for state in pair]
+    if not states:
+        return
+    if model in search.INDEXES:
+        search.reindex(model, [obj.pk for obj in created] + [obj.pk for _, obj in updated])
+    if created and model in dashboard.COUNTED_MODELS.values():
+        dashboard.invalidate()
+    if model is PublicHoliday:
+        holidays.invalidate(*{obj.date.year for obj in states})
+    elif model is ShiftScheduleWeek:
+        ShiftSchedulePeriod.rebuild_cycle_matrices(pk__in={obj.period_id for obj in states})
+    elif model is ShiftScheduleDailyPlan:
+        ShiftSchedulePeriod.rebuild_cycle_matrices(weeks__in={obj.week_id for obj in states})
+    for obj in states:
+        _mark_roster(model, obj)
+    # Fields the roster engine reads from rows outside the rotation chain
+    for previous, obj in updated:
+        if model is TeamPosition and previous.considers_holidays != obj.considers_holidays:
+            planned_shifts.mark_position_rotations(obj.pk)
+        elif model is DailyRotationPlan and previous.schedule_type_id != obj.schedule_type_id:
+            planned_shifts.mark_daily_rotation_plan_periods(obj.pk)
+
+
+def _export(name):
+    return next(export for export in EXPORTS if export.name == name)
+
+
+def validate(name, rows, label, unique=False):
+    """
+    Validate the rows of a per-model import against the stored rows they
+    reference, raising ImportValidationError with every row error. Returns
+    the (natural key, unsaved object) pairs of the rows.
+    """
+    keys = stored_keys(REFERENCES.get(name, ()))
+    flatten = FLATTEN.get(name)
+    if flatten:
+        rows = [flatten(row) if isinstance(row, dict) else row for row in rows]
+    errors = []
+    loaded = _load(name, rows, keys, label, errors, unique=unique)
+    if errors:
+        raise ImportValidationError(errors)
+    return loaded
+
+
+def replace(name, rows, label):
+    """
+    Replace every row of one model by `rows`, read in the format of its export.
+
+    The rows are validated in memory against the natural keys of the stored
+    rows they reference, raising ImportValidationError before anything is
+    written. Returns the (created, deleted) counts.
+    """
+    model = _export(name).model
+    objects = [obj for _, obj in validate(name, rows, label)]
+
+    with transaction.atomic():
+        # A queryset delete: its signals take care of the removed rows and of the cascade
+        deleted = model.objects.all().delete()[1].get(model._meta.label, 0)
+        model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+        _written(model, created=objects)
+    return len(objects), deleted
+
+
+def sync(name, rows, label):
+    """
+    Bring the rows of one model in line with `rows`, read in the format of its
+    export, matching imported and stored rows on their natural key.
+
+    Stored rows missing from the file are deleted, new rows bulk-created and
+    changed ones bulk-updated; unchanged rows are not written, so the rows
+    depending on them are kept. The fields compared are those the export
+    reads. Raises ImportValidationError before anything is written when a row
+    is invalid or a key repeated. Agents are created with their accounts and
+    the accounts of updated or deleted agents follow them, as with save() and
+    delete(). Returns the (created, updated, deleted) counts.
+    """
+    export = _export(name)
+    model = export.model
+    loaded = validate(name, rows, label, unique=True)
+
+    queryset, key_of = STORED_KEYS[name]
+    stored, stale = {}, []
+    for obj in queryset.all():
+        key = key_of(obj)
+        if key in stored:
+            stale.append(obj.pk)  # A duplicate the file cannot designate
+        else:
+            stored[key] = obj
+
+    fields = [model._meta.get_field(field_name) for field_name in dict.fromkeys(
+        lookup.split('__')[0] for _, lookup in export.fields
+    )]
+    touched = [field.name for field in model._meta.concrete_fields if getattr(field, 'auto_now', False)]
+    now = timezone.now()
+    created, updated = [], []
+    for key, obj in loaded:
+        current = stored.pop(key, None)
+        if current is None:
+            created.append(obj)
+        elif any(getattr(obj, field.attname) != getattr(current, field.attname) for field in fields):
+            previous = copy.copy(current)
+            for field in fields:
+                setattr(current, field.name, getattr(obj, field.name))
+            for field_name in touched:
+                setattr(current, field_name, now)
+            updated.append((previous, current))
+    stale += [obj.pk for obj in stored.values()]
+    if not (stale or updated or created):
+        return 0, 0, 0
+
+    # The accounts of deleted agents go with them, superusers' excepted
+    stale_accounts = []
+    if model is Agent and stale:
+        stale_accounts = list(
+            User.objects.filter(agent__pk__in=stale, is_superuser=False).values_list('pk', flat=True)
+        )
+
+    deleted = 0
+    with transaction.atomic():
+        # Queryset deletes: their signals take care of the removed rows and of the cascade
+        for start in range(0, len(stale), BATCH_SIZE):
+            batch = model.objects.filter(pk__in=stale[start:start + BATCH_SIZE])
+            deleted += batch.delete()[1].get(model._meta.label, 0)
+        model.objects.bulk_update(
+            [obj for _, obj in updated], [field.name for field in fields] + touched, batch_size=BATCH_SIZE
+        )
+        if model is Agent:
+            Agent.bulk_provision(created, batch_size=BATCH_SIZE)
+            _update_accounts([obj for _, obj in updated])
+            User.objects.filter(pk__in=stale_accounts).delete()
+        else:
+            model.objects.bulk_create(created, batch_size=BATCH_SIZE)
+        _written(model, created, updated)
+    return len(created), len(updated), deleted
+
+
+def _update_accounts(agents):
+    """Do for the accounts of bulk-updated agents what Agent.save() does"""
+    users = User.objects.in_bulk([agent.user_id for agent in agents if agent.user_id])
+    for agent in agents:
+        user = users.get(agent.user_id)
+        if user:
+            user.first_name, user.last_name = agent.first_name, agent.last_name
+            user.is_staff = user.is_superuser = agent.permission_level == 'S'
+    User.objects.bulk_update(
+        users.values(), ['first_name', 'last_name', 'is_staff', 'is_superuser'], batch_size=BATCH_SIZE
+    )
+
+
+def _wipe():
+    """Delete every restored table, the materialized roster and the accounts of non-superuser agents"""
+    user_ids = list(User.objects.filter(agent__isnull=False, is_superuser=False).values_list('pk', flat=True))
+    # Plain DELETEs, children first: a queryset delete would load every row to send its signals
+    with connection.cursor() as cursor:
+        for model in [PlannedShift] + [export.model for export in reversed(EXPORTS)]:
+            cursor.execute(f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)}')
+    User.objects.filter(pk__in=user_ids).delete()
+
+
+def restore(file):
+    """
+    Replace the whole planning by the content of a global export archive.
+
+    Returns the Timing of each step: parsing and insertion per model, then the
+    rebuild of the search indexes and of the materialized roster.
+    """
+    parsed = parse(read_archive(file))
+    holiday_years = {day.year for day in PublicHoliday.objects.dates('date', 'year')}
+
+    timings = []
+    with transaction.atomic():
+        started = time.perf_counter()
+        _wipe()
+        timings.append(Timing('suppression', None, time.perf_counter() - started))
+
+        for export, objects, parse_seconds in parsed:
+            started = time.perf_counter()
+            if export.model is Agent:
+                Agent.bulk_provision(objects, batch_size=BATCH_SIZE)
+            else:
+                export.model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+            timings.append(Timing(export.name, len(objects), parse_seconds + time.perf_counter() - started))
+
+        started = time.perf_counter()
+        search.rebuild()
+        timings.append(Timing('index de recherche', None, time.perf_counter() - started))
+
+        started = time.perf_counter()
+        created = planned_shifts.rebuild()
+        timings.append(Timing('planning matérialisé', created, time.perf_counter() - started))
+
+    holiday_years.update(day.year for day in PublicHoliday.objects.dates('date', 'year'))
+    holidays.invalidate(*holiday_years)
+    dashboard.invalidate()
+    return timings
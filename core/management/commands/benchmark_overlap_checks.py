@@ -0,0 +1,54 @@
+from datetime import date, time, timedelta
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.models import DailyRotationPlan, RotationPeriod, ScheduleType
+
+
+class Command(BaseCommand):
+    help = "Mesure le coût de la validation des chevauchements de périodes de rotation selon leur nombre"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,100,1000,5000',
+                            help="Nombres de périodes existantes à tester, séparés par des virgules")
+        parser.add_argument('--repeat', type=int, default=200, help="Nombre de validations mesurées par taille")
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        repeat = options['repeat']
+
+        # Everything is created inside a transaction that is rolled back at the end
+        with transaction.atomic():
+            schedule_type = ScheduleType.objects.create(designation="Benchmark", short_designation="BEN", color="#000000")
+            for size in sizes:
+                plan = DailyRotationPlan.objects.create(designation=f"Benchmark {size}", schedule_type=schedule_type)
+                first_day = date(2000, 1, 1)
+                RotationPeriod.objects.bulk_create(
+                    RotationPeriod(daily_rotation_plan=plan, start_time=time(8, 0), end_time=time(16, 0),
+                                   start_date=first_day + timedelta(days=2 * index),
+                                   end_date=first_day + timedelta(days=2 * index))
+                    for index in range(size)
+                )
+                # A candidate in the middle of the plan's history, not overlapping anything
+                middle = first_day + timedelta(days=2 * (size // 2) + 1)
+                candidate = RotationPeriod(daily_rotation_plan=plan, start_date=middle, end_date=middle,
+                                           start_time=time(8, 0), end_time=time(16, 0))
+
+                started = perf_counter()
+                for _ in range(repeat):
+                    candidate.clean()
+                elapsed = (perf_counter() - started) / repeat
+
+                self.stdout.write(f'{size:>7} périodes : {elapsed * 1e6:8.1f} µs par validation')
+
+            # The probe issued by first_overlapping()
+            probe = RotationPeriod.objects.filter(
+                daily_rotation_plan_id=plan.pk, start_date__lte=middle
+            ).order_by('-start_date')[:1]
+            sql, params = probe.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                self.stdout.write('Plan : ' + ' / '.join(row[-1] for row in cursor.fetchall()))
+            transaction.set_rollback(True)
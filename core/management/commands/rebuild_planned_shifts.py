@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core import planned_shifts
+
+
+class Command(BaseCommand):
+    help = "Recalcule entièrement la table des services planifiés (PlannedShift)"
+
+    def handle(self, *args, **options):
+        created = planned_shifts.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'{created} services planifiés générés.'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core import search
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les index de recherche plein texte (agents, rythmes quotidiens, équipes)"
+
+    def handle(self, *args, **options):
+        if not search.available():
+            self.stdout.write(self.style.WARNING("La recherche plein texte nécessite SQLite (FTS5)."))
+            return
+        search.rebuild()
+        self.stdout.write(self.style.SUCCESS('Index de recherche reconstruits.'))
@@ -0,0 +1,17 @@
+from .decorators import get_request_agent
+
+
+class AgentMiddleware:
+    """
+    Resolve the Agent of the authenticated user once per request and expose
+    it as `request.agent` (None for anonymous users and users without agent).
+    
+    Must be placed after AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        get_request_agent(request)
+        return self.get_response(request)
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_remove_team_function_unique_constraint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlannedShift',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Jour de début du service')),
+                ('start', models.DateTimeField(help_text='Début du service')),
+                ('end', models.DateTimeField(help_text='Fin du service')),
+                ('is_holiday', models.BooleanField(default=False, help_text='Service effectué un jour férié')),
+                ('agent', models.ForeignKey(blank=True, help_text='Agent affecté (vide si le poste est vacant)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='planned_shifts', to='core.agent')),
+                ('daily_rotation_plan', models.ForeignKey(help_text='Rythme quotidien appliqué ce jour', on_delete=django.db.models.deletion.CASCADE, to='core.dailyrotationplan')),
+                ('schedule_type', models.ForeignKey(help_text="Type d'horaire du service", on_delete=django.db.models.deletion.CASCADE, to='core.scheduletype')),
+                ('team_position', models.ForeignKey(help_text="Poste d'équipe concerné", on_delete=django.db.models.deletion.CASCADE, related_name='planned_shifts', to='core.teamposition')),
+            ],
+            options={
+                'verbose_name': 'Service Planifié',
+                'verbose_name_plural': 'Services Planifiés',
+                'ordering': ['date', 'team_position'],
+                'indexes': [models.Index(fields=['date', 'team_position'], name='plannedshift_date_idx'), models.Index(fields=['agent', 'date'], name='plannedshift_agent_date_idx')],
+                'unique_together': {('team_position', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_plannedshift'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shiftscheduleperiod',
+            name='cycle_matrix',
+            field=models.JSONField(blank=True, editable=False, help_text='Cache semaines × 7 jours des rythmes quotidiens (recalculé automatiquement)', null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_shiftscheduleperiod_cycle_matrix'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='teampositionagentassignment',
+            index=models.Index(fields=['agent', 'start_date', 'end_date'], name='agentassign_agent_range_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations
+
+
+# FTS5 tables backing core.search; the rowid of each row is the indexed object's pk
+SEARCH_TABLES = {
+    'core_agent_search': (
+        ('matricule', 'first_name', 'last_name'),
+        'SELECT id, matricule, first_name, last_name FROM core_agent',
+    ),
+    'core_dailyrotationplan_search': (
+        ('designation', 'description', 'schedule_type'),
+        'SELECT p.id, p.designation, COALESCE(p.description, \'\'), COALESCE(t.designation, \'\') '
+        'FROM core_dailyrotationplan p LEFT JOIN core_scheduletype t ON t.id = p.schedule_type_id',
+    ),
+    'core_team_search': (
+        ('designation', 'description', 'department'),
+        'SELECT t.id, t.designation, COALESCE(t.description, \'\'), COALESCE(d.name, \'\') '
+        'FROM core_team t LEFT JOIN core_department d ON d.id = t.department_id',
+    ),
+}
+
+
+def create_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table, (columns, source) in SEARCH_TABLES.items():
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {table} USING fts5({', '.join(columns)}, "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='1 2 3')"
+        )
+        schema_editor.execute(f"INSERT INTO {table} (rowid, {', '.join(columns)}) {source}")
+
+
+def drop_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table in SEARCH_TABLES:
+        schema_editor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_teampositionagentassignment_agent_range_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_tables, drop_search_tables),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rotationperiod',
+            index=models.Index(fields=['daily_rotation_plan', 'start_date', 'end_date'], name='rotperiod_plan_range_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shiftscheduleperiod',
+            index=models.Index(fields=['shift_schedule', 'start_date', 'end_date'], name='schedperiod_schedule_range_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teampositionagentassignment',
+            index=models.Index(fields=['team_position', 'start_date', 'end_date'], name='agentassign_position_range_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teampositionrotationassignment',
+            index=models.Index(fields=['team_position', 'start_date', 'end_date'], name='rotassign_position_range_idx'),
+        ),
+    ]
@@ -1,9 +1,33 @@
 from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.conf import settings
 from django.core.validators import RegexValidator
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.contrib.auth.models import User
-from datetime import datetime, time
+from datetime import datetime, time, timedelta
+
+
+class DateRangeQuerySet(models.QuerySet):
+    def overlapping(self, start_date, end_date):
+        """Rows whose [start_date, end_date] range intersects the given one"""
+        return self.filter(start_date__lte=end_date, end_date__gte=start_date)
+    
+    def first_overlapping(self, start_date, end_date=None):
+        """
+        The row intersecting [start_date, end_date] (open-ended when end_date is
+        None), or None, among rows that do not overlap each other (what the
+        clean() methods and the imports enforce per parent).
+        
+        Only the last row starting on or before end_date can intersect the range,
+        so filtered on a parent this is a single seek on the (parent, start_date,
+        end_date) index, whatever the number of rows.
+        """
+        candidates = self if end_date is None else self.filter(start_date__lte=end_date)
+        candidate = candidates.order_by('-start_date').first()
+        if candidate is not None and candidate.end_date >= start_date:
+            return candidate
+        return None
 
 
 class Agent(models.Model):
@@ -39,6 +63,9 @@ class Agent(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, null=True, blank=True)
     password_changed = models.BooleanField(default=False, verbose_name="Mot de passe modifié")
     
+    # Initial password of every account created for an agent
+    DEFAULT_PASSWORD = 'azerty'
+    
     def clean(self):
         super().clean()
         if self.departure_date and self.hire_date and self.departure_date <= self.hire_date:
@@ -59,7 +86,7 @@ class Agent(models.Model):
                 username=self.matricule,
                 first_name=self.first_name,
                 last_name=self.last_name,
-                password='azerty'
+                password=self.DEFAULT_PASSWORD
             )
             # Set staff status for Super Administrators
             if self.permission_level == 'S':
@@ -84,6 +111,51 @@ class Agent(models.Model):
             
             self.user.save()
     
+    @classmethod
+    @transaction.atomic
+    def bulk_provision(cls, agents, accounts=None, batch_size=1000):
+        """
+        Insert unsaved agents with their user accounts in a constant number of
+        queries, instead of save() hashing the initial password and saving twice
+        per agent. The password is hashed once and shared by the new accounts.
+        
+        Existing accounts are reused, and renamed with one bulk_update: those of
+        `accounts` ({matricule: user}, e.g. kept superusers) and those named after
+        a matricule. Bypasses save() and signals.
+        """
+        from django.contrib.auth.hashers import make_password
+        
+        agents = list(agents)
+        existing = {
+            user.username: user
+            for user in User.objects.filter(username__in=[agent.matricule for agent in agents])
+        }
+        existing.update(accounts or {})
+        for agent in agents:
+            user = existing.get(agent.matricule)
+            if user:
+                user.first_name = agent.first_name
+                user.last_name = agent.last_name
+        User.objects.bulk_update(
+            [existing[agent.matricule] for agent in agents if agent.matricule in existing],
+            ['first_name', 'last_name'], batch_size=batch_size
+        )
+        
+        password = make_password(cls.DEFAULT_PASSWORD)
+        users = [
+            User(username=agent.matricule, first_name=agent.first_name, last_name=agent.last_name,
+                 password=password, is_staff=agent.permission_level == 'S',
+                 is_superuser=agent.permission_level == 'S')
+            for agent in agents if agent.matricule not in existing
+        ]
+        User.objects.bulk_create(users, batch_size=batch_size)
+        
+        user_ids = {user.username: user.pk for user in users}
+        user_ids.update((matricule, user.pk) for matricule, user in existing.items())
+        for agent in agents:
+            agent.user_id = user_ids[agent.matricule]
+        return cls.objects.bulk_create(agents, batch_size=batch_size)
+    
     def is_super_admin(self):
         return self.permission_level == 'S'
     
@@ -227,6 +299,8 @@ class RotationPeriod(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = DateRangeQuerySet.as_manager()
+    
     def clean(self):
         super().clean()
         
@@ -250,20 +324,17 @@ class RotationPeriod(models.Model):
                         'end_time': 'L\'heure de fin doit être postérieure à l\'heure de début, sauf pour les équipes de nuit. Les équipes de nuit sont automatiquement détectées (ex: 16:00-08:00, 22:00-06:00).'
                     })
         
-        # Check for overlapping periods within the same plan
-        if self.daily_rotation_plan_id:
-            overlapping_periods = RotationPeriod.objects.filter(
-                daily_rotation_plan=self.daily_rotation_plan
-            ).exclude(pk=self.pk if self.pk else None)
-            
-            for period in overlapping_periods:
-                # Check if date ranges overlap
-                if (self.start_date <= period.end_date and 
-                    self.end_date >= period.start_date):
-                    raise ValidationError({
-                        'start_date': f'Cette période chevauche avec une période existante ({period.start_date} - {period.end_date}).',
-                        'end_date': f'Cette période chevauche avec une période existante ({period.start_date} - {period.end_date}).'
-                    })
+        # Check for overlapping periods within the same plan (one indexed range query)
+        if self.daily_rotation_plan_id and self.start_date and self.end_date:
+            overlapping = RotationPeriod.objects.filter(
+                daily_rotation_plan_id=self.daily_rotation_plan_id
+            ).exclude(pk=self.pk).first_overlapping(self.start_date, self.end_date)
+            if overlapping:
+                start_date, end_date = overlapping.start_date, overlapping.end_date
+                raise ValidationError({
+                    'start_date': f'Cette période chevauche avec une période existante ({start_date} - {end_date}).',
+                    'end_date': f'Cette période chevauche avec une période existante ({start_date} - {end_date}).'
+                })
     
     def is_night_shift(self):
         """Check if this is a night shift (end_time < start_time)"""
@@ -297,6 +368,9 @@ class RotationPeriod(models.Model):
         verbose_name = "Période de Rotation"
         verbose_name_plural = "Périodes de Rotation"
         ordering = ['start_date', 'start_time']
+        indexes = [
+            models.Index(fields=['daily_rotation_plan', 'start_date', 'end_date'], name='rotperiod_plan_range_idx'),
+        ]
 
 
 class ShiftSchedule(models.Model):
@@ -344,9 +418,17 @@ class ShiftSchedulePeriod(models.Model):
     end_date = models.DateField(
         help_text="Date de fin de la période"
     )
+    cycle_matrix = models.JSONField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Cache semaines × 7 jours des rythmes quotidiens (recalculé automatiquement)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = DateRangeQuerySet.as_manager()
+    
     def clean(self):
         super().clean()
         
@@ -356,20 +438,103 @@ class ShiftSchedulePeriod(models.Model):
                 'end_date': 'La date de fin doit être postérieure ou égale à la date de début.'
             })
         
-        # Check for overlapping periods within the same shift schedule
-        if self.shift_schedule_id:
-            overlapping_periods = ShiftSchedulePeriod.objects.filter(
-                shift_schedule=self.shift_schedule
-            ).exclude(pk=self.pk if self.pk else None)
-            
-            for period in overlapping_periods:
-                # Check if date ranges overlap
-                if (self.start_date <= period.end_date and 
-                    self.end_date >= period.start_date):
-                    raise ValidationError({
-                        'start_date': f'Cette période chevauche avec une période existante ({period.start_date} - {period.end_date}).',
-                        'end_date': f'Cette période chevauche avec une période existante ({period.start_date} - {period.end_date}).'
-                    })
+        # Check for overlapping periods within the same shift schedule (one indexed range query)
+        if self.shift_schedule_id and self.start_date and self.end_date:
+            overlapping = ShiftSchedulePeriod.objects.filter(
+                shift_schedule_id=self.shift_schedule_id
+            ).exclude(pk=self.pk).first_overlapping(self.start_date, self.end_date)
+            if overlapping:
+                start_date, end_date = overlapping.start_date, overlapping.end_date
+                raise ValidationError({
+                    'start_date': f'Cette période chevauche avec une période existante ({start_date} - {end_date}).',
+                    'end_date': f'Cette période chevauche avec une période existante ({start_date} - {end_date}).'
+                })
+    
+    @staticmethod
+    def cycle_anchor(start_date):
+        """Monday of the week containing start_date: week 1 of the cycle starts there"""
+        return start_date - timedelta(days=start_date.weekday())
+    
+    @classmethod
+    def build_cycle_matrices(cls, period_ids, rebuild=False):
+        """
+        Compute and store the cycle matrix of the given periods, return {period_id: matrix}.
+        
+        Read paths only fill the matrices that are still missing, so a matrix
+        computed from weeks that changed meanwhile never overwrites the one
+        stored by the writer, which rebuilds in its own transaction.
+        """
+        matrices = {period_id: [] for period_id in period_ids}
+        if not matrices:
+            return matrices
+        
+        rows = {}
+        weeks = ShiftScheduleWeek.objects.filter(
+            period_id__in=matrices
+        ).order_by('period_id', 'week_number').values_list('pk', 'period_id')
+        for week_id, period_id in weeks:
+            rows[week_id] = [None] * 7
+            matrices[period_id].append(rows[week_id])
+        
+        daily_plans = ShiftScheduleDailyPlan.objects.filter(
+            week_id__in=rows
+        ).values_list('week_id', 'weekday', 'daily_rotation_plan_id')
+        for week_id, weekday, plan_id in daily_plans:
+            rows[week_id][weekday - 1] = plan_id
+        
+        # bulk_update() keeps the filter of the queryset it is called on
+        periods = cls.objects.all() if rebuild else cls.objects.filter(cycle_matrix__isnull=True)
+        periods.bulk_update(
+            [cls(pk=period_id, cycle_matrix=matrix) for period_id, matrix in matrices.items()],
+            ['cycle_matrix']
+        )
+        return matrices
+    
+    @classmethod
+    def rebuild_cycle_matrices(cls, **filters):
+        """Recompute the cycle matrix of the matching periods after a change to their weeks"""
+        period_ids = set(cls.objects.filter(**filters).values_list('pk', flat=True))
+        return cls.build_cycle_matrices(period_ids, rebuild=True)
+    
+    def renumber_weeks(self, week_ids=None):
+        """
+        Number the weeks of the period 1, 2, 3... in the order of `week_ids`
+        (by default their current order, closing the gaps left by deletions).
+        
+        Only the weeks whose number changes are written, in two UPDATE
+        statements whatever their count: the first moves them above every
+        current number, the second assigns the final ones, so unique
+        (period, week_number) holds after each statement. Bypasses signals:
+        callers refresh the planned shifts of the period.
+        """
+        current = dict(self.weeks.values_list('pk', 'week_number'))
+        if week_ids is None:
+            week_ids = sorted(current, key=current.get)
+        else:
+            week_ids = [int(week_id) for week_id in week_ids]
+            if len(week_ids) != len(current) or set(week_ids) != set(current):
+                raise ValueError("L'ordre doit contenir chaque semaine de la période une seule fois.")
+        
+        numbers = {
+            week_id: number for number, week_id in enumerate(week_ids, start=1)
+            if current[week_id] != number
+        }
+        if not numbers:
+            return 0
+        
+        weeks = ShiftScheduleWeek.objects.filter(pk__in=numbers)
+        weeks.update(week_number=F('week_number') + max(max(current.values()), len(current)))
+        weeks.update(week_number=Case(
+            *[When(pk=week_id, then=Value(number)) for week_id, number in numbers.items()]
+        ))
+        self.cycle_matrix = ShiftSchedulePeriod.rebuild_cycle_matrices(pk=self.pk).get(self.pk)
+        return len(numbers)
+    
+    def get_cycle_matrix(self):
+        """Return the weeks × 7 matrix of DailyRotationPlan ids (Monday first, None for empty days)"""
+        if self.cycle_matrix is None:
+            self.cycle_matrix = ShiftSchedulePeriod.build_cycle_matrices([self.pk])[self.pk]
+        return self.cycle_matrix
     
     def __str__(self):
         return f"{self.shift_schedule.name} - {self.start_date} à {self.end_date}"
@@ -378,6 +543,9 @@ class ShiftSchedulePeriod(models.Model):
         verbose_name = "Période de Planning de Poste"
         verbose_name_plural = "Périodes de Planning de Poste"
         ordering = ['start_date']
+        indexes = [
+            models.Index(fields=['shift_schedule', 'start_date', 'end_date'], name='schedperiod_schedule_range_idx'),
+        ]
 
 
 class ShiftScheduleWeek(models.Model):
@@ -655,6 +823,31 @@ class Team(models.Model):
         ordering = ['department__order', 'designation']
 
 
+class TeamPositionQuerySet(models.QuerySet):
+    def with_assignments_as_of(self, day=None):
+        """
+        Prefetch the agent and rotation assignments active on `day` (today by
+        default) so current_agent and current_rotation_plan need no query.
+        """
+        day = day or timezone.now().date()
+        return self.prefetch_related(
+            models.Prefetch(
+                'agent_assignments',
+                queryset=TeamPositionAgentAssignment.objects.filter(
+                    start_date__lte=day, end_date__gte=day
+                ).select_related('agent'),
+                to_attr='active_agent_assignments',
+            ),
+            models.Prefetch(
+                'rotation_assignments',
+                queryset=TeamPositionRotationAssignment.objects.filter(
+                    start_date__lte=day, end_date__gte=day
+                ).select_related('rotation_plan'),
+                to_attr='active_rotation_assignments',
+            ),
+        )
+
+
 class TeamPosition(models.Model):
     team = models.ForeignKey(
         Team,
@@ -678,6 +871,8 @@ class TeamPosition(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = TeamPositionQuerySet.as_manager()
+    
     def clean(self):
         super().clean()
         
@@ -704,6 +899,9 @@ class TeamPosition(models.Model):
     
     def get_current_agent_assignment(self):
         """Get the current active agent assignment"""
+        if hasattr(self, 'active_agent_assignments'):
+            # Prefetched by TeamPosition.objects.with_assignments_as_of()
+            return self.active_agent_assignments[0] if self.active_agent_assignments else None
         from django.utils import timezone
         today = timezone.now().date()
         return self.agent_assignments.filter(
@@ -713,6 +911,9 @@ class TeamPosition(models.Model):
     
     def get_current_rotation_assignment(self):
         """Get the current active rotation assignment"""
+        if hasattr(self, 'active_rotation_assignments'):
+            # Prefetched by TeamPosition.objects.with_assignments_as_of()
+            return self.active_rotation_assignments[0] if self.active_rotation_assignments else None
         from django.utils import timezone
         today = timezone.now().date()
         return self.rotation_assignments.filter(
@@ -762,6 +963,8 @@ class TeamPositionAgentAssignment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = DateRangeQuerySet.as_manager()
+    
     def clean(self):
         super().clean()
         
@@ -773,18 +976,31 @@ class TeamPositionAgentAssignment(models.Model):
         
         # Check for overlapping assignments for the same team position
         if self.team_position_id and self.start_date and self.end_date:
-            overlapping_assignments = TeamPositionAgentAssignment.objects.filter(
-                team_position=self.team_position,
-                start_date__lte=self.end_date,
-                end_date__gte=self.start_date
-            ).exclude(pk=self.pk if self.pk else None)
+            overlapping = TeamPositionAgentAssignment.objects.filter(
+                team_position_id=self.team_position_id
+            ).exclude(pk=self.pk).select_related('agent').first_overlapping(self.start_date, self.end_date)
             
-            if overlapping_assignments.exists():
-                overlapping = overlapping_assignments.first()
+            if overlapping:
                 raise ValidationError({
                     'start_date': f'Cette période chevauche avec une affectation existante ({overlapping.start_date} - {overlapping.end_date}) pour l\'agent {overlapping.agent}.',
                     'end_date': f'Cette période chevauche avec une affectation existante ({overlapping.start_date} - {overlapping.end_date}) pour l\'agent {overlapping.agent}.'
                 })
+        
+        # Optionally prevent the agent from being assigned to two positions at once
+        if getattr(settings, 'PREVENT_AGENT_DOUBLE_BOOKING', False) and self.agent_id and self.start_date and self.end_date:
+            conflict = self.conflicting_assignments().select_related('team_position__team', 'team_position__function').first()
+            if conflict:
+                message = (
+                    f'L\'agent est déjà affecté au poste {conflict.team_position.function.designation} '
+                    f'({conflict.team_position.team.designation}) du {conflict.start_date} au {conflict.end_date}.'
+                )
+                raise ValidationError({'agent': message})
+    
+    def conflicting_assignments(self):
+        """Assignments of the same agent on other positions overlapping this one (indexed range query)"""
+        return TeamPositionAgentAssignment.objects.filter(agent_id=self.agent_id).overlapping(
+            self.start_date, self.end_date
+        ).exclude(team_position_id=self.team_position_id).exclude(pk=self.pk)
     
     def is_active(self):
         """Check if this assignment is currently active"""
@@ -799,6 +1015,10 @@ class TeamPositionAgentAssignment(models.Model):
         verbose_name = "Affectation d'Agent"
         verbose_name_plural = "Affectations d'Agents"
         ordering = ['-start_date', 'agent__matricule']
+        indexes = [
+            models.Index(fields=['agent', 'start_date', 'end_date'], name='agentassign_agent_range_idx'),
+            models.Index(fields=['team_position', 'start_date', 'end_date'], name='agentassign_position_range_idx'),
+        ]
 
 
 class TeamPositionRotationAssignment(models.Model):
@@ -822,6 +1042,8 @@ class TeamPositionRotationAssignment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = DateRangeQuerySet.as_manager()
+    
     def clean(self):
         super().clean()
         
@@ -833,14 +1055,11 @@ class TeamPositionRotationAssignment(models.Model):
         
         # Check for overlapping assignments for the same team position
         if self.team_position_id and self.start_date and self.end_date:
-            overlapping_assignments = TeamPositionRotationAssignment.objects.filter(
-                team_position=self.team_position,
-                start_date__lte=self.end_date,
-                end_date__gte=self.start_date
-            ).exclude(pk=self.pk if self.pk else None)
+            overlapping = TeamPositionRotationAssignment.objects.filter(
+                team_position_id=self.team_position_id
+            ).exclude(pk=self.pk).select_related('rotation_plan').first_overlapping(self.start_date, self.end_date)
             
-            if overlapping_assignments.exists():
-                overlapping = overlapping_assignments.first()
+            if overlapping:
                 raise ValidationError({
                     'start_date': f'Cette période chevauche avec une affectation existante ({overlapping.start_date} - {overlapping.end_date}) pour le roulement {overlapping.rotation_plan}.',
                     'end_date': f'Cette période chevauche avec une affectation existante ({overlapping.start_date} - {overlapping.end_date}) pour le roulement {overlapping.rotation_plan}.'
@@ -859,3 +1078,64 @@ class TeamPositionRotationAssignment(models.Model):
         verbose_name = "Affectation de Roulement"
         verbose_name_plural = "Affectations de Roulements"
         ordering = ['-start_date', 'rotation_plan__name']
+        indexes = [
+            models.Index(fields=['team_position', 'start_date', 'end_date'], name='rotassign_position_range_idx'),
+        ]
+
+
+class PlannedShift(models.Model):
+    """Materialized roster: one row per team position and per worked day.
+
+    Rows are derived from the rotation chain by core.planned_shifts and kept
+    up to date by the signal handlers in core.signals; never edit them by hand.
+    """
+    team_position = models.ForeignKey(
+        TeamPosition,
+        on_delete=models.CASCADE,
+        related_name='planned_shifts',
+        help_text="Poste d'équipe concerné"
+    )
+    date = models.DateField(
+        help_text="Jour de début du service"
+    )
+    agent = models.ForeignKey(
+        Agent,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='planned_shifts',
+        help_text="Agent affecté (vide si le poste est vacant)"
+    )
+    start = models.DateTimeField(
+        help_text="Début du service"
+    )
+    end = models.DateTimeField(
+        help_text="Fin du service"
+    )
+    schedule_type = models.ForeignKey(
+        ScheduleType,
+        on_delete=models.CASCADE,
+        help_text="Type d'horaire du service"
+    )
+    daily_rotation_plan = models.ForeignKey(
+        DailyRotationPlan,
+        on_delete=models.CASCADE,
+        help_text="Rythme quotidien appliqué ce jour"
+    )
+    is_holiday = models.BooleanField(
+        default=False,
+        help_text="Service effectué un jour férié"
+    )
+    
+    def __str__(self):
+        return f"{self.team_position_id} - {self.date}"
+    
+    class Meta:
+        verbose_name = "Service Planifié"
+        verbose_name_plural = "Services Planifiés"
+        ordering = ['date', 'team_position']
+        unique_together = ['team_position', 'date']
+        indexes = [
+            models.Index(fields=['date', 'team_position'], name='plannedshift_date_idx'),
+            models.Index(fields=['agent', 'date'], name='plannedshift_agent_date_idx'),
+        ]
@@ -0,0 +1,136 @@
+"""
+Keyset (cursor) pagination for the list views.
+
+Instead of OFFSET, each page continues after the sort values of the last
+row of the previous one, so fetching a page costs the same whatever its
+position in the table. The cursor is an opaque token carrying those values;
+the primary key is always appended to the ordering to break ties.
+"""
+import base64
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.http import QueryDict
+
+PAGE_SIZE = 50
+
+
+class KeysetPage:
+    """One page of rows, with the query string of the next page if any"""
+
+    def __init__(self, object_list, next_cursor=None, params=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.next_query = ''
+        if next_cursor:
+            params = params.copy() if params is not None else QueryDict(mutable=True)
+            params['cursor'] = next_cursor
+            self.next_query = params.urlencode()
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def _field(queryset, path):
+    """Resolve an annotation or a lookup path such as 'schedule_type__designation' to its field"""
+    if path in queryset.query.annotations:
+        return queryset.query.annotations[path].output_field
+    model = queryset.model
+    field = None
+    for name in path.split('__'):
+        field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        if field.is_relation:
+            model = field.related_model
+    if field.is_relation:
+        field = field.target_field
+    return field
+
+
+def _value(obj, path):
+    for name in path.split('__'):
+        if obj is None:
+            return None
+        obj = getattr(obj, name)
+    return getattr(obj, 'pk', obj)
+
+
+def encode_cursor(values):
+    data = json.dumps(values, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, fields):
+    """Decode a cursor into python values for `fields`, raising ValueError when malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("Curseur de pagination invalide")
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise ValueError("Curseur de pagination invalide")
+    try:
+        return [None if value is None else field.to_python(value) for field, value in zip(fields, values)]
+    except Exception:
+        raise ValueError("Curseur de pagination invalide")
+
+
+def _after(ordering, values):
+    """
+    Build the filter selecting rows strictly after `values` for `ordering`.
+
+    NULLs sort first in ascending and last in descending order (the sqlite
+    default, made explicit in the ORDER BY so every backend agrees).
+    """
+    condition = None
+    equal = Q()
+    for path, value in zip(ordering, values):
+        descending = path.startswith('-')
+        name = path.lstrip('-')
+        if value is None:
+            after = Q(**{f'{name}__isnull': False}) if not descending else None
+            same = Q(**{f'{name}__isnull': True})
+        else:
+            after = Q(**{f'{name}__lt' if descending else f'{name}__gt': value})
+            if descending:
+                after |= Q(**{f'{name}__isnull': True})
+            same = Q(**{name: value})
+        if after is not None:
+            condition = equal & after if condition is None else condition | (equal & after)
+        equal &= same
+    return condition
+
+
+def keyset_paginate(queryset, ordering, params=None, page_size=PAGE_SIZE):
+    """
+    Return the KeysetPage of `queryset` sorted by `ordering` (order_by-style
+    field names) that follows the ?cursor= of `params`. A malformed cursor
+    restarts from the first page.
+    """
+    ordering = [path for path in ordering if path.lstrip('-') not in ('pk', 'id')]
+    ordering.append('-pk' if ordering and ordering[-1].startswith('-') else 'pk')
+    fields = [_field(queryset, path.lstrip('-')) for path in ordering]
+
+    queryset = queryset.order_by(*[
+        F(path[1:]).desc(nulls_last=True) if path.startswith('-') else F(path).asc(nulls_first=True)
+        for path in ordering
+    ])
+    cursor = params.get('cursor') if params is not None else None
+    if cursor:
+        try:
+            queryset = queryset.filter(_after(ordering, decode_cursor(cursor, fields)))
+        except ValueError:
+            pass
+
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor([_value(rows[-1], path.lstrip('-')) for path in ordering])
+    return KeysetPage(rows, next_cursor, params)
@@ -0,0 +1,293 @@
+"""
+Materialized roster (PlannedShift) maintenance.
+
+Changes to the rotation chain are recorded as dirty slices by the signal
+handlers of core.signals. The slices of a transaction are flushed once it
+commits, and dropped with it when it rolls back: they are resolved to
+(positions, date range) groups and only those rows are recomputed with the
+roster engine.
+
+Calendars, planning grids and reports read the stored rows back as roster
+Shift tuples through iter_planned() and planned_positions().
+"""
+import threading
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import (PlannedShift, RotationPeriod, ShiftScheduleDailyPlan, ShiftSchedulePeriod, TeamPosition,
+                     TeamPositionRotationAssignment)
+from .roster import Shift, expand_positions, expand_positions_queryset
+
+
+BATCH_SIZE = 1000
+REBUILD_CHUNK_DAYS = 366
+
+SHIFT_FIELDS = (
+    'team_position_id', 'date', 'agent_id', 'start', 'end', 'schedule_type_id', 'daily_rotation_plan_id', 'is_holiday',
+)
+
+_pending = threading.local()
+
+
+def iter_planned(positions, start, end, agent_id=None, ordered=True):
+    """
+    Return an iterator over the stored shifts of a TeamPosition queryset between start and end (inclusive).
+
+    Rows are read back as roster Shift tuples with a single streamed query, in
+    date order unless `ordered=False`, and their times are converted to the
+    current time zone like those of the roster engine. With `agent_id`, only
+    the shifts worked by that agent are kept.
+    """
+    rows = PlannedShift.objects.filter(team_position__in=positions, date__gte=start, date__lte=end)
+    if agent_id is not None:
+        rows = rows.filter(agent_id=agent_id)
+    rows = rows.order_by('date', 'team_position_id') if ordered else rows.order_by()
+    tz = timezone.get_current_timezone()
+    return (
+        Shift(position_id, day, shift_agent_id, shift_start.astimezone(tz), shift_end.astimezone(tz),
+              schedule_type_id, plan_id, is_holiday)
+        for position_id, day, shift_agent_id, shift_start, shift_end, schedule_type_id, plan_id, is_holiday
+        in rows.values_list(*SHIFT_FIELDS).iterator(chunk_size=BATCH_SIZE)
+    )
+
+
+def planned_positions(positions, start, end):
+    """
+    Return the stored shifts of a TeamPosition queryset as {position_id: {date: Shift}}.
+
+    Like roster.expand_positions_queryset, every position of the queryset is
+    present, with an empty dict when nothing is planned for it, and the inner
+    dicts are ordered by date.
+    """
+    roster = {position_id: {} for position_id in positions.values_list('pk', flat=True)}
+    for shift in iter_planned(positions, start, end):
+        roster[shift.position_id][shift.date] = shift
+    return roster
+
+
+def refresh(position_ids, start, end):
+    """Recompute the PlannedShift rows of the given positions between start and end (inclusive)"""
+    position_ids = list(position_ids)
+    if not position_ids or start > end:
+        return 0
+    with transaction.atomic():
+        PlannedShift.objects.filter(
+            team_position_id__in=position_ids, date__gte=start, date__lte=end
+        ).delete()
+        return _store(expand_positions(position_ids, start, end))
+
+
+def rebuild():
+    """Recompute the whole PlannedShift table from the rotation assignments"""
+    bounds = TeamPositionRotationAssignment.objects.aggregate(start=Min('start_date'), end=Max('end_date'))
+    created = 0
+    # Everything is recomputed: the slices recorded so far are superseded
+    batch = _live_batch()
+    if batch is not None:
+        batch.slices.clear()
+        _pending.batch = None
+    with transaction.atomic():
+        PlannedShift.objects.all().delete()
+        if bounds['start'] is None:
+            return created
+        chunk_start = bounds['start']
+        while chunk_start <= bounds['end']:
+            chunk_end = min(chunk_start + timedelta(days=REBUILD_CHUNK_DAYS - 1), bounds['end'])
+            created += _store(expand_positions_queryset(TeamPosition.objects.all(), chunk_start, chunk_end))
+            chunk_start = chunk_end + timedelta(days=1)
+    return created
+
+
+def _store(roster):
+    rows = [
+        PlannedShift(
+            team_position_id=shift.position_id,
+            date=shift.date,
+            agent_id=shift.agent_id,
+            start=shift.start,
+            end=shift.end,
+            schedule_type_id=shift.schedule_type_id,
+            daily_rotation_plan_id=shift.daily_rotation_plan_id,
+            is_holiday=shift.is_holiday,
+        )
+        for shifts in roster.values()
+        for shift in shifts.values()
+    ]
+    PlannedShift.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return len(rows)
+
+
+# Dirty slice tracking
+
+class _Batch:
+    """The dirty slices of one transaction, flushed by its on_commit callback"""
+
+    def __init__(self):
+        self.slices = set()
+
+    def __call__(self):
+        if getattr(_pending, 'batch', None) is self:
+            _pending.batch = None
+        slices, self.slices = self.slices, set()
+        _flush(slices)
+
+
+def _live_batch():
+    """
+    The batch of the current transaction, or None. Django drops the on_commit
+    callbacks of a transaction or savepoint that rolls back, so a batch whose
+    callback is gone belongs to a rollback and its slices are forgotten.
+    """
+    batch = getattr(_pending, 'batch', None)
+    connection = transaction.get_connection()
+    if batch is not None and any(callback is batch for _, callback, _ in connection.run_on_commit):
+        return batch
+    return None
+
+
+def _mark(*dirty_slice):
+    if not transaction.get_connection().in_atomic_block:
+        _flush({dirty_slice})
+        return
+    batch = _live_batch()
+    if batch is None:
+        batch = _pending.batch = _Batch()
+        # Not robust: a failed refresh must surface (rebuild_planned_shifts recovers)
+        transaction.on_commit(batch, robust=False)
+    batch.slices.add(dirty_slice)
+
+
+def mark_position(position_id, start, end):
+    """Flag a position's planning between start and end as stale"""
+    _mark('position', position_id, start, end)
+
+
+def mark_position_rotations(position_id):
+    """Flag every rotation assignment of a position as stale"""
+    assignments = TeamPositionRotationAssignment.objects.filter(team_position_id=position_id)
+    for start, end in assignments.values_list('start_date', 'end_date'):
+        mark_position(position_id, start, end)
+
+
+def mark_schedule(schedule_id, start, end):
+    """Flag every position using a shift schedule between start and end as stale"""
+    _mark('schedule', schedule_id, start, end)
+
+
+def mark_schedule_period(period_id):
+    """Flag every position using a shift schedule period as stale"""
+    period = ShiftSchedulePeriod.objects.filter(pk=period_id).values_list(
+        'shift_schedule_id', 'start_date', 'end_date'
+    ).first()
+    if period:
+        mark_schedule(*period)
+
+
+def mark_week(week_id):
+    """Flag every position using the period of a shift schedule week as stale"""
+    period = ShiftSchedulePeriod.objects.filter(weeks=week_id).values_list(
+        'shift_schedule_id', 'start_date', 'end_date'
+    ).first()
+    if period:
+        mark_schedule(*period)
+
+
+def mark_daily_rotation_plan(plan_id, start, end):
+    """Flag every position whose cycle uses a daily rotation plan between start and end as stale"""
+    _mark('plan', plan_id, start, end)
+
+
+def mark_daily_rotation_plan_periods(plan_id):
+    """Flag every position whose cycle uses any period of a daily rotation plan as stale"""
+    periods = RotationPeriod.objects.filter(daily_rotation_plan_id=plan_id)
+    for start, end in periods.values_list('start_date', 'end_date'):
+        mark_daily_rotation_plan(plan_id, start, end)
+
+
+def mark_date(day):
+    """Flag every position planned on a given day as stale"""
+    _mark('date', day, day, day)
+
+
+def flush():
+    """Recompute now the slices recorded in the current transaction, instead of once it commits"""
+    batch = _live_batch()
+    if batch is not None:
+        batch()
+
+
+def _flush(slices):
+    if not slices:
+        return
+
+    by_kind = defaultdict(list)
+    for kind, key, start, end in slices:
+        by_kind[kind].append((key, start, end))
+
+    schedule_slices = by_kind['schedule'] + _resolve_plans(by_kind['plan'])
+    position_slices = (
+        by_kind['position']
+        + _resolve_schedules(schedule_slices)
+        + _resolve_dates([start for _, start, _ in by_kind['date']])
+    )
+
+    # Positions sharing the same merged date range are refreshed together
+    groups = defaultdict(list)
+    for position_id, ranges in _merge(position_slices).items():
+        for start, end in ranges:
+            groups[(start, end)].append(position_id)
+    with transaction.atomic():
+        for (start, end), position_ids in groups.items():
+            refresh(position_ids, start, end)
+
+
+def _resolve_plans(plan_slices):
+    schedule_slices = []
+    for plan_id, start, end in plan_slices:
+        periods = ShiftScheduleDailyPlan.objects.filter(
+            daily_rotation_plan_id=plan_id,
+            week__period__start_date__lte=end,
+            week__period__end_date__gte=start,
+        ).values_list(
+            'week__period__shift_schedule_id', 'week__period__start_date', 'week__period__end_date'
+        ).distinct()
+        for schedule_id, period_start, period_end in periods:
+            schedule_slices.append((schedule_id, max(start, period_start), min(end, period_end)))
+    return schedule_slices
+
+
+def _resolve_schedules(schedule_slices):
+    position_slices = []
+    for schedule_id, start, end in schedule_slices:
+        assignments = TeamPositionRotationAssignment.objects.filter(
+            rotation_plan_id=schedule_id, start_date__lte=end, end_date__gte=start
+        ).values_list('team_position_id', 'start_date', 'end_date')
+        for position_id, assignment_start, assignment_end in assignments:
+            position_slices.append((position_id, max(start, assignment_start), min(end, assignment_end)))
+    return position_slices
+
+
+def _resolve_dates(days):
+    position_slices = []
+    for day in set(days):
+        position_ids = TeamPositionRotationAssignment.objects.filter(
+            start_date__lte=day, end_date__gte=day
+        ).values_list('team_position_id', flat=True).distinct()
+        position_slices.extend((position_id, day, day) for position_id in position_ids)
+    return position_slices
+
+
+def _merge(position_slices):
+    """Merge overlapping or adjacent date ranges per position"""
+    ranges = defaultdict(list)
+    for position_id, start, end in sorted(position_slices, key=lambda item: (item[0], item[1])):
+        merged = ranges[position_id]
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return ranges
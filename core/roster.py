@@ -0,0 +1,186 @@
+"""
+Roster expansion engine.
+
+Turns the rotation chain TeamPosition -> TeamPositionRotationAssignment ->
+ShiftSchedule -> ShiftSchedulePeriod -> ShiftScheduleWeek ->
+ShiftScheduleDailyPlan -> DailyRotationPlan -> RotationPeriod into concrete
+shifts. Every level is loaded once with a single query, and the week cycle is
+read from the matrix cached on each ShiftSchedulePeriod, so the number of
+queries does not depend on the number of positions or on the length of the
+requested date range.
+"""
+from bisect import bisect_right
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+from .holidays import holiday_mask
+from .models import (RotationPeriod, ShiftSchedulePeriod, TeamPosition, TeamPositionAgentAssignment,
+                     TeamPositionRotationAssignment)
+
+
+ONE_DAY = timedelta(days=1)
+
+# One concrete shift of a position on a given day. `agent_id` is None when the
+# position is vacant ("Poste Vacant"). `is_holiday` flags shifts worked on a
+# public holiday by positions that do not take holidays into account.
+Shift = namedtuple('Shift', [
+    'position_id',
+    'date',
+    'agent_id',
+    'start',
+    'end',
+    'schedule_type_id',
+    'daily_rotation_plan_id',
+    'is_holiday',
+])
+
+
+def expand_positions(position_ids, start, end):
+    """Expand the given positions into shifts between start and end (inclusive)"""
+    return expand_positions_queryset(TeamPosition.objects.filter(pk__in=position_ids), start, end)
+
+
+def expand_positions_queryset(positions, start, end):
+    """
+    Expand a TeamPosition queryset into shifts.
+
+    Returns a dict {position_id: {date: Shift}}. Every position of the queryset
+    is present, with an empty dict when nothing is planned for it, and the
+    inner dicts are ordered by date.
+    """
+    chain = _RotationChain(positions, start, end)
+    return {
+        position_id: {shift.date: shift for shift in chain.shifts(position_id, considers_holidays)}
+        for position_id, considers_holidays in chain.positions
+    }
+
+
+class _RotationChain:
+    """The rotation chain of a set of positions between two dates, loaded with one query per level"""
+
+    def __init__(self, positions, start, end):
+        self.start = start
+        self.end = end
+        self.positions = list(positions.order_by('pk').values_list('pk', 'considers_holidays'))
+        self.loaded = bool(self.positions) and start <= end
+        if not self.loaded:
+            return
+
+        position_ids = [position_id for position_id, _ in self.positions]
+
+        self.agents = _load_intervals(
+            TeamPositionAgentAssignment.objects.filter(
+                team_position_id__in=position_ids, start_date__lte=end, end_date__gte=start
+            ).values_list('team_position_id', 'start_date', 'end_date', 'agent_id')
+        )
+        self.rotations = _load_intervals(
+            TeamPositionRotationAssignment.objects.filter(
+                team_position_id__in=position_ids, start_date__lte=end, end_date__gte=start
+            ).values_list('team_position_id', 'start_date', 'end_date', 'rotation_plan_id')
+        )
+
+        schedule_ids = {row[2] for intervals in self.rotations.values() for row in intervals}
+        self.schedule_periods = _load_intervals(
+            ShiftSchedulePeriod.objects.filter(
+                shift_schedule_id__in=schedule_ids, start_date__lte=end, end_date__gte=start
+            ).values_list('shift_schedule_id', 'start_date', 'end_date', 'pk', 'cycle_matrix')
+        ) if schedule_ids else {}
+
+        self.cycles = load_cycles(row[2] for intervals in self.schedule_periods.values() for row in intervals)
+
+        plan_ids = {
+            plan_id for cycle in self.cycles.values() for week in cycle for plan_id in week if plan_id is not None
+        }
+        self.plan_periods = _load_intervals(
+            RotationPeriod.objects.filter(
+                daily_rotation_plan_id__in=plan_ids, start_date__lte=end, end_date__gte=start
+            ).values_list(
+                'daily_rotation_plan_id', 'start_date', 'end_date',
+                'start_time', 'end_time', 'daily_rotation_plan__schedule_type_id'
+            )
+        ) if plan_ids else {}
+
+        self.holidays = holiday_mask(start, end)
+        self.tz = timezone.get_current_timezone()
+
+    def shifts(self, position_id, considers_holidays):
+        """Yield the shifts of one position in date order"""
+        if not self.loaded:
+            return
+        start, end, holidays, tz = self.start, self.end, self.holidays, self.tz
+        position_agents = self.agents.get(position_id, EMPTY_INTERVALS)
+        for rotation_start, rotation_end, schedule_id in self.rotations.get(position_id, ()):
+            for period_start, period_end, (period_id, _) in self.schedule_periods.get(schedule_id, ()):
+                first = max(start, rotation_start, period_start)
+                last = min(end, rotation_end, period_end)
+                cycle = self.cycles.get(period_id)
+                if first > last or not cycle:
+                    continue
+
+                anchor = ShiftSchedulePeriod.cycle_anchor(period_start)
+                day = first
+                while day <= last:
+                    plan_id = cycle[((day - anchor).days // 7) % len(cycle)][day.weekday()]
+                    is_holiday = holidays[(day - start).days]
+                    if plan_id is not None and not (is_holiday and considers_holidays):
+                        rotation_period = self.plan_periods.get(plan_id, EMPTY_INTERVALS).covering(day)
+                        if rotation_period is not None:
+                            start_time, end_time, schedule_type_id = rotation_period[2]
+                            agent = position_agents.covering(day)
+                            shift_start = datetime.combine(day, start_time, tzinfo=tz)
+                            shift_end = datetime.combine(
+                                day + ONE_DAY if start_time > end_time else day, end_time, tzinfo=tz
+                            )
+                            yield Shift(
+                                position_id, day, agent[2] if agent else None, shift_start, shift_end,
+                                schedule_type_id, plan_id, is_holiday,
+                            )
+                    day += ONE_DAY
+
+
+def load_cycles(periods):
+    """
+    Return the cycle matrix of each ShiftSchedulePeriod as {period_id: matrix}.
+
+    `periods` are (period_id, stored cycle_matrix) pairs; matrices that are not
+    cached yet are built together with two queries and stored for next time.
+    """
+    cycles = dict(periods)
+    missing = [period_id for period_id, matrix in cycles.items() if matrix is None]
+    if missing:
+        cycles.update(ShiftSchedulePeriod.build_cycle_matrices(missing))
+    return cycles
+
+
+class IntervalList:
+    """Sorted [start, end] date intervals that do not overlap each other, looked up by bisect"""
+
+    def __init__(self, rows):
+        self.rows = sorted(rows, key=lambda row: row[0])
+        self.starts = [row[0] for row in self.rows]
+
+    def covering(self, day):
+        """Return the row whose interval contains `day`, or None"""
+        index = bisect_right(self.starts, day) - 1
+        if index >= 0 and self.rows[index][1] >= day:
+            return self.rows[index]
+        return None
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __bool__(self):
+        return bool(self.rows)
+
+
+EMPTY_INTERVALS = IntervalList([])
+
+
+def _load_intervals(rows):
+    """Group (key, start_date, end_date, *payload) rows into one IntervalList per key"""
+    grouped = defaultdict(list)
+    for key, start_date, end_date, *payload in rows:
+        grouped[key].append((start_date, end_date, payload[0] if len(payload) == 1 else tuple(payload)))
+    return {key: IntervalList(intervals) for key, intervals in grouped.items()}
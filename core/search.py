@@ -0,0 +1,110 @@
+"""
+Full-text search over agents, daily rotation plans and teams.
+
+Each searchable model has an SQLite FTS5 table (created by migration 0028)
+whose rowid is the object's primary key. Rows are rewritten by the signal
+handlers of core.signals whenever an indexed object, or the schedule type or
+department name copied into it, changes. Queries match every word of the
+search text as a prefix and rank results with bm25; on other database
+backends search falls back to OR'ed icontains filters.
+"""
+import re
+from collections import namedtuple
+
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Agent, DailyRotationPlan, Team
+
+
+# `sources` are the lookups copied into the FTS columns, in order; `weights`
+# are the matching bm25 column weights.
+SearchIndex = namedtuple('SearchIndex', 'table sources weights')
+
+INDEXES = {
+    Agent: SearchIndex('core_agent_search', ('matricule', 'first_name', 'last_name'), (10.0, 5.0, 5.0)),
+    DailyRotationPlan: SearchIndex(
+        'core_dailyrotationplan_search', ('designation', 'description', 'schedule_type__designation'), (10.0, 1.0, 2.0)
+    ),
+    Team: SearchIndex('core_team_search', ('designation', 'description', 'department__name'), (10.0, 1.0, 2.0)),
+}
+
+WORD_RE = re.compile(r'\w+')
+
+
+def available():
+    return connection.vendor == 'sqlite'
+
+
+def column_names(index):
+    return [source.split('__')[0] for source in index.sources]
+
+
+def match_expression(text):
+    """Turn free text into an FTS5 query matching every word as a prefix"""
+    return ' '.join(f'"{word}"*' for word in WORD_RE.findall(text))
+
+
+def reindex(model, pks=None):
+    """Rewrite the index rows of `model` for `pks`, or the whole index when pks is None"""
+    if not available():
+        return
+    index = INDEXES[model]
+    queryset = model.objects.all()
+    if pks is not None:
+        pks = list(pks)
+        if not pks:
+            return
+        queryset = queryset.filter(pk__in=pks)
+    rows = [
+        tuple('' if value is None else value for value in row)
+        for row in queryset.values_list('pk', *index.sources)
+    ]
+    columns = ', '.join(column_names(index))
+    placeholders = ', '.join(['%s'] * (len(index.sources) + 1))
+    with connection.cursor() as cursor:
+        if pks is None:
+            cursor.execute(f'DELETE FROM {index.table}')
+        else:
+            cursor.executemany(f'DELETE FROM {index.table} WHERE rowid = %s', [(pk,) for pk in pks])
+        cursor.executemany(f'INSERT INTO {index.table} (rowid, {columns}) VALUES ({placeholders})', rows)
+
+
+def remove(model, pks):
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {INDEXES[model].table} WHERE rowid = %s', [(pk,) for pk in pks])
+
+
+def rebuild():
+    """Rebuild every search index from scratch"""
+    for model in INDEXES:
+        reindex(model)
+
+
+def search(queryset, text):
+    """
+    Restrict `queryset` to the objects matching `text`, annotated with a
+    `search_rank` float (lower is more relevant) to order by.
+    """
+    index = INDEXES[queryset.model]
+    if not available():
+        condition = Q()
+        for source in index.sources:
+            condition |= Q(**{f'{source}__icontains': text})
+        return queryset.filter(condition).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    expression = match_expression(text)
+    if not expression:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+    pk_column = f'"{queryset.model._meta.db_table}"."{queryset.model._meta.pk.column}"'
+    weights = ', '.join(str(weight) for weight in index.weights)
+    return queryset.filter(
+        pk__in=RawSQL(f'SELECT rowid FROM {index.table} WHERE {index.table} MATCH %s', [expression])
+    ).annotate(search_rank=RawSQL(
+        f'SELECT bm25({index.table}, {weights}) FROM {index.table} '
+        f'WHERE {index.table} MATCH %s AND rowid = {pk_column}',
+        [expression], output_field=FloatField(),
+    ))
@@ -0,0 +1,227 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+from . import dashboard, holidays, planned_shifts, search
+from .models import (DailyRotationPlan, Department, PlannedShift, PublicHoliday, RotationPeriod, ScheduleType,
+                     ShiftScheduleDailyPlan, ShiftSchedulePeriod, ShiftScheduleWeek, Team, TeamPosition,
+                     TeamPositionAgentAssignment, TeamPositionRotationAssignment)
+
+
+# Cycle matrix cache: a ShiftSchedulePeriod's matrix is rebuilt, in the same
+# transaction, whenever one of its weeks or daily plans changes. These
+# receivers are connected first so a PlannedShift refresh never reads a stale
+# matrix.
+
+def _rebuild_week_period(instance):
+    ShiftSchedulePeriod.rebuild_cycle_matrices(pk=instance.period_id)
+
+
+def _rebuild_daily_plan_period(instance):
+    ShiftSchedulePeriod.rebuild_cycle_matrices(weeks=instance.week_id)
+
+
+CYCLE_MATRIX_SOURCES = {
+    ShiftScheduleWeek: _rebuild_week_period,
+    ShiftScheduleDailyPlan: _rebuild_daily_plan_period,
+}
+
+
+def rebuild_cycle_matrix_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    rebuild = CYCLE_MATRIX_SOURCES[sender]
+    previous = getattr(instance, '_previous_state', None)
+    if previous is not None:
+        rebuild(previous)
+    rebuild(instance)
+
+
+def rebuild_cycle_matrix_deleted(sender, instance, **kwargs):
+    CYCLE_MATRIX_SOURCES[sender](instance)
+
+
+for model in CYCLE_MATRIX_SOURCES:
+    post_save.connect(
+        rebuild_cycle_matrix_saved, sender=model, dispatch_uid=f'cycle_matrix_post_save_{model.__name__}'
+    )
+    post_delete.connect(
+        rebuild_cycle_matrix_deleted, sender=model, dispatch_uid=f'cycle_matrix_post_delete_{model.__name__}'
+    )
+
+
+# Public holiday bitmaps: the cached year of a holiday is dropped when it is
+# created, edited (old and new year) or deleted.
+
+def invalidate_holiday_bitmap(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_state', None)
+    years = {instance.date.year}
+    if previous is not None:
+        years.add(previous.date.year)
+    holidays.invalidate(*years)
+
+
+post_save.connect(invalidate_holiday_bitmap, sender=PublicHoliday, dispatch_uid='holiday_bitmap_post_save')
+post_delete.connect(invalidate_holiday_bitmap, sender=PublicHoliday, dispatch_uid='holiday_bitmap_post_delete')
+
+
+# Full-text search: indexed rows are rewritten on save and dropped on delete;
+# renaming a schedule type or department rewrites the rows that copy its name.
+
+def reindex_search(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.reindex(sender, [instance.pk])
+
+
+def remove_search(sender, instance, **kwargs):
+    search.remove(sender, [instance.pk])
+
+
+def reindex_schedule_type_plans(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    search.reindex(DailyRotationPlan, instance.dailyrotationplan_set.values_list('pk', flat=True))
+
+
+def reindex_department_teams(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    search.reindex(Team, instance.team_set.values_list('pk', flat=True))
+
+
+for model in search.INDEXES:
+    post_save.connect(reindex_search, sender=model, dispatch_uid=f'search_post_save_{model.__name__}')
+    post_delete.connect(remove_search, sender=model, dispatch_uid=f'search_post_delete_{model.__name__}')
+post_save.connect(reindex_schedule_type_plans, sender=ScheduleType, dispatch_uid='search_post_save_ScheduleType')
+post_save.connect(reindex_department_teams, sender=Department, dispatch_uid='search_post_save_Department')
+
+
+# Dashboard counters: only creations and deletions change a count.
+
+def invalidate_dashboard_created(sender, instance, created=False, **kwargs):
+    if created:
+        dashboard.invalidate()
+
+
+def invalidate_dashboard_deleted(sender, instance, **kwargs):
+    dashboard.invalidate()
+
+
+for model in dashboard.COUNTED_MODELS.values():
+    post_save.connect(invalidate_dashboard_created, sender=model, dispatch_uid=f'dashboard_post_save_{model.__name__}')
+    post_delete.connect(invalidate_dashboard_deleted, sender=model, dispatch_uid=f'dashboard_post_delete_{model.__name__}')
+
+
+# PlannedShift refresh: each model of the rotation chain maps to the slice of
+# the materialized roster it affects.
+
+def _mark_assignment(instance):
+    planned_shifts.mark_position(instance.team_position_id, instance.start_date, instance.end_date)
+
+
+def _mark_rotation_period(instance):
+    planned_shifts.mark_daily_rotation_plan(instance.daily_rotation_plan_id, instance.start_date, instance.end_date)
+
+
+def _mark_schedule_period(instance):
+    planned_shifts.mark_schedule(instance.shift_schedule_id, instance.start_date, instance.end_date)
+
+
+def _mark_week(instance):
+    planned_shifts.mark_schedule_period(instance.period_id)
+
+
+def _mark_daily_plan(instance):
+    planned_shifts.mark_week(instance.week_id)
+
+
+def _mark_public_holiday(instance):
+    planned_shifts.mark_date(instance.date)
+
+
+PLANNED_SHIFT_SOURCES = {
+    TeamPositionAgentAssignment: _mark_assignment,
+    TeamPositionRotationAssignment: _mark_assignment,
+    RotationPeriod: _mark_rotation_period,
+    ShiftSchedulePeriod: _mark_schedule_period,
+    ShiftScheduleWeek: _mark_week,
+    ShiftScheduleDailyPlan: _mark_daily_plan,
+    PublicHoliday: _mark_public_holiday,
+}
+
+
+def remember_previous_state(sender, instance, raw=False, **kwargs):
+    """Keep the stored version of the instance so post_save can refresh its old slice too"""
+    instance._previous_state = None
+    if not raw and instance.pk is not None:
+        instance._previous_state = sender.objects.filter(pk=instance.pk).first()
+
+
+def mark_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    mark = PLANNED_SHIFT_SOURCES[sender]
+    previous = getattr(instance, '_previous_state', None)
+    if previous is not None:
+        mark(previous)
+    mark(instance)
+
+
+def mark_deleted(sender, instance, **kwargs):
+    # pre_delete: related rows still exist, and deletions run in a transaction
+    # so the refresh only happens once the rows are gone.
+    PLANNED_SHIFT_SOURCES[sender](instance)
+
+
+def populate_planned_shifts(sender, using='default', **kwargs):
+    """post_migrate: compute the materialized roster of a database that has rotation assignments but none yet"""
+    if PlannedShift.objects.using(using).exists():
+        return
+    if TeamPositionRotationAssignment.objects.using(using).exists():
+        planned_shifts.rebuild()
+
+
+for model in PLANNED_SHIFT_SOURCES:
+    pre_save.connect(remember_previous_state, sender=model, dispatch_uid=f'planned_shift_pre_save_{model.__name__}')
+    post_save.connect(mark_saved, sender=model, dispatch_uid=f'planned_shift_post_save_{model.__name__}')
+    pre_delete.connect(mark_deleted, sender=model, dispatch_uid=f'planned_shift_pre_delete_{model.__name__}')
+
+
+
+# A few fields read by the roster engine live on rows that are not part of the
+# slices above: when one of them changes, every slice using the row is stale.
+
+def _mark_position_rotations(instance):
+    planned_shifts.mark_position_rotations(instance.pk)
+
+
+def _mark_daily_rotation_plan_periods(instance):
+    planned_shifts.mark_daily_rotation_plan_periods(instance.pk)
+
+
+EXPANSION_FIELDS = {
+    TeamPosition: ('considers_holidays', _mark_position_rotations),
+    DailyRotationPlan: ('schedule_type_id', _mark_daily_rotation_plan_periods),
+}
+
+
+def remember_expansion_field(sender, instance, raw=False, **kwargs):
+    field, _ = EXPANSION_FIELDS[sender]
+    instance._previous_expansion_field = []
+    if not raw and instance.pk is not None:
+        instance._previous_expansion_field = list(sender.objects.filter(pk=instance.pk).values_list(field, flat=True))
+
+
+def mark_expansion_field_saved(sender, instance, raw=False, **kwargs):
+    field, mark = EXPANSION_FIELDS[sender]
+    previous = getattr(instance, '_previous_expansion_field', [])
+    if not raw and previous and previous[0] != getattr(instance, field):
+        mark(instance)
+
+
+for model in EXPANSION_FIELDS:
+    pre_save.connect(
+        remember_expansion_field, sender=model, dispatch_uid=f'planned_shift_field_pre_save_{model.__name__}'
+    )
+    post_save.connect(
+        mark_expansion_field_saved, sender=model, dispatch_uid=f'planned_shift_field_post_save_{model.__name__}'
+    )
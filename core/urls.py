@@ -13,7 +13,10 @@ urlpatterns = [
     # User Manual
     path('user-manual/', views.user_manual, name='user_manual'),
     
-    # HTMX endpoints for dashboard stats
+    # Dashboard stats
+    path('api/dashboard-stats/', views.api_dashboard_stats, name='api_dashboard_stats'),
+    
+    # HTMX endpoints for individual dashboard counters
     path('agent-count/', views.agent_count, name='agent_count'),
     path('function-count/', views.function_count, name='function_count'),
     path('schedule-type-count/', views.schedule_type_count, name='schedule_type_count'),
@@ -68,6 +71,8 @@ urlpatterns = [
     # API endpoints for periods
     path('api/plans/<int:plan_id>/periods/', views.api_plan_periods, name='api_plan_periods'),
     path('api/shift-schedules/<int:schedule_id>/periods/', views.api_shift_schedule_periods, name='api_shift_schedule_periods'),
+    path('api/shift-schedules/tree/', views.api_shift_schedules_tree, name='api_shift_schedules_tree'),
+    path('api/shift-schedules/<int:schedule_id>/tree/', views.api_shift_schedule_tree, name='api_shift_schedule_tree'),
     
     # API endpoints for weeks
     path('api/shift-schedule-periods/<int:period_id>/weeks/', views.api_shift_schedule_period_weeks, name='api_shift_schedule_period_weeks'),
@@ -88,6 +93,8 @@ urlpatterns = [
     path('shift-schedule-periods/<int:period_id>/weeks/create/', views.shift_schedule_week_create, name='shift_schedule_week_create'),
     path('shift-schedule-weeks/<int:week_id>/edit/', views.shift_schedule_week_edit, name='shift_schedule_week_edit'),
     path('shift-schedule-weeks/<int:week_id>/delete/', views.shift_schedule_week_delete, name='shift_schedule_week_delete'),
+    path('shift-schedule-periods/<int:period_id>/weeks/delete/', views.shift_schedule_weeks_delete, name='shift_schedule_weeks_delete'),
+    path('shift-schedule-periods/<int:period_id>/weeks/reorder/', views.shift_schedule_weeks_reorder, name='shift_schedule_weeks_reorder'),
     path('shift-schedule-weeks/<int:week_id>/duplicate/', views.shift_schedule_week_duplicate, name='shift_schedule_week_duplicate'),
     
     # Shift Schedule Daily Plan URLs
@@ -115,6 +122,7 @@ urlpatterns = [
     path('teams/create/', views.team_create, name='team_create'),
     path('teams/<int:team_id>/edit/', views.team_edit, name='team_edit'),
     path('teams/<int:team_id>/delete/', views.team_delete, name='team_delete'),
+    path('teams/<int:team_id>/planning/', views.team_planning, name='team_planning'),
     
     # Team Position URLs
     path('teams/<int:team_id>/positions/create/', views.team_position_create, name='team_position_create'),
@@ -131,7 +139,15 @@ urlpatterns = [
     
     # API endpoints for teams
     path('api/teams/<int:team_id>/positions/', views.api_team_positions, name='api_team_positions'),
+    path('api/agents/<int:agent_id>/calendar/', views.api_agent_calendar, name='api_agent_calendar'),
+    
+    # Reports
+    path('reports/hours/', views.hours_report, name='hours_report'),
+    path('reports/coverage/', views.coverage_report, name='coverage_report'),
+    path('reports/conflicts/', views.conflict_report, name='conflict_report'),
+    path('api/hours/', views.api_hours, name='api_hours'),
     
     # Global Export URL
     path('global-export/', views.global_export, name='global_export'),
+    path('global-import/', views.global_import, name='global_import'),
 ]
\ No newline at end of file
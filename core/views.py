@@ -1,12 +1,13 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib import messages
 from django.views.decorators.http import require_http_methods
-from django.db.models import Q, Count
+from django.db.models import Q, Count, F, ExpressionWrapper, DurationField, BooleanField
 from django.db import transaction
+from django.conf import settings
 from django import forms
 from django.core.serializers import serialize
 from django.contrib.auth.models import User
@@ -23,6 +24,8 @@ from .models import (Agent, Function, ScheduleType, DailyRotationPlan, RotationP
 from .forms import (AgentForm, FunctionForm, ScheduleTypeForm, DailyRotationPlanForm, RotationPeriodForm,
                     ShiftScheduleForm, ShiftSchedulePeriodForm, ShiftScheduleWeekForm, ShiftScheduleDailyPlanForm, WeeklyPlanFormSet, PublicHolidayForm, DepartmentForm, TeamForm, TeamPositionForm)
 from .decorators import permission_required, admin_required, viewer_required, get_agent_from_user
+from .pagination import keyset_paginate
+from . import dashboard, exports, imports, planned_shifts, search
 
 
 # Authentication Views
@@ -63,17 +66,18 @@ def logout_view(request):
 @transaction.atomic
 def change_password(request):
     """Change password view"""
-    agent = get_agent_from_user(request.user)
+    agent = request.agent
     
     if request.method == 'POST':
         form = PasswordChangeForm(request.user, request.POST)
         if form.is_valid():
             user = form.save()
             
-            # Mark password as changed for agent
+            # Mark password as changed for agent. Agent.save() would also save
+            # the cached agent.user, overwriting the new password hash.
             if agent:
                 agent.password_changed = True
-                agent.save(update_fields=['password_changed'])
+                Agent.objects.filter(pk=agent.pk).update(password_changed=True)
             
             messages.success(request, 'Votre mot de passe a été changé avec succès.')
             
@@ -105,6 +109,12 @@ def is_staff_user(user):
     return user.is_authenticated and user.is_staff
 
 
+@admin_required
+def api_dashboard_stats(request):
+    """API endpoint returning every dashboard counter at once"""
+    return JsonResponse(dashboard.stats())
+
+
 @admin_required
 def agent_count(request):
     """HTMX endpoint for agent count"""
@@ -142,25 +152,32 @@ def agent_list(request):
         agents = agents.filter(departure_date__isnull=True)
     
     if search_query:
-        agents = agents.filter(
-            Q(matricule__icontains=search_query) |
-            Q(first_name__icontains=search_query) |
-            Q(last_name__icontains=search_query)
-        )
+        agents = search.search(agents, search_query)
     
     # Apply sorting
     valid_sorts = ['matricule', 'last_name', 'first_name', 'grade', 'hire_date', 'permission_level']
     if sort_by in valid_sorts:
         if order == 'desc':
             sort_by = f'-{sort_by}'
-        agents = agents.order_by(sort_by)
+        ordering = [sort_by]
     else:
-        agents = agents.order_by('matricule')
+        ordering = ['matricule']
+    # Without an explicit sort, search results come most relevant first
+    if search_query and 'sort' not in request.GET:
+        ordering = ['search_rank']
+    agents = keyset_paginate(agents, ordering, request.GET)
     
     # Get current sort order for template
     current_sort = request.GET.get('sort', 'matricule')
     current_order = request.GET.get('order', 'asc')
     
+    # Next page requested by the "load more" row: only the rows are rendered
+    if request.headers.get('HX-Request') and request.GET.get('cursor'):
+        return render(request, 'core/agents/agent_list_rows.html', {
+            'agents': agents,
+            'search_query': search_query,
+        })
+    
     if request.headers.get('HX-Request'):
         return render(request, 'core/agents/agent_list_partial.html', {
             'agents': agents,
@@ -184,7 +201,7 @@ def agent_list(request):
 def agent_create(request):
     """Create new agent"""
     if request.method == 'POST':
-        form = AgentForm(request.POST, user=request.user)
+        form = AgentForm(request.POST, user=request.user, current_agent=request.agent)
         if form.is_valid():
             agent = form.save()
             messages.success(request, f'Agent {agent.matricule} créé avec succès.')
@@ -195,7 +212,7 @@ def agent_create(request):
                 )
             return redirect('agent_list')
     else:
-        form = AgentForm(user=request.user)
+        form = AgentForm(user=request.user, current_agent=request.agent)
     
     template = 'core/agents/agent_form_htmx.html' if request.headers.get('HX-Request') else 'core/agents/agent_form.html'
     return render(request, template, {
@@ -219,7 +236,7 @@ def agent_edit(request, pk):
     agent = get_object_or_404(Agent, pk=pk)
     
     if request.method == 'POST':
-        form = AgentForm(request.POST, instance=agent, user=request.user)
+        form = AgentForm(request.POST, instance=agent, user=request.user, current_agent=request.agent)
         if form.is_valid():
             form.save()
             messages.success(request, f'Agent {agent.matricule} modifié avec succès.')
@@ -230,7 +247,7 @@ def agent_edit(request, pk):
                 )
             return redirect('agent_list')
     else:
-        form = AgentForm(instance=agent, user=request.user)
+        form = AgentForm(instance=agent, user=request.user, current_agent=request.agent)
     
     template = 'core/agents/agent_form_htmx.html' if request.headers.get('HX-Request') else 'core/agents/agent_form.html'
     return render(request, template, {
@@ -258,20 +275,20 @@ def agent_delete(request, pk):
         
         agents = Agent.objects.all()
         if search_query:
-            agents = agents.filter(
-                Q(matricule__icontains=search_query) |
-                Q(first_name__icontains=search_query) |
-                Q(last_name__icontains=search_query)
-            )
+            agents = search.search(agents, search_query)
         
         # Apply same sorting
         valid_sorts = ['matricule', 'last_name', 'first_name', 'grade', 'hire_date', 'permission_level']
         if sort_by in valid_sorts:
             if order == 'desc':
                 sort_by = f'-{sort_by}'
-            agents = agents.order_by(sort_by)
+            ordering = [sort_by]
         else:
-            agents = agents.order_by('matricule')
+            ordering = ['matricule']
+        # Without an explicit sort, search results come most relevant first
+        if search_query and 'sort' not in request.GET:
+            ordering = ['search_rank']
+        agents = keyset_paginate(agents, ordering, request.GET)
         
         messages.success(request, f'Agent {matricule} supprimé avec succès.')
         return render(request, 'core/agents/agent_list_partial.html', {
@@ -325,6 +342,10 @@ def agent_export(request):
 @transaction.atomic
 def agent_import(request):
     """Import agents from JSON file - overwrites existing database - only accessible to superusers"""
+    if request.method == 'POST' and request.POST.get('import_mode') == 'sync':
+        # Agents are updated in place on their matricule: assignments and accounts are kept
+        return _model_import(request, 'agents', 'Agent', 'agent_list', 'agents', success=None)
+    
     if request.method == 'POST':
         import_file = request.FILES.get('import_file')
         confirm_overwrite = request.POST.get('confirm_overwrite', False)
@@ -351,106 +372,42 @@ def agent_import(request):
                 messages.error(request, 'Le fichier JSON doit contenir une liste d\'agents.')
                 return redirect('agent_list')
             
+            # STEP 1: Validate every row before anything is deleted
+            try:
+                agents = [agent for _, agent in imports.validate('agents', import_data, 'Agent', unique=True)]
+            except imports.ImportValidationError as e:
+                _validation_errors(request, e.errors)
+                return redirect('agent_list')
+            
             # Count existing agents before deletion
             existing_count = Agent.objects.count()
             
-            # STEP 1: Delete ALL existing agents and their user accounts
+            # STEP 2: Delete ALL existing agents and their user accounts
             messages.info(request, f'Suppression de {existing_count} agents existants...')
             
-            # Get all agents with their user accounts
-            agents_with_users = Agent.objects.select_related('user').all()
-            deleted_users = 0
-            preserved_superusers = []
-            
-            for agent in agents_with_users:
-                if agent.user and agent.user.is_superuser:
-                    # Preserve superuser info for recreation
-                    preserved_superusers.append({
-                        'matricule': agent.matricule,
-                        'username': agent.user.username,
-                        'email': agent.user.email,
-                        'first_name': agent.user.first_name,
-                        'last_name': agent.user.last_name,
-                        'is_staff': agent.user.is_staff,
-                        'is_superuser': agent.user.is_superuser,
-                    })
-                    # Delete the agent but keep the user account
-                    agent.user = None
-                    agent.save()
-                    agent.delete()
-                else:
-                    # Delete both user and agent for non-superusers
-                    if agent.user:
-                        agent.user.delete()
-                        deleted_users += 1
-                    else:
-                        agent.delete()
-            
-            # Delete any remaining agents (those without users)
+            # Superuser accounts are kept and linked back to the agent with the same matricule
+            preserved_superusers = {
+                agent.matricule: agent.user
+                for agent in Agent.objects.filter(user__is_superuser=True).select_related('user')
+            }
+            User.objects.filter(agent__isnull=False, is_superuser=False).delete()
             Agent.objects.all().delete()
             
-            # Also delete any orphaned users that might have the same matricule as imported agents
-            import_matricules = [agent_data.get('matricule') for agent_data in import_data if agent_data.get('matricule')]
-            for matricule in import_matricules:
-                # Delete any existing user with this matricule (except preserved superusers)
-                preserved_usernames = [su['username'] for su in preserved_superusers]
-                User.objects.filter(username=matricule).exclude(username__in=preserved_usernames).delete()
+            # Also delete any orphaned users that have the same matricule as imported agents
+            User.objects.filter(username__in=[agent.matricule for agent in agents], is_superuser=False).delete()
             
-            # STEP 2: Import new agents
-            imported_count = 0
-            errors = []
+            # STEP 3: Create the agents and their accounts in bulk (the password is hashed once)
+            Agent.bulk_provision(agents, accounts=preserved_superusers)
+            imported_count = len(agents)
             
-            for agent_data in import_data:
-                try:
-                    matricule = agent_data.get('matricule')
-                    if not matricule:
-                        errors.append('Matricule manquant dans un enregistrement.')
-                        continue
-                    
-                    # Check if this matricule corresponds to a preserved superuser
-                    existing_superuser = None
-                    for su in preserved_superusers:
-                        if su['matricule'] == matricule:
-                            existing_superuser = User.objects.get(username=su['username'])
-                            break
-                    
-                    # Create new agent
-                    agent = Agent.objects.create(
-                        matricule=matricule,
-                        first_name=agent_data.get('first_name', ''),
-                        last_name=agent_data.get('last_name', ''),
-                        grade=agent_data.get('grade', 'Agent'),
-                        hire_date=datetime.datetime.fromisoformat(agent_data['hire_date']).date() if agent_data.get('hire_date') else timezone.now().date(),
-                        departure_date=datetime.datetime.fromisoformat(agent_data['departure_date']).date() if agent_data.get('departure_date') else None,
-                        permission_level=agent_data.get('permission_level', 'R'),
-                        password_changed=False,  # Force password reset
-                    )
-                    
-                    # If this is a preserved superuser, link them back
-                    if existing_superuser:
-                        agent.user = existing_superuser
-                        agent.save()
-                        # Update user info from import data
-                        existing_superuser.first_name = agent.first_name
-                        existing_superuser.last_name = agent.last_name
-                        existing_superuser.save()
-                    
-                    imported_count += 1
-                    
-                except Exception as e:
-                    errors.append(f'Erreur pour l\'agent {matricule}: {str(e)}')
+            # Bulk inserts bypass signals
+            search.reindex(Agent)
+            dashboard.invalidate()
             
             # Show results
             messages.success(request, f'✅ Base de données remplacée avec succès!')
             messages.success(request, f'📊 {existing_count} agents supprimés, {imported_count} agents importés.')
-            messages.warning(request, f'🔐 Tous les mots de passe ont été réinitialisés à "azerty".')
-            
-            if errors:
-                messages.error(request, f'❌ {len(errors)} erreurs lors de l\'importation:')
-                for error in errors[:3]:  # Show first 3 errors
-                    messages.error(request, f'  • {error}')
-                if len(errors) > 3:
-                    messages.error(request, f'  • ... et {len(errors) - 3} autres erreurs.')
+            messages.warning(request, f'🔐 Tous les mots de passe ont été réinitialisés à "{Agent.DEFAULT_PASSWORD}".')
             
         except json.JSONDecodeError:
             messages.error(request, 'Le fichier JSON n\'est pas valide.')
@@ -486,14 +443,22 @@ def function_list(request):
     if sort_by in valid_sorts:
         if order == 'desc':
             sort_by = f'-{sort_by}'
-        functions = functions.order_by(sort_by)
+        ordering = [sort_by]
     else:
-        functions = functions.order_by('designation')
+        ordering = ['designation']
+    functions = keyset_paginate(functions, ordering, request.GET)
     
     # Get current sort order for template
     current_sort = request.GET.get('sort', 'designation')
     current_order = request.GET.get('order', 'asc')
     
+    # Next page requested by the "load more" row: only the rows are rendered
+    if request.headers.get('HX-Request') and request.GET.get('cursor'):
+        return render(request, 'core/functions/function_list_rows.html', {
+            'functions': functions,
+            'search_query': search_query,
+        })
+    
     if request.headers.get('HX-Request'):
         return render(request, 'core/functions/function_list_partial.html', {
             'functions': functions,
@@ -604,9 +569,10 @@ def function_delete(request, pk):
         if sort_by in valid_sorts:
             if order == 'desc':
                 sort_by = f'-{sort_by}'
-            functions = functions.order_by(sort_by)
+            ordering = [sort_by]
         else:
-            functions = functions.order_by('designation')
+            ordering = ['designation']
+        functions = keyset_paginate(functions, ordering, request.GET)
         
         messages.success(request, f'Fonction "{designation}" supprimée avec succès.')
         return render(request, 'core/functions/function_list_partial.html', {
@@ -627,7 +593,7 @@ def function_delete(request, pk):
 def change_agent_permission(request, pk):
     """Change agent permission level"""
     agent = get_object_or_404(Agent, pk=pk)
-    current_user_agent = get_agent_from_user(request.user)
+    current_user_agent = request.agent
     
     new_permission = request.POST.get('permission_level')
     
@@ -689,14 +655,22 @@ def schedule_type_list(request):
     if sort_by in valid_sorts:
         if order == 'desc':
             sort_by = f'-{sort_by}'
-        schedule_types = schedule_types.order_by(sort_by)
+        ordering = [sort_by]
     else:
-        schedule_types = schedule_types.order_by('designation')
+        ordering = ['designation']
+    schedule_types = keyset_paginate(schedule_types, ordering, request.GET)
     
     # Get current sort order for template
     current_sort = request.GET.get('sort', 'designation')
     current_order = request.GET.get('order', 'asc')
     
+    # Next page requested by the "load more" row: only the rows are rendered
+    if request.headers.get('HX-Request') and request.GET.get('cursor'):
+        return render(request, 'core/schedule_types/schedule_type_list_rows.html', {
+            'schedule_types': schedule_types,
+            'search_query': search_query,
+        })
+    
     if request.headers.get('HX-Request'):
         return render(request, 'core/schedule_types/schedule_type_list_partial.html', {
             'schedule_types': schedule_types,
@@ -828,9 +802,10 @@ def schedule_type_delete(request, pk):
         if sort_by in valid_sorts:
             if order == 'desc':
                 sort_by = f'-{sort_by}'
-            schedule_types = schedule_types.order_by(sort_by)
+            ordering = [sort_by]
         else:
-            schedule_types = schedule_types.order_by('designation')
+            ordering = ['designation']
+        schedule_types = keyset_paginate(schedule_types, ordering, request.GET)
         
         messages.success(request, f'Type de planning "{designation}" supprimé avec succès.')
         return render(request, 'core/schedule_types/schedule_type_list_partial.html', {
@@ -852,28 +827,35 @@ def daily_rotation_plan_list(request):
     sort_by = request.GET.get('sort', 'designation')
     order = request.GET.get('order', 'asc')
     
-    plans = DailyRotationPlan.objects.select_related('schedule_type').all()
+    plans = DailyRotationPlan.objects.select_related('schedule_type').annotate(periods_count=Count('periods'))
     
     if search_query:
-        plans = plans.filter(
-            Q(designation__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(schedule_type__designation__icontains=search_query)
-        )
+        plans = search.search(plans, search_query)
     
     # Apply sorting
     valid_sorts = ['designation', 'schedule_type__designation', 'created_at']
     if sort_by in valid_sorts:
         if order == 'desc':
             sort_by = f'-{sort_by}'
-        plans = plans.order_by(sort_by)
+        ordering = [sort_by]
     else:
-        plans = plans.order_by('designation')
+        ordering = ['designation']
+    # Without an explicit sort, search results come most relevant first
+    if search_query and 'sort' not in request.GET:
+        ordering = ['search_rank']
+    plans = keyset_paginate(plans, ordering, request.GET)
     
     # Get current sort order for template
     current_sort = request.GET.get('sort', 'designation')
     current_order = request.GET.get('order', 'asc')
     
+    # Next page requested by the "load more" row: only the rows are rendered
+    if request.headers.get('HX-Request') and request.GET.get('cursor'):
+        return render(request, 'core/daily_rotation_plans/daily_rotation_plan_list_rows.html', {
+            'plans': plans,
+            'search_query': search_query,
+        })
+    
     if request.headers.get('HX-Request'):
         return render(request, 'core/daily_rotation_plans/daily_rotation_plan_list_partial.html', {
             'plans': plans,
@@ -989,23 +971,23 @@ def daily_rotation_plan_delete(request, pk):
         sort_by = request.GET.get('sort', 'designation')
         order = request.GET.get('order', 'asc')
         
-        plans = DailyRotationPlan.objects.select_related('schedule_type').all()
+        plans = DailyRotationPlan.objects.select_related('schedule_type').annotate(periods_count=Count('periods'))
             
         if search_query:
-            plans = plans.filter(
-                Q(designation__icontains=search_query) |
-                Q(description__icontains=search_query) |
-                Q(schedule_type__designation__icontains=search_query)
-            )
+            plans = search.search(plans, search_query)
         
         # Apply same sorting
         valid_sorts = ['designation', 'schedule_type__designation', 'created_at']
         if sort_by in valid_sorts:
             if order == 'desc':
                 sort_by = f'-{sort_by}'
-            plans = plans.order_by(sort_by)
+            ordering = [sort_by]
         else:
-            plans = plans.order_by('designation')
+            ordering = ['designation']
+        # Without an explicit sort, search results come most relevant first
+        if search_query and 'sort' not in request.GET:
+            ordering = ['search_rank']
+        plans = keyset_paginate(plans, ordering, request.GET)
         
         messages.success(request, f'Plan de rotation "{designation}" supprimé avec succès.')
         return render(request, 'core/daily_rotation_plans/daily_rotation_plan_list_partial.html', {
@@ -1044,9 +1026,10 @@ def rotation_period_list(request):
     if sort_by in valid_sorts:
         if order == 'desc':
             sort_by = f'-{sort_by}'
-        periods = periods.order_by(sort_by)
+        ordering = [sort_by]
     else:
-        periods = periods.order_by('start_date', 'start_time')
+        ordering = ['start_date', 'start_time']
+    periods = keyset_paginate(periods, ordering, request.GET)
     
     # Get plans for filter dropdown
     plans = DailyRotationPlan.objects.all().order_by('designation')
@@ -1055,6 +1038,13 @@ def rotation_period_list(request):
     current_sort = request.GET.get('sort', 'start_date')
     current_order = request.GET.get('order', 'asc')
     
+    # Next page requested by the "load more" row: only the rows are rendered
+    if request.headers.get('HX-Request') and request.GET.get('cursor'):
+        return render(request, 'core/rotation_periods/rotation_period_list_rows.html', {
+            'periods': periods,
+            'search_query': search_query,
+        })
+    
     if request.headers.get('HX-Request'):
         return render(request, 'core/rotation_periods/rotation_period_list_partial.html', {
             'periods': periods,
@@ -1206,9 +1196,10 @@ def rotation_period_delete(request, pk):
         if sort_by in valid_sorts:
             if order == 'desc':
                 sort_by = f'-{sort_by}'
-            periods = periods.order_by(sort_by)
+            ordering = [sort_by]
         else:
-            periods = periods.order_by('start_date', 'start_time')
+            ordering = ['start_date', 'start_time']
+        periods = keyset_paginate(periods, ordering, request.GET)
         
         # Get plans for filter dropdown
         plans = DailyRotationPlan.objects.all().order_by('designation')
@@ -1334,32 +1325,63 @@ def api_plan_periods(request, plan_id):
     })
 
 
+def _annotated_periods(periods, day):
+    """
+    Annotate shift schedule periods with their week count, duration and
+    active status as of `day`, and return them as values() rows.
+    """
+    return periods.annotate(
+        weeks_count=Count('weeks'),
+        duration=ExpressionWrapper(F('end_date') - F('start_date'), output_field=DurationField()),
+        is_active=ExpressionWrapper(Q(end_date__gte=day), output_field=BooleanField()),
+    ).order_by('start_date').values(
+        'id', 'shift_schedule_id', 'start_date', 'end_date', 'weeks_count', 'duration', 'is_active'
+    )
+
+
+def _serialize_period(row):
+    duration_days = row['duration'].days + 1
+    return {
+        'id': row['id'],
+        'schedule_id': row['shift_schedule_id'],
+        'date_range': f"{row['start_date'].strftime('%d/%m/%Y')} - {row['end_date'].strftime('%d/%m/%Y')}",
+        'duration_text': f"{duration_days} jours",
+        'duration_days': duration_days,
+        'is_active': row['is_active'],
+        'status_text': 'Actif' if row['is_active'] else 'Expiré',
+        'weeks_count': row['weeks_count'],
+    }
+
+
+def _reference_date(request):
+    """Read the optional ?date= ISO date of a request, defaulting to today"""
+    value = request.GET.get('date')
+    if not value:
+        return timezone.now().date()
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise ValueError('Le paramètre "date" doit être une date au format AAAA-MM-JJ.')
+
+
 @admin_required
 def api_shift_schedule_periods(request, schedule_id):
-    """API endpoint to get periods for a specific shift schedule"""
-    schedule = get_object_or_404(ShiftSchedule, pk=schedule_id)
-    periods = schedule.periods.all().order_by('start_date')
+    """
+    API endpoint to get periods for a specific shift schedule.
     
-    periods_data = []
-    for period in periods:
-        # Calculate duration in days
-        duration_days = (period.end_date - period.start_date).days + 1
-        
-        # Check if period is active (end date is today or in the future)
-        from django.utils import timezone
-        today = timezone.now().date()
-        is_active = period.end_date >= today
-        
-        periods_data.append({
-            'id': period.pk,
-            'schedule_id': period.shift_schedule.pk,
-            'date_range': f"{period.start_date.strftime('%d/%m/%Y')} - {period.end_date.strftime('%d/%m/%Y')}",
-            'duration_text': f"{duration_days} jours",
-            'duration_days': duration_days,
-            'is_active': is_active,
-            'status_text': 'Actif' if is_active else 'Expiré',
-            'weeks_count': period.weeks.count(),
-        })
+    Week counts, durations and statuses are computed by the database in a
+    single query; ?date=YYYY-MM-DD evaluates the status as of that day.
+    """
+    try:
+        day = _reference_date(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    periods = _annotated_periods(ShiftSchedulePeriod.objects.filter(shift_schedule_id=schedule_id), day)
+    periods_data = [_serialize_period(row) for row in periods]
+    
+    if not periods_data:
+        get_object_or_404(ShiftSchedule, pk=schedule_id)
     
     return JsonResponse({
         'periods': periods_data,
@@ -1367,46 +1389,145 @@ def api_shift_schedule_periods(request, schedule_id):
     })
 
 
+# Columns read by _encode_weeks: one row per (week, daily plan) pair
+WEEK_TREE_COLUMNS = (
+    'period_id', 'id', 'week_number',
+    'daily_plans__id', 'daily_plans__weekday', 'daily_plans__daily_rotation_plan_id',
+    'daily_plans__daily_rotation_plan__designation',
+    'daily_plans__daily_rotation_plan__description',
+    'daily_plans__daily_rotation_plan__schedule_type__color',
+)
+
+
+def _encode_weeks(rows, plans):
+    """
+    Group WEEK_TREE_COLUMNS rows into {period_id: {week_id: week}}.
+    
+    Every daily rotation plan met is added once to `plans`; weeks only
+    reference it through [daily_plan_id, weekday, plan_id] triples.
+    """
+    periods = {}
+    for period_id, week_id, week_number, daily_plan_id, weekday, plan_id, designation, description, color in rows:
+        weeks = periods.setdefault(period_id, {})
+        week = weeks.get(week_id)
+        if week is None:
+            week = weeks[week_id] = {'id': week_id, 'week_number': week_number, 'daily_plans': []}
+        if daily_plan_id is None:
+            continue
+        week['daily_plans'].append([daily_plan_id, weekday, plan_id])
+        if plan_id not in plans:
+            plans[plan_id] = {
+                'designation': designation,
+                'description': description or '',
+                'schedule_type_color': color or '#6B7280',
+            }
+    return periods
+
+
+def _week_rows(**filters):
+    return ShiftScheduleWeek.objects.filter(**filters).order_by(
+        'period_id', 'week_number', 'daily_plans__weekday', 'daily_plans__id'
+    ).values_list(*WEEK_TREE_COLUMNS)
+
+
 @admin_required
 def api_shift_schedule_period_weeks(request, period_id):
-    """API endpoint to get weeks for a specific shift schedule period"""
-    period = get_object_or_404(ShiftSchedulePeriod, pk=period_id)
-    weeks = period.weeks.all().order_by('week_number')
+    """
+    API endpoint to get weeks for a specific shift schedule period.
     
-    weeks_data = []
-    for week in weeks:
-        # Get daily plans for this week, organized by weekday (supporting multiple plans per day)
-        daily_plans_by_weekday = {}
-        for daily_plan in week.daily_plans.all():
-            weekday = daily_plan.weekday
-            if weekday not in daily_plans_by_weekday:
-                daily_plans_by_weekday[weekday] = []
-            
-            daily_plans_by_weekday[weekday].append({
-                'id': daily_plan.pk,
-                'short_name': daily_plan.daily_rotation_plan.designation[:3] if daily_plan.daily_rotation_plan else '?',
-                'full_name': daily_plan.daily_rotation_plan.designation if daily_plan.daily_rotation_plan else 'Non défini',
-                'designation': daily_plan.daily_rotation_plan.designation if daily_plan.daily_rotation_plan else 'Non défini',
-                'description': daily_plan.daily_rotation_plan.description if daily_plan.daily_rotation_plan else '',
-                'weekday': daily_plan.weekday,
-                'plan_id': daily_plan.daily_rotation_plan.id if daily_plan.daily_rotation_plan else None,
-                'schedule_type_color': daily_plan.daily_rotation_plan.schedule_type.color if daily_plan.daily_rotation_plan and daily_plan.daily_rotation_plan.schedule_type else '#6B7280',
-            })
-        
-        weeks_data.append({
-            'id': week.pk,
-            'week_number': week.week_number,
-            'daily_plans_count': week.daily_plans.count(),
-            'daily_plans': daily_plans_by_weekday,  # Now contains arrays of plans per weekday
-            'date_range': f"Semaine {week.week_number}",
-        })
+    The payload is dictionary-encoded: every daily rotation plan used by the
+    period is listed once in `plans`, and each week lists its daily plans as
+    [daily_plan_id, weekday, plan_id] triples. Everything comes from one query.
+    """
+    plans = {}
+    weeks_data = _encode_weeks(_week_rows(period_id=period_id), plans).get(period_id, {})
+    
+    if not weeks_data:
+        get_object_or_404(ShiftSchedulePeriod, pk=period_id)
     
     return JsonResponse({
-        'weeks': weeks_data,
+        'plans': plans,
+        'weeks': list(weeks_data.values()),
         'count': len(weeks_data)
     })
 
 
+def _schedule_trees(schedule_ids=None, day=None):
+    """
+    Build the schedule -> period -> week -> daily plan tree for several
+    schedules (all of them when schedule_ids is None) with three queries,
+    whatever the number of periods and weeks.
+    
+    Returns (schedules, plans); periods use the api_shift_schedule_periods
+    fields plus their encoded `weeks`, and `plans` is shared by all of them.
+    """
+    day = day or timezone.now().date()
+    schedules = ShiftSchedule.objects.all()
+    if schedule_ids is not None:
+        schedules = schedules.filter(pk__in=schedule_ids)
+    schedules = {
+        row['id']: dict(row, periods=[])
+        for row in schedules.order_by('name').values('id', 'name', 'type')
+    }
+    periods = list(_annotated_periods(ShiftSchedulePeriod.objects.filter(shift_schedule_id__in=schedules), day))
+    plans = {}
+    weeks_by_period = _encode_weeks(_week_rows(period_id__in=[row['id'] for row in periods]), plans) if periods else {}
+    
+    for row in periods:
+        period = _serialize_period(row)
+        period['weeks'] = list(weeks_by_period.get(row['id'], {}).values())
+        schedules[row['shift_schedule_id']]['periods'].append(period)
+    
+    return list(schedules.values()), plans
+
+
+@admin_required
+def api_shift_schedule_tree(request, schedule_id):
+    """API endpoint returning a shift schedule with all its periods, weeks and daily plans"""
+    try:
+        day = _reference_date(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    schedules, plans = _schedule_trees([schedule_id], day)
+    if not schedules:
+        get_object_or_404(ShiftSchedule, pk=schedule_id)
+    
+    return JsonResponse({
+        'schedule': schedules[0],
+        'plans': plans,
+    })
+
+
+@admin_required
+def api_shift_schedules_tree(request):
+    """
+    API endpoint returning the trees of several shift schedules at once.
+    
+    Schedules are selected with ?ids=1,2,3; without it every schedule is returned.
+    """
+    try:
+        day = _reference_date(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    ids = request.GET.get('ids', '').strip()
+    if ids:
+        try:
+            schedule_ids = [int(value) for value in ids.split(',') if value.strip()]
+        except ValueError:
+            return JsonResponse({'error': 'Identifiants de plannings invalides'}, status=400)
+    else:
+        schedule_ids = None
+    
+    schedules, plans = _schedule_trees(schedule_ids, day)
+    return JsonResponse({
+        'schedules': schedules,
+        'plans': plans,
+        'count': len(schedules),
+    })
+
+
 # Shift Schedule Views
 
 @login_required
@@ -1436,7 +1557,7 @@ def shift_schedule_list(request):
         'search_query': search_query,
         'type_filter': type_filter,
         'type_choices': ShiftSchedule.TYPE_CHOICES,
-        'current_agent': get_agent_from_user(request.user),
+        'current_agent': request.agent,
     }
     
     return render(request, 'core/shift_schedules/shift_schedule_list.html', context)
@@ -1566,7 +1687,7 @@ def shift_schedule_period_create(request, schedule_id):
         'form': form,
         'schedule': schedule,
         'period': None,
-        'current_agent': get_agent_from_user(request.user),
+        'current_agent': request.agent,
     })
 
 
@@ -1600,7 +1721,7 @@ def shift_schedule_period_edit(request, period_id):
                     'form': form,
                     'schedule': period.shift_schedule,
                     'period': period,
-                    'current_agent': get_agent_from_user(request.user),
+                    'current_agent': request.agent,
                 })
     else:
         form = ShiftSchedulePeriodForm(instance=period)
@@ -1610,7 +1731,7 @@ def shift_schedule_period_edit(request, period_id):
         'form': form,
         'schedule': period.shift_schedule,
         'period': period,
-        'current_agent': get_agent_from_user(request.user),
+        'current_agent': request.agent,
     })
 
 
@@ -1693,7 +1814,7 @@ def shift_schedule_period_duplicate(request, period_id):
         'form': form,
         'original_period': original_period,
         'schedule': original_period.shift_schedule,
-        'current_agent': get_agent_from_user(request.user),
+        'current_agent': request.agent,
     })
 
 
@@ -1771,10 +1892,30 @@ def shift_schedule_week_edit(request, week_id):
         'form': form,
         'period': week.period,
         'week': week,
-        'current_agent': get_agent_from_user(request.user),
+        'current_agent': request.agent,
     })
 
 
+def _renumber_weeks(period, week_ids=None):
+    """Renumber the weeks of a period in bulk and refresh its planned shifts (the UPDATEs bypass signals)"""
+    renumbered = period.renumber_weeks(week_ids)
+    if renumbered:
+        planned_shifts.mark_schedule_period(period.id)
+    return renumbered
+
+
+def _posted_week_ids(request):
+    """Week ids posted as repeated or comma-separated `week_ids` values, raising ValueError when malformed"""
+    try:
+        return [
+            int(value)
+            for values in request.POST.getlist('week_ids')
+            for value in values.split(',') if value.strip()
+        ]
+    except ValueError:
+        raise ValueError("Identifiants de semaines invalides")
+
+
 @login_required
 @admin_required
 @require_http_methods(["POST"])
@@ -1789,11 +1930,8 @@ def shift_schedule_week_delete(request, week_id):
         # Delete the week
         week.delete()
         
-        # Renumber all remaining weeks in this period that come after the deleted week
-        remaining_weeks = period.weeks.filter(week_number__gt=deleted_week_number).order_by('week_number')
-        for remaining_week in remaining_weeks:
-            remaining_week.week_number -= 1
-            remaining_week.save(update_fields=['week_number'])
+        # Renumber the remaining weeks of this period that come after the deleted week
+        _renumber_weeks(period)
         
         messages.success(request, f'Semaine {deleted_week_number} supprimée avec succès. Les semaines suivantes ont été renumérotées.')
     
@@ -1804,6 +1942,46 @@ def shift_schedule_week_delete(request, week_id):
     return redirect('shift_schedule_list')
 
 
+@login_required
+@admin_required
+@require_http_methods(["POST"])
+def shift_schedule_weeks_delete(request, period_id):
+    """Delete several weeks of a period at once and renumber the remaining ones"""
+    period = get_object_or_404(ShiftSchedulePeriod, id=period_id)
+    try:
+        week_ids = _posted_week_ids(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    with transaction.atomic():
+        deleted = period.weeks.filter(id__in=week_ids).delete()[1].get(ShiftScheduleWeek._meta.label, 0)
+        _renumber_weeks(period)
+    
+    if request.headers.get('HX-Request') or 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse({'deleted': deleted})
+    
+    messages.success(request, f'{deleted} semaine(s) supprimée(s) avec succès. Les semaines restantes ont été renumérotées.')
+    return redirect('shift_schedule_list')
+
+
+@login_required
+@admin_required
+@require_http_methods(["POST"])
+def shift_schedule_weeks_reorder(request, period_id):
+    """Reorder the weeks of a period: `week_ids` lists every week of the period in its new order"""
+    period = get_object_or_404(ShiftSchedulePeriod, id=period_id)
+    try:
+        with transaction.atomic():
+            renumbered = _renumber_weeks(period, _posted_week_ids(request))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    return JsonResponse({
+        'renumbered': renumbered,
+        'weeks': list(period.weeks.order_by('week_number').values('id', 'week_number')),
+    })
+
+
 @login_required
 @admin_required
 @require_http_methods(["POST"])
@@ -1896,7 +2074,7 @@ def shift_schedule_daily_plan_create(request, week_id, weekday):
                         'week': week,
                         'daily_plan': None,
                         'weekday': weekday,
-                        'current_agent': get_agent_from_user(request.user),
+                        'current_agent': request.agent,
                     })
                     
             with transaction.atomic():
@@ -1920,14 +2098,14 @@ def shift_schedule_daily_plan_create(request, week_id, weekday):
                             'week': week,
                             'daily_plan': None,
                             'weekday': weekday,
-                            'current_agent': get_agent_from_user(request.user),
+                            'current_agent': request.agent,
                         })
                     return render(request, 'core/shift_schedules/shift_schedule_daily_plan_form_htmx.html', {
                         'form': form,
                         'week': week,
                         'daily_plan': None,
                         'weekday': weekday,
-                        'current_agent': get_agent_from_user(request.user),
+                        'current_agent': request.agent,
                     })
                 
                 if request.headers.get('HX-Request'):
@@ -1970,7 +2148,7 @@ def shift_schedule_daily_plan_create(request, week_id, weekday):
                     'week': week,
                     'daily_plan': None,
                     'weekday': weekday,
-                    'current_agent': get_agent_from_user(request.user),
+                    'current_agent': request.agent,
                 })
     else:
         form = ShiftScheduleDailyPlanForm(initial={'week': week, 'weekday': weekday})
@@ -1982,7 +2160,7 @@ def shift_schedule_daily_plan_create(request, week_id, weekday):
         'week': week,
         'daily_plan': None,
         'weekday': weekday,
-        'current_agent': get_agent_from_user(request.user),
+        'current_agent': request.agent,
     })
 
 
@@ -2009,7 +2187,7 @@ def shift_schedule_daily_plan_edit(request, daily_plan_id):
         'form': form,
         'week': daily_plan.week,
         'daily_plan': daily_plan,
-        'current_agent': get_agent_from_user(request.user),
+        'current_agent': request.agent,
     })
 
 
@@ -2057,21 +2235,15 @@ def public_holiday_list(request):
             Q(date__icontains=search_query)
         )
     
-    # Apply sorting with automatic year sorting when sorting by date
+    # Apply sorting; ordering by date also groups holidays by year
     valid_sorts = ['designation', 'date']
     if sort_by in valid_sorts:
-        if sort_by == 'date':
-            # Sort by year first, then by date within year
-            if order == 'desc':
-                holidays = holidays.order_by('-date__year', '-date')
-            else:
-                holidays = holidays.order_by('date__year', 'date')
-        else:
-            if order == 'desc':
-                sort_by = f'-{sort_by}'
-            holidays = holidays.order_by(sort_by)
+        if order == 'desc':
+            sort_by = f'-{sort_by}'
+        ordering = [sort_by]
     else:
-        holidays = holidays.order_by('date__year', 'date')
+        ordering = ['date']
+    holidays = keyset_paginate(holidays, ordering, request.GET)
     
     # Get count by year for display
     holidays_by_year = PublicHoliday.objects.values(
@@ -2084,6 +2256,13 @@ def public_holiday_list(request):
     current_sort = request.GET.get('sort', 'date')
     current_order = request.GET.get('order', 'asc')
     
+    # Next page requested by the "load more" row: only the rows are rendered
+    if request.headers.get('HX-Request') and request.GET.get('cursor'):
+        return render(request, 'core/public_holidays/public_holiday_list_rows.html', {
+            'holidays': holidays,
+            'search_query': search_query,
+        })
+    
     if request.headers.get('HX-Request'):
         return render(request, 'core/public_holidays/public_holiday_list_partial.html', {
             'holidays': holidays,
@@ -2187,21 +2366,15 @@ def public_holiday_delete(request, pk):
                 Q(date__icontains=search_query)
             )
         
-        # Apply sorting with automatic year sorting when sorting by date
+        # Apply sorting; ordering by date also groups holidays by year
         valid_sorts = ['designation', 'date']
         if sort_by in valid_sorts:
-            if sort_by == 'date':
-                # Sort by year first, then by date within year
-                if order == 'desc':
-                    holidays = holidays.order_by('-date__year', '-date')
-                else:
-                    holidays = holidays.order_by('date__year', 'date')
-            else:
-                if order == 'desc':
-                    sort_by = f'-{sort_by}'
-                holidays = holidays.order_by(sort_by)
+            if order == 'desc':
+                sort_by = f'-{sort_by}'
+            ordering = [sort_by]
         else:
-            holidays = holidays.order_by('date__year', 'date')
+            ordering = ['date']
+        holidays = keyset_paginate(holidays, ordering, request.GET)
         
         # Get count by year for display
         holidays_by_year = PublicHoliday.objects.values(
@@ -2421,6 +2594,63 @@ def department_delete(request, pk):
     return redirect('department_list')
 
 
+def _validation_errors(request, errors):
+    """Report the validation errors of an import, the first three in full"""
+    messages.error(request, f'Erreurs de validation ({len(errors)} erreurs trouvées):')
+    for error in errors[:3]:  # Show first 3 errors
+        messages.error(request, f'  • {error}')
+    if len(errors) > 3:
+        messages.error(request, f'  • ... et {len(errors) - 3} autres erreurs.')
+
+
+def _model_import(request, name, label, changelist, plural, success):
+    """
+    Import the uploaded JSON export of one model: either sync its rows, writing
+    only the changes (see core.imports.sync), or replace them all.
+    """
+    if request.method == 'POST':
+        import_file = request.FILES.get('import_file')
+        
+        if not import_file:
+            messages.error(request, 'Aucun fichier sélectionné.')
+            return redirect(changelist)
+        
+        # Validate file type
+        if not import_file.name.endswith('.json'):
+            messages.error(request, 'Le fichier doit être au format JSON.')
+            return redirect(changelist)
+        
+        try:
+            # Read and parse JSON
+            data = json.loads(import_file.read().decode('utf-8'))
+            
+            if not isinstance(data, list):
+                messages.error(request, f'Le fichier JSON doit contenir une liste de {plural}.')
+                return redirect(changelist)
+            
+            if request.POST.get('import_mode') == 'sync':
+                created, updated, deleted = imports.sync(name, data, label)
+                messages.success(
+                    request,
+                    f'Synchronisation réussie ({plural}) : {created} ajout(s), {updated} modification(s), '
+                    f'{deleted} suppression(s), les autres lignes sont inchangées.'
+                )
+            elif not request.POST.get('confirm_action'):
+                messages.error(request, 'Confirmation requise pour remplacer la base de données.')
+            else:
+                created, deleted = imports.replace(name, data, label)
+                messages.success(request, success.format(created=created, deleted=deleted))
+            
+        except imports.ImportValidationError as e:
+            _validation_errors(request, e.errors)
+        except json.JSONDecodeError:
+            messages.error(request, 'Le fichier JSON n\'est pas valide.')
+        except Exception as e:
+            messages.error(request, f'Erreur lors de l\'importation: {str(e)}')
+    
+    return redirect(changelist)
+
+
 @user_passes_test(is_superuser)
 def department_export(request):
     """Export departments to JSON file - only accessible to superusers"""
@@ -2455,73 +2685,10 @@ def department_export(request):
 @transaction.atomic
 def department_import(request):
     """Import departments from JSON file - overwrites existing database - only accessible to superusers"""
-    if request.method == 'POST':
-        import_file = request.FILES.get('import_file')
-        
-        if not import_file:
-            messages.error(request, 'Aucun fichier sélectionné.')
-            return redirect('admin:core_department_changelist')
-        
-        # Validate file type
-        if not import_file.name.endswith('.json'):
-            messages.error(request, 'Le fichier doit être au format JSON.')
-            return redirect('admin:core_department_changelist')
-        
-        try:
-            # Read and parse JSON
-            content = import_file.read().decode('utf-8')
-            data = json.loads(content)
-            
-            if not isinstance(data, list):
-                messages.error(request, 'Le fichier JSON doit contenir une liste de départements.')
-                return redirect('admin:core_department_changelist')
-            
-            # Validate required fields for each department
-            required_fields = ['name', 'order']
-            errors = []
-            
-            for i, department_data in enumerate(data):
-                for field in required_fields:
-                    if field not in department_data or department_data[field] is None:
-                        errors.append(f'Département {i+1}: champ "{field}" manquant ou vide')
-                
-                # Validate order is a positive integer
-                if 'order' in department_data:
-                    try:
-                        order_value = int(department_data['order'])
-                        if order_value < 1:
-                            errors.append(f'Département {i+1}: l\'ordre doit être un nombre positif')
-                    except (ValueError, TypeError):
-                        errors.append(f'Département {i+1}: l\'ordre doit être un nombre entier')
-            
-            if errors:
-                messages.error(request, f'Erreurs de validation ({len(errors)} erreurs trouvées):')
-                for error in errors[:3]:  # Show first 3 errors
-                    messages.error(request, f'  • {error}')
-                if len(errors) > 3:
-                    messages.error(request, f'  • ... et {len(errors) - 3} autres erreurs.')
-                return redirect('admin:core_department_changelist')
-            
-            # Delete all existing departments
-            Department.objects.all().delete()
-            
-            # Import new departments
-            created_count = 0
-            for department_data in data:
-                Department.objects.create(
-                    name=department_data['name'],
-                    order=int(department_data['order'])
-                )
-                created_count += 1
-            
-            messages.success(request, f'Import réussi: {created_count} départements importés.')
-            
-        except json.JSONDecodeError:
-            messages.error(request, 'Le fichier JSON n\'est pas valide.')
-        except Exception as e:
-            messages.error(request, f'Erreur lors de l\'importation: {str(e)}')
-    
-    return redirect('admin:core_department_changelist')
+    return _model_import(
+        request, 'departments', 'Département', 'admin:core_department_changelist', 'départements',
+        'Import réussi: {created} départements importés.',
+    )
 
 
 @user_passes_test(is_superuser)
@@ -2557,70 +2724,10 @@ def function_export(request):
 @transaction.atomic
 def function_import(request):
     """Import functions from JSON file - overwrites existing database - only accessible to superusers"""
-    if request.method == 'POST':
-        import_file = request.FILES.get('import_file')
-        
-        if not import_file:
-            messages.error(request, 'Aucun fichier sélectionné.')
-            return redirect('admin:core_function_changelist')
-        
-        # Validate file type
-        if not import_file.name.endswith('.json'):
-            messages.error(request, 'Le fichier doit être au format JSON.')
-            return redirect('admin:core_function_changelist')
-        
-        try:
-            # Read and parse JSON
-            content = import_file.read().decode('utf-8')
-            data = json.loads(content)
-            
-            if not isinstance(data, list):
-                messages.error(request, 'Le fichier JSON doit contenir une liste de fonctions.')
-                return redirect('admin:core_function_changelist')
-            
-            # Validate required fields for each function
-            required_fields = ['designation']
-            errors = []
-            
-            for i, function_data in enumerate(data):
-                for field in required_fields:
-                    if field not in function_data or not function_data[field]:
-                        errors.append(f'Fonction {i+1}: champ "{field}" manquant ou vide')
-                
-                # Validate status is boolean if provided
-                if 'status' in function_data and function_data['status'] is not None:
-                    if not isinstance(function_data['status'], bool):
-                        errors.append(f'Fonction {i+1}: le statut doit être true ou false')
-            
-            if errors:
-                messages.error(request, f'Erreurs de validation ({len(errors)} erreurs trouvées):')
-                for error in errors[:3]:  # Show first 3 errors
-                    messages.error(request, f'  • {error}')
-                if len(errors) > 3:
-                    messages.error(request, f'  • ... et {len(errors) - 3} autres erreurs.')
-                return redirect('admin:core_function_changelist')
-            
-            # Delete all existing functions
-            Function.objects.all().delete()
-            
-            # Import new functions
-            created_count = 0
-            for function_data in data:
-                Function.objects.create(
-                    designation=function_data['designation'],
-                    description=function_data.get('description', ''),
-                    status=function_data.get('status', True)
-                )
-                created_count += 1
-            
-            messages.success(request, f'Import réussi: {created_count} fonctions importées.')
-            
-        except json.JSONDecodeError:
-            messages.error(request, 'Le fichier JSON n\'est pas valide.')
-        except Exception as e:
-            messages.error(request, f'Erreur lors de l\'importation: {str(e)}')
-    
-    return redirect('admin:core_function_changelist')
+    return _model_import(
+        request, 'functions', 'Fonction', 'admin:core_function_changelist', 'fonctions',
+        'Import réussi: {created} fonctions importées.',
+    )
 
 
 @user_passes_test(is_superuser)
@@ -2656,76 +2763,10 @@ def scheduletype_export(request):
 @transaction.atomic
 def scheduletype_import(request):
     """Import schedule types from JSON file - overwrites existing database - only accessible to superusers"""
-    if request.method == 'POST':
-        import_file = request.FILES.get('import_file')
-        
-        if not import_file:
-            messages.error(request, 'Aucun fichier sélectionné.')
-            return redirect('admin:core_scheduletype_changelist')
-        
-        # Validate file type
-        if not import_file.name.endswith('.json'):
-            messages.error(request, 'Le fichier doit être au format JSON.')
-            return redirect('admin:core_scheduletype_changelist')
-        
-        try:
-            # Read and parse JSON
-            content = import_file.read().decode('utf-8')
-            data = json.loads(content)
-            
-            if not isinstance(data, list):
-                messages.error(request, 'Le fichier JSON doit contenir une liste de types d\'horaires.')
-                return redirect('admin:core_scheduletype_changelist')
-            
-            # Validate required fields for each schedule type
-            required_fields = ['designation', 'color']
-            errors = []
-            
-            for i, schedule_type_data in enumerate(data):
-                for field in required_fields:
-                    if field not in schedule_type_data or not schedule_type_data[field]:
-                        errors.append(f'Type d\'horaire {i+1}: champ "{field}" manquant ou vide')
-                
-                # Validate color format (hexadecimal)
-                if 'color' in schedule_type_data and schedule_type_data['color']:
-                    import re
-                    if not re.match(r'^#[0-9A-Fa-f]{6}$', schedule_type_data['color']):
-                        errors.append(f'Type d\'horaire {i+1}: la couleur doit être au format hexadécimal (ex: #FF0000)')
-                
-                # Validate short_designation format if provided
-                if 'short_designation' in schedule_type_data and schedule_type_data['short_designation']:
-                    if not re.match(r'^[A-Z]{2,3}$', schedule_type_data['short_designation'].upper()):
-                        errors.append(f'Type d\'horaire {i+1}: l\'abréviation doit contenir 2 ou 3 lettres majuscules uniquement')
-            
-            if errors:
-                messages.error(request, f'Erreurs de validation ({len(errors)} erreurs trouvées):')
-                for error in errors[:3]:  # Show first 3 errors
-                    messages.error(request, f'  • {error}')
-                if len(errors) > 3:
-                    messages.error(request, f'  • ... et {len(errors) - 3} autres erreurs.')
-                return redirect('admin:core_scheduletype_changelist')
-            
-            # Delete all existing schedule types
-            ScheduleType.objects.all().delete()
-            
-            # Import new schedule types
-            created_count = 0
-            for schedule_type_data in data:
-                ScheduleType.objects.create(
-                    designation=schedule_type_data['designation'],
-                    short_designation=schedule_type_data.get('short_designation', '').upper() if schedule_type_data.get('short_designation') else None,
-                    color=schedule_type_data['color']
-                )
-                created_count += 1
-            
-            messages.success(request, f'Import réussi: {created_count} types d\'horaires importés.')
-            
-        except json.JSONDecodeError:
-            messages.error(request, 'Le fichier JSON n\'est pas valide.')
-        except Exception as e:
-            messages.error(request, f'Erreur lors de l\'importation: {str(e)}')
-    
-    return redirect('admin:core_scheduletype_changelist')
+    return _model_import(
+        request, 'schedule_types', "Type d'horaire", 'admin:core_scheduletype_changelist', "types d'horaires",
+        "Import réussi: {created} types d'horaires importés.",
+    )
 
 
 @user_passes_test(is_superuser)
@@ -2763,73 +2804,10 @@ def dailyrotationplan_export(request):
 @transaction.atomic
 def dailyrotationplan_import(request):
     """Import daily rotation plans from JSON file - overwrites existing database - only accessible to superusers"""
-    if request.method == 'POST':
-        import_file = request.FILES.get('import_file')
-        
-        if not import_file:
-            messages.error(request, 'Aucun fichier sélectionné.')
-            return redirect('admin:core_dailyrotationplan_changelist')
-        
-        # Validate file type
-        if not import_file.name.endswith('.json'):
-            messages.error(request, 'Le fichier doit être au format JSON.')
-            return redirect('admin:core_dailyrotationplan_changelist')
-        
-        try:
-            # Read and parse JSON
-            content = import_file.read().decode('utf-8')
-            data = json.loads(content)
-            
-            if not isinstance(data, list):
-                messages.error(request, 'Le fichier JSON doit contenir une liste de rythmes quotidiens.')
-                return redirect('admin:core_dailyrotationplan_changelist')
-            
-            # Validate required fields for each daily rotation plan
-            required_fields = ['designation', 'schedule_type_designation']
-            errors = []
-            
-            for i, plan_data in enumerate(data):
-                for field in required_fields:
-                    if field not in plan_data or not plan_data[field]:
-                        errors.append(f'Rythme quotidien {i+1}: champ "{field}" manquant ou vide')
-                
-                # Validate that schedule_type exists
-                if 'schedule_type_designation' in plan_data and plan_data['schedule_type_designation']:
-                    try:
-                        ScheduleType.objects.get(designation=plan_data['schedule_type_designation'])
-                    except ScheduleType.DoesNotExist:
-                        errors.append(f'Rythme quotidien {i+1}: type d\'horaire "{plan_data["schedule_type_designation"]}" introuvable')
-            
-            if errors:
-                messages.error(request, f'Erreurs de validation ({len(errors)} erreurs trouvées):')
-                for error in errors[:3]:  # Show first 3 errors
-                    messages.error(request, f'  • {error}')
-                if len(errors) > 3:
-                    messages.error(request, f'  • ... et {len(errors) - 3} autres erreurs.')
-                return redirect('admin:core_dailyrotationplan_changelist')
-            
-            # Delete all existing daily rotation plans
-            DailyRotationPlan.objects.all().delete()
-            
-            # Import new daily rotation plans
-            created_count = 0
-            for plan_data in data:
-                schedule_type = ScheduleType.objects.get(designation=plan_data['schedule_type_designation'])
-                DailyRotationPlan.objects.create(
-                    designation=plan_data['designation'],
-                    description=plan_data.get('description', ''),
-                    schedule_type=schedule_type
-                )
-                created_count += 1
-            
-            messages.success(request, f'Import réussi: {created_count} rythmes quotidiens importés.')
-            
-        except json.JSONDecodeError:
-            messages.error(request, 'Le fichier JSON n\'est pas valide.')
-        except Exception as e:
-            messages.error(request, f'Erreur lors de l\'importation: {str(e)}')
-    
-    return redirect('admin:core_dailyrotationplan_changelist')
+    return _model_import(
+        request, 'daily_rotation_plans', 'Rythme quotidien', 'admin:core_dailyrotationplan_changelist', 'rythmes quotidiens',
+        'Import réussi: {created} rythmes quotidiens importés.',
+    )
 
 
 @user_passes_test(is_superuser)
@@ -2867,80 +2845,10 @@ def shiftschedule_export(request):
 @transaction.atomic
 def shiftschedule_import(request):
     """Import shift schedules from JSON file - overwrites existing database - only accessible to superusers"""
-    if request.method == 'POST':
-        import_file = request.FILES.get('import_file')
-        
-        if not import_file:
-            messages.error(request, 'Aucun fichier sélectionné.')
-            return redirect('admin:core_shiftschedule_changelist')
-        
-        # Validate file type
-        if not import_file.name.endswith('.json'):
-            messages.error(request, 'Le fichier doit être au format JSON.')
-            return redirect('admin:core_shiftschedule_changelist')
-        
-        try:
-            # Read and parse JSON
-            content = import_file.read().decode('utf-8')
-            data = json.loads(content)
-            
-            if not isinstance(data, list):
-                messages.error(request, 'Le fichier JSON doit contenir une liste de plannings de poste.')
-                return redirect('admin:core_shiftschedule_changelist')
-            
-            # Validate required fields for each shift schedule
-            required_fields = ['name', 'type']
-            valid_types = ['day', 'shift']
-            errors = []
-            
-            for i, schedule_data in enumerate(data):
-                for field in required_fields:
-                    if field not in schedule_data or not schedule_data[field]:
-                        errors.append(f'Planning de poste {i+1}: champ "{field}" manquant ou vide')
-                
-                # Validate type choice
-                if 'type' in schedule_data and schedule_data['type']:
-                    if schedule_data['type'] not in valid_types:
-                        errors.append(f'Planning de poste {i+1}: type "{schedule_data["type"]}" invalide (doit être "day" ou "shift")')
-                
-                # Validate break_times is a positive integer if provided
-                if 'break_times' in schedule_data and schedule_data['break_times'] is not None:
-                    try:
-                        break_times = int(schedule_data['break_times'])
-                        if break_times < 0:
-                            errors.append(f'Planning de poste {i+1}: le nombre de pauses doit être positif')
-                    except (ValueError, TypeError):
-                        errors.append(f'Planning de poste {i+1}: le nombre de pauses doit être un nombre entier')
-            
-            if errors:
-                messages.error(request, f'Erreurs de validation ({len(errors)} erreurs trouvées):')
-                for error in errors[:3]:  # Show first 3 errors
-                    messages.error(request, f'  • {error}')
-                if len(errors) > 3:
-                    messages.error(request, f'  • ... et {len(errors) - 3} autres erreurs.')
-                return redirect('admin:core_shiftschedule_changelist')
-            
-            # Delete all existing shift schedules
-            ShiftSchedule.objects.all().delete()
-            
-            # Import new shift schedules
-            created_count = 0
-            for schedule_data in data:
-                ShiftSchedule.objects.create(
-                    name=schedule_data['name'],
-                    type=schedule_data['type'],
-                    break_times=schedule_data.get('break_times', 2)
-                )
-                created_count += 1
-            
-            messages.success(request, f'Import réussi: {created_count} plannings de poste importés.')
-            
-        except json.JSONDecodeError:
-            messages.error(request, 'Le fichier JSON n\'est pas valide.')
-        except Exception as e:
-            messages.error(request, f'Erreur lors de l\'importation: {str(e)}')
-    
-    return redirect('admin:core_shiftschedule_changelist')
+    return _model_import(
+        request, 'shift_schedules', 'Planning de poste', 'admin:core_shiftschedule_changelist', 'plannings de poste',
+        'Import réussi: {created} plannings de poste importés.',
+    )
 
 
 @user_passes_test(is_superuser)
@@ -2978,96 +2886,10 @@ def shiftscheduleperiod_export(request):
 @transaction.atomic
 def shiftscheduleperiod_import(request):
     """Import shift schedule periods from JSON file - overwrites existing database - only accessible to superusers"""
-    if request.method == 'POST':
-        import_file = request.FILES.get('import_file')
-        
-        if not import_file:
-            messages.error(request, 'Aucun fichier sélectionné.')
-            return redirect('admin:core_shiftscheduleperiod_changelist')
-        
-        # Validate file type
-        if not import_file.name.endswith('.json'):
-            messages.error(request, 'Le fichier doit être au format JSON.')
-            return redirect('admin:core_shiftscheduleperiod_changelist')
-        
-        try:
-            # Read and parse JSON
-            content = import_file.read().decode('utf-8')
-            data = json.loads(content)
-            
-            if not isinstance(data, list):
-                messages.error(request, 'Le fichier JSON doit contenir une liste de périodes de planning de poste.')
-                return redirect('admin:core_shiftscheduleperiod_changelist')
-            
-            # Validate required fields for each period
-            required_fields = ['shift_schedule_name', 'start_date', 'end_date']
-            errors = []
-            
-            for i, period_data in enumerate(data):
-                for field in required_fields:
-                    if field not in period_data or not period_data[field]:
-                        errors.append(f'Période {i+1}: champ "{field}" manquant ou vide')
-                
-                # Validate that shift_schedule exists
-                if 'shift_schedule_name' in period_data and period_data['shift_schedule_name']:
-                    try:
-                        ShiftSchedule.objects.get(name=period_data['shift_schedule_name'])
-                    except ShiftSchedule.DoesNotExist:
-                        errors.append(f'Période {i+1}: planning de poste "{period_data["shift_schedule_name"]}" introuvable')
-                
-                # Validate date formats
-                for date_field in ['start_date', 'end_date']:
-                    if date_field in period_data and period_data[date_field]:
-                        try:
-                            from datetime import datetime
-                            datetime.fromisoformat(period_data[date_field])
-                        except ValueError:
-                            errors.append(f'Période {i+1}: format de date invalide pour "{date_field}" (attendu: YYYY-MM-DD)')
-                
-                # Validate that end_date >= start_date
-                if ('start_date' in period_data and period_data['start_date'] and
-                    'end_date' in period_data and period_data['end_date']):
-                    try:
-                        start_date = datetime.fromisoformat(period_data['start_date']).date()
-                        end_date = datetime.fromisoformat(period_data['end_date']).date()
-                        if end_date < start_date:
-                            errors.append(f'Période {i+1}: la date de fin doit être postérieure ou égale à la date de début')
-                    except ValueError:
-                        pass  # Date format error already caught above
-            
-            if errors:
-                messages.error(request, f'Erreurs de validation ({len(errors)} erreurs trouvées):')
-                for error in errors[:3]:  # Show first 3 errors
-                    messages.error(request, f'  • {error}')
-                if len(errors) > 3:
-                    messages.error(request, f'  • ... et {len(errors) - 3} autres erreurs.')
-                return redirect('admin:core_shiftscheduleperiod_changelist')
-            
-            # Delete all existing shift schedule periods
-            ShiftSchedulePeriod.objects.all().delete()
-            
-            # Import new shift schedule periods
-            created_count = 0
-            for period_data in data:
-                shift_schedule = ShiftSchedule.objects.get(name=period_data['shift_schedule_name'])
-                start_date = datetime.fromisoformat(period_data['start_date']).date()
-                end_date = datetime.fromisoformat(period_data['end_date']).date()
-                
-                ShiftSchedulePeriod.objects.create(
-                    shift_schedule=shift_schedule,
-                    start_date=start_date,
-                    end_date=end_date
-                )
-                created_count += 1
-            
-            messages.success(request, f'Import réussi: {created_count} périodes de planning de poste importées.')
-            
-        except json.JSONDecodeError:
-            messages.error(request, 'Le fichier JSON n\'est pas valide.')
-        except Exception as e:
-            messages.error(request, f'Erreur lors de l\'importation: {str(e)}')
-    
-    return redirect('admin:core_shiftscheduleperiod_changelist')
+    return _model_import(
+        request, 'shift_schedule_periods', 'Période', 'admin:core_shiftscheduleperiod_changelist', 'périodes de planning de poste',
+        'Import réussi: {created} périodes de planning de poste importées.',
+    )
 
 
 @user_passes_test(is_superuser)
@@ -3107,127 +2929,10 @@ def rotationperiod_export(request):
 @transaction.atomic
 def rotationperiod_import(request):
     """Import rotation periods from JSON file - overwrites existing database - only accessible to superusers"""
-    if request.method == 'POST':
-        import_file = request.FILES.get('import_file')
-        
-        if not import_file:
-            messages.error(request, 'Aucun fichier sélectionné.')
-            return redirect('admin:core_rotationperiod_changelist')
-        
-        # Validate file type
-        if not import_file.name.endswith('.json'):
-            messages.error(request, 'Le fichier doit être au format JSON.')
-            return redirect('admin:core_rotationperiod_changelist')
-        
-        try:
-            # Read and parse JSON
-            content = import_file.read().decode('utf-8')
-            data = json.loads(content)
-            
-            if not isinstance(data, list):
-                messages.error(request, 'Le fichier JSON doit contenir une liste de périodes de rotation.')
-                return redirect('admin:core_rotationperiod_changelist')
-            
-            # Validate required fields for each period
-            required_fields = ['daily_rotation_plan_designation', 'start_date', 'end_date', 'start_time', 'end_time']
-            errors = []
-            
-            for i, period_data in enumerate(data):
-                for field in required_fields:
-                    if field not in period_data or not period_data[field]:
-                        errors.append(f'Période {i+1}: champ "{field}" manquant ou vide')
-                
-                # Validate that daily_rotation_plan exists
-                if 'daily_rotation_plan_designation' in period_data and period_data['daily_rotation_plan_designation']:
-                    try:
-                        DailyRotationPlan.objects.get(designation=period_data['daily_rotation_plan_designation'])
-                    except DailyRotationPlan.DoesNotExist:
-                        errors.append(f'Période {i+1}: rythme quotidien "{period_data["daily_rotation_plan_designation"]}" introuvable')
-                
-                # Validate date formats
-                for date_field in ['start_date', 'end_date']:
-                    if date_field in period_data and period_data[date_field]:
-                        try:
-                            from datetime import datetime
-                            datetime.fromisoformat(period_data[date_field])
-                        except ValueError:
-                            errors.append(f'Période {i+1}: format de date invalide pour "{date_field}" (attendu: YYYY-MM-DD)')
-                
-                # Validate time formats
-                for time_field in ['start_time', 'end_time']:
-                    if time_field in period_data and period_data[time_field]:
-                        try:
-                            from datetime import datetime
-                            datetime.fromisoformat(f"2000-01-01T{period_data[time_field]}")
-                        except ValueError:
-                            errors.append(f'Période {i+1}: format d\'heure invalide pour "{time_field}" (attendu: HH:MM:SS)')
-                
-                # Validate that end_date >= start_date
-                if ('start_date' in period_data and period_data['start_date'] and
-                    'end_date' in period_data and period_data['end_date']):
-                    try:
-                        start_date = datetime.fromisoformat(period_data['start_date']).date()
-                        end_date = datetime.fromisoformat(period_data['end_date']).date()
-                        if end_date < start_date:
-                            errors.append(f'Période {i+1}: la date de fin doit être postérieure ou égale à la date de début')
-                    except ValueError:
-                        pass  # Date format error already caught above
-                
-                # Validate time consistency (night shifts are allowed)
-                if ('start_time' in period_data and period_data['start_time'] and
-                    'end_time' in period_data and period_data['end_time']):
-                    try:
-                        start_time = datetime.fromisoformat(f"2000-01-01T{period_data['start_time']}").time()
-                        end_time = datetime.fromisoformat(f"2000-01-01T{period_data['end_time']}").time()
-                        
-                        if start_time >= end_time:
-                            # Check if this could be a valid night shift
-                            from datetime import time
-                            is_potential_night_shift = (
-                                start_time >= time(16, 0) and end_time <= time(12, 0)
-                            )
-                            if not is_potential_night_shift:
-                                errors.append(f'Période {i+1}: heure de fin invalide. Les équipes de nuit doivent commencer après 16:00 et finir avant 12:00')
-                    except ValueError:
-                        pass  # Time format error already caught above
-            
-            if errors:
-                messages.error(request, f'Erreurs de validation ({len(errors)} erreurs trouvées):')
-                for error in errors[:3]:  # Show first 3 errors
-                    messages.error(request, f'  • {error}')
-                if len(errors) > 3:
-                    messages.error(request, f'  • ... et {len(errors) - 3} autres erreurs.')
-                return redirect('admin:core_rotationperiod_changelist')
-            
-            # Delete all existing rotation periods
-            RotationPeriod.objects.all().delete()
-            
-            # Import new rotation periods
-            created_count = 0
-            for period_data in data:
-                daily_rotation_plan = DailyRotationPlan.objects.get(designation=period_data['daily_rotation_plan_designation'])
-                start_date = datetime.fromisoformat(period_data['start_date']).date()
-                end_date = datetime.fromisoformat(period_data['end_date']).date()
-                start_time = datetime.fromisoformat(f"2000-01-01T{period_data['start_time']}").time()
-                end_time = datetime.fromisoformat(f"2000-01-01T{period_data['end_time']}").time()
-                
-                RotationPeriod.objects.create(
-                    daily_rotation_plan=daily_rotation_plan,
-                    start_date=start_date,
-                    end_date=end_date,
-                    start_time=start_time,
-                    end_time=end_time
-                )
-                created_count += 1
-            
-            messages.success(request, f'Import réussi: {created_count} périodes de rotation importées.')
-            
-        except json.JSONDecodeError:
-            messages.error(request, 'Le fichier JSON n\'est pas valide.')
-        except Exception as e:
-            messages.error(request, f'Erreur lors de l\'importation: {str(e)}')
-    
-    return redirect('admin:core_rotationperiod_changelist')
+    return _model_import(
+        request, 'rotation_periods', 'Période', 'admin:core_rotationperiod_changelist', 'périodes de rotation',
+        'Import réussi: {created} périodes de rotation importées.',
+    )
 
 
 @user_passes_test(is_superuser)
@@ -3261,128 +2966,10 @@ def shiftscheduleweek_export(request):
 @transaction.atomic
 def shiftscheduleweek_import(request):
     """Import shift schedule weeks from JSON file - overwrites existing database - only accessible to superusers"""
-    if request.method == 'POST':
-        import_file = request.FILES.get('import_file')
-        
-        if not import_file:
-            messages.error(request, 'Aucun fichier sélectionné.')
-            return redirect('admin:core_shiftscheduleweek_changelist')
-        
-        # Validate file type
-        if not import_file.name.endswith('.json'):
-            messages.error(request, 'Le fichier doit être au format JSON.')
-            return redirect('admin:core_shiftscheduleweek_changelist')
-        
-        try:
-            # Read and parse JSON
-            content = import_file.read().decode('utf-8')
-            data = json.loads(content)
-            
-            if not isinstance(data, list):
-                messages.error(request, 'Le fichier JSON doit contenir une liste de semaines de planning.')
-                return redirect('admin:core_shiftscheduleweek_changelist')
-            
-            # Validate required fields for each week
-            required_fields = ['shift_schedule_name', 'period_start_date', 'period_end_date', 'week_number']
-            errors = []
-            
-            for i, week_data in enumerate(data):
-                for field in required_fields:
-                    if field not in week_data or week_data[field] is None or week_data[field] == '':
-                        errors.append(f'Semaine {i+1}: champ "{field}" manquant ou vide')
-                
-                # Validate that shift schedule exists
-                if 'shift_schedule_name' in week_data and week_data['shift_schedule_name']:
-                    try:
-                        shift_schedule = ShiftSchedule.objects.get(name=week_data['shift_schedule_name'])
-                        
-                        # Validate that the period exists for this shift schedule
-                        if ('period_start_date' in week_data and week_data['period_start_date'] and
-                            'period_end_date' in week_data and week_data['period_end_date']):
-                            try:
-                                start_date = datetime.fromisoformat(week_data['period_start_date']).date()
-                                end_date = datetime.fromisoformat(week_data['period_end_date']).date()
-                                
-                                period = ShiftSchedulePeriod.objects.filter(
-                                    shift_schedule=shift_schedule,
-                                    start_date=start_date,
-                                    end_date=end_date
-                                ).first()
-                                
-                                if not period:
-                                    errors.append(f'Semaine {i+1}: période {start_date} - {end_date} introuvable pour le planning "{week_data["shift_schedule_name"]}"')
-                            except ValueError:
-                                pass  # Date format error will be caught below
-                    except ShiftSchedule.DoesNotExist:
-                        errors.append(f'Semaine {i+1}: planning de poste "{week_data["shift_schedule_name"]}" introuvable')
-                
-                # Validate date formats
-                for date_field in ['period_start_date', 'period_end_date']:
-                    if date_field in week_data and week_data[date_field]:
-                        try:
-                            from datetime import datetime
-                            datetime.fromisoformat(week_data[date_field])
-                        except ValueError:
-                            errors.append(f'Semaine {i+1}: format de date invalide pour "{date_field}" (attendu: YYYY-MM-DD)')
-                
-                # Validate week_number is a positive integer
-                if 'week_number' in week_data:
-                    try:
-                        week_number = int(week_data['week_number'])
-                        if week_number <= 0:
-                            errors.append(f'Semaine {i+1}: le numéro de semaine doit être un entier positif')
-                    except (ValueError, TypeError):
-                        errors.append(f'Semaine {i+1}: numéro de semaine invalide (doit être un nombre entier)')
-                
-                # Validate that period dates are consistent
-                if ('period_start_date' in week_data and week_data['period_start_date'] and
-                    'period_end_date' in week_data and week_data['period_end_date']):
-                    try:
-                        start_date = datetime.fromisoformat(week_data['period_start_date']).date()
-                        end_date = datetime.fromisoformat(week_data['period_end_date']).date()
-                        if end_date < start_date:
-                            errors.append(f'Semaine {i+1}: la date de fin de période doit être postérieure ou égale à la date de début')
-                    except ValueError:
-                        pass  # Date format error already caught above
-            
-            if errors:
-                messages.error(request, f'Erreurs de validation ({len(errors)} erreurs trouvées):')
-                for error in errors[:3]:  # Show first 3 errors
-                    messages.error(request, f'  • {error}')
-                if len(errors) > 3:
-                    messages.error(request, f'  • ... et {len(errors) - 3} autres erreurs.')
-                return redirect('admin:core_shiftscheduleweek_changelist')
-            
-            # Delete all existing shift schedule weeks
-            ShiftScheduleWeek.objects.all().delete()
-            
-            # Import new shift schedule weeks
-            created_count = 0
-            for week_data in data:
-                shift_schedule = ShiftSchedule.objects.get(name=week_data['shift_schedule_name'])
-                start_date = datetime.fromisoformat(week_data['period_start_date']).date()
-                end_date = datetime.fromisoformat(week_data['period_end_date']).date()
-                
-                period = ShiftSchedulePeriod.objects.get(
-                    shift_schedule=shift_schedule,
-                    start_date=start_date,
-                    end_date=end_date
-                )
-                
-                ShiftScheduleWeek.objects.create(
-                    period=period,
-                    week_number=int(week_data['week_number'])
-                )
-                created_count += 1
-            
-            messages.success(request, f'Import réussi: {created_count} semaines de planning importées.')
-            
-        except json.JSONDecodeError:
-            messages.error(request, 'Le fichier JSON n\'est pas valide.')
-        except Exception as e:
-            messages.error(request, f'Erreur lors de l\'importation: {str(e)}')
-    
-    return redirect('admin:core_shiftscheduleweek_changelist')
+    return _model_import(
+        request, 'shift_schedule_weeks', 'Semaine', 'admin:core_shiftscheduleweek_changelist', 'semaines de planning',
+        'Import réussi: {created} semaines de planning importées.',
+    )
 
 
 @user_passes_test(is_superuser)
@@ -3418,311 +3005,55 @@ def shiftscheduledailyplan_export(request):
 @transaction.atomic
 def shiftscheduledailyplan_import(request):
     """Import shift schedule daily plans from JSON file - overwrites existing database - only accessible to superusers"""
-    if request.method == 'POST':
-        import_file = request.FILES.get('import_file')
-        
-        if not import_file:
-            messages.error(request, 'Aucun fichier sélectionné.')
-            return redirect('admin:core_shiftscheduledailyplan_changelist')
-        
-        # Validate file type
-        if not import_file.name.endswith('.json'):
-            messages.error(request, 'Le fichier doit être au format JSON.')
-            return redirect('admin:core_shiftscheduledailyplan_changelist')
-        
-        try:
-            # Read and parse JSON
-            content = import_file.read().decode('utf-8')
-            data = json.loads(content)
-            
-            if not isinstance(data, list):
-                messages.error(request, 'Le fichier JSON doit contenir une liste de plans quotidiens de planning.')
-                return redirect('admin:core_shiftscheduledailyplan_changelist')
-            
-            # Validate required fields for each daily plan
-            required_fields = ['shift_schedule_name', 'period_start_date', 'period_end_date', 'week_number', 'weekday', 'daily_rotation_plan_designation']
-            errors = []
-            
-            for i, plan_data in enumerate(data):
-                for field in required_fields:
-                    if field not in plan_data or plan_data[field] is None or plan_data[field] == '':
-                        errors.append(f'Plan {i+1}: champ "{field}" manquant ou vide')
-                
-                # Validate that shift schedule exists
-                if 'shift_schedule_name' in plan_data and plan_data['shift_schedule_name']:
-                    try:
-                        shift_schedule = ShiftSchedule.objects.get(name=plan_data['shift_schedule_name'])
-                        
-                        # Validate that the period exists for this shift schedule
-                        if ('period_start_date' in plan_data and plan_data['period_start_date'] and
-                            'period_end_date' in plan_data and plan_data['period_end_date']):
-                            try:
-                                start_date = datetime.fromisoformat(plan_data['period_start_date']).date()
-                                end_date = datetime.fromisoformat(plan_data['period_end_date']).date()
-                                
-                                period = ShiftSchedulePeriod.objects.filter(
-                                    shift_schedule=shift_schedule,
-                                    start_date=start_date,
-                                    end_date=end_date
-                                ).first()
-                                
-                                if not period:
-                                    errors.append(f'Plan {i+1}: période {start_date} - {end_date} introuvable pour le planning "{plan_data["shift_schedule_name"]}"')
-                                else:
-                                    # Validate that the week exists for this period
-                                    if 'week_number' in plan_data and plan_data['week_number']:
-                                        try:
-                                            week_number = int(plan_data['week_number'])
-                                            week = ShiftScheduleWeek.objects.filter(
-                                                period=period,
-                                                week_number=week_number
-                                            ).first()
-                                            
-                                            if not week:
-                                                errors.append(f'Plan {i+1}: semaine {week_number} introuvable pour la période {start_date} - {end_date}')
-                                        except ValueError:
-                                            pass  # Week number format error will be caught below
-                            except ValueError:
-                                pass  # Date format error will be caught below
-                    except ShiftSchedule.DoesNotExist:
-                        errors.append(f'Plan {i+1}: planning de poste "{plan_data["shift_schedule_name"]}" introuvable')
-                
-                # Validate that daily rotation plan exists
-                if 'daily_rotation_plan_designation' in plan_data and plan_data['daily_rotation_plan_designation']:
-                    try:
-                        DailyRotationPlan.objects.get(designation=plan_data['daily_rotation_plan_designation'])
-                    except DailyRotationPlan.DoesNotExist:
-                        errors.append(f'Plan {i+1}: rythme quotidien "{plan_data["daily_rotation_plan_designation"]}" introuvable')
-                
-                # Validate date formats
-                for date_field in ['period_start_date', 'period_end_date']:
-                    if date_field in plan_data and plan_data[date_field]:
-                        try:
-                            from datetime import datetime
-                            datetime.fromisoformat(plan_data[date_field])
-                        except ValueError:
-                            errors.append(f'Plan {i+1}: format de date invalide pour "{date_field}" (attendu: YYYY-MM-DD)')
-                
-                # Validate week_number is a positive integer
-                if 'week_number' in plan_data:
-                    try:
-                        week_number = int(plan_data['week_number'])
-                        if week_number <= 0:
-                            errors.append(f'Plan {i+1}: le numéro de semaine doit être un entier positif')
-                    except (ValueError, TypeError):
-                        errors.append(f'Plan {i+1}: numéro de semaine invalide (doit être un nombre entier)')
-                
-                # Validate weekday is a valid integer (1-7)
-                if 'weekday' in plan_data:
-                    try:
-                        weekday = int(plan_data['weekday'])
-                        if weekday < 1 or weekday > 7:
-                            errors.append(f'Plan {i+1}: le jour de la semaine doit être entre 1 (Lundi) et 7 (Dimanche)')
-                    except (ValueError, TypeError):
-                        errors.append(f'Plan {i+1}: jour de la semaine invalide (doit être un nombre entier entre 1 et 7)')
-                
-                # Validate that period dates are consistent
-                if ('period_start_date' in plan_data and plan_data['period_start_date'] and
-                    'period_end_date' in plan_data and plan_data['period_end_date']):
-                    try:
-                        start_date = datetime.fromisoformat(plan_data['period_start_date']).date()
-                        end_date = datetime.fromisoformat(plan_data['period_end_date']).date()
-                        if end_date < start_date:
-                            errors.append(f'Plan {i+1}: la date de fin de période doit être postérieure ou égale à la date de début')
-                    except ValueError:
-                        pass  # Date format error already caught above
-            
-            if errors:
-                messages.error(request, f'Erreurs de validation ({len(errors)} erreurs trouvées):')
-                for error in errors[:3]:  # Show first 3 errors
-                    messages.error(request, f'  • {error}')
-                if len(errors) > 3:
-                    messages.error(request, f'  • ... et {len(errors) - 3} autres erreurs.')
-                return redirect('admin:core_shiftscheduledailyplan_changelist')
-            
-            # Delete all existing shift schedule daily plans
-            ShiftScheduleDailyPlan.objects.all().delete()
-            
-            # Import new shift schedule daily plans
-            created_count = 0
-            for plan_data in data:
-                shift_schedule = ShiftSchedule.objects.get(name=plan_data['shift_schedule_name'])
-                start_date = datetime.fromisoformat(plan_data['period_start_date']).date()
-                end_date = datetime.fromisoformat(plan_data['period_end_date']).date()
-                
-                period = ShiftSchedulePeriod.objects.get(
-                    shift_schedule=shift_schedule,
-                    start_date=start_date,
-                    end_date=end_date
-                )
-                
-                week = ShiftScheduleWeek.objects.get(
-                    period=period,
-                    week_number=int(plan_data['week_number'])
-                )
-                
-                daily_rotation_plan = DailyRotationPlan.objects.get(designation=plan_data['daily_rotation_plan_designation'])
-                
-                ShiftScheduleDailyPlan.objects.create(
-                    week=week,
-                    weekday=int(plan_data['weekday']),
-                    daily_rotation_plan=daily_rotation_plan
-                )
-                created_count += 1
-            
-            messages.success(request, f'Import réussi: {created_count} plans quotidiens de planning importés.')
-            
-        except json.JSONDecodeError:
-            messages.error(request, 'Le fichier JSON n\'est pas valide.')
-        except Exception as e:
-            messages.error(request, f'Erreur lors de l\'importation: {str(e)}')
-    
-    return redirect('admin:core_shiftscheduledailyplan_changelist')
+    return _model_import(
+        request, 'shift_schedule_daily_plans', 'Plan', 'admin:core_shiftscheduledailyplan_changelist', 'plans quotidiens de planning',
+        'Import réussi: {created} plans quotidiens de planning importés.',
+    )
 
 
 @user_passes_test(is_superuser)
 def global_export(request):
-    """Export all models to a single ZIP file - only accessible to superusers"""
-    import zipfile
-    import io
-    from django.utils import timezone
-    
-    # Generate timestamp for filename
+    """Export all models to a single ZIP file, streamed as it is built - only accessible to superusers"""
     current_date = timezone.now().strftime('%Y-%m-%d_%H%M%S')
     
-    # Create in-memory ZIP file
-    zip_buffer = io.BytesIO()
+    response = StreamingHttpResponse(exports.global_export(current_date), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{current_date}_export_global_planning.zip"'
     
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        
-        # Export Agents
-        agents = Agent.objects.all().order_by('matricule')
-        agents_data = []
-        for agent in agents:
-            agents_data.append({
-                'matricule': agent.matricule,
-                'last_name': agent.last_name,
-                'first_name': agent.first_name,
-                'grade': agent.grade,
-                'hire_date': agent.hire_date.isoformat(),
-                'departure_date': agent.departure_date.isoformat() if agent.departure_date else None,
-                'permission_level': agent.permission_level
-            })
-        zip_file.writestr(f"{current_date}_agents.json", json.dumps(agents_data, indent=2, ensure_ascii=False))
-        
-        # Export Departments
-        departments = Department.objects.all().order_by('order', 'name')
-        departments_data = []
-        for dept in departments:
-            departments_data.append({
-                'name': dept.name,
-                'order': dept.order
-            })
-        zip_file.writestr(f"{current_date}_departments.json", json.dumps(departments_data, indent=2, ensure_ascii=False))
-        
-        # Export Functions
-        functions = Function.objects.all().order_by('designation')
-        functions_data = []
-        for func in functions:
-            functions_data.append({
-                'designation': func.designation,
-                'description': func.description,
-                'status': func.status
-            })
-        zip_file.writestr(f"{current_date}_functions.json", json.dumps(functions_data, indent=2, ensure_ascii=False))
-        
-        # Export Schedule Types
-        schedule_types = ScheduleType.objects.all().order_by('designation')
-        schedule_types_data = []
-        for st in schedule_types:
-            schedule_types_data.append({
-                'designation': st.designation,
-                'short_designation': st.short_designation,
-                'color': st.color
-            })
-        zip_file.writestr(f"{current_date}_schedule_types.json", json.dumps(schedule_types_data, indent=2, ensure_ascii=False))
-        
-        # Export Daily Rotation Plans
-        daily_plans = DailyRotationPlan.objects.all().order_by('designation')
-        daily_plans_data = []
-        for plan in daily_plans:
-            daily_plans_data.append({
-                'designation': plan.designation,
-                'description': plan.description,
-                'schedule_type_designation': plan.schedule_type.designation
-            })
-        zip_file.writestr(f"{current_date}_daily_rotation_plans.json", json.dumps(daily_plans_data, indent=2, ensure_ascii=False))
-        
-        # Export Rotation Periods
-        rotation_periods = RotationPeriod.objects.all().order_by('daily_rotation_plan__designation', 'start_date', 'start_time')
-        rotation_periods_data = []
-        for period in rotation_periods:
-            rotation_periods_data.append({
-                'daily_rotation_plan_designation': period.daily_rotation_plan.designation,
-                'start_date': period.start_date.isoformat(),
-                'end_date': period.end_date.isoformat(),
-                'start_time': period.start_time.isoformat(),
-                'end_time': period.end_time.isoformat()
-            })
-        zip_file.writestr(f"{current_date}_rotation_periods.json", json.dumps(rotation_periods_data, indent=2, ensure_ascii=False))
-        
-        # Export Shift Schedules
-        shift_schedules = ShiftSchedule.objects.all().order_by('name')
-        shift_schedules_data = []
-        for schedule in shift_schedules:
-            shift_schedules_data.append({
-                'name': schedule.name,
-                'type': schedule.type,
-                'break_times': schedule.break_times
-            })
-        zip_file.writestr(f"{current_date}_shift_schedules.json", json.dumps(shift_schedules_data, indent=2, ensure_ascii=False))
-        
-        # Export Shift Schedule Periods
-        shift_periods = ShiftSchedulePeriod.objects.all().order_by('shift_schedule__name', 'start_date')
-        shift_periods_data = []
-        for period in shift_periods:
-            shift_periods_data.append({
-                'shift_schedule_name': period.shift_schedule.name,
-                'start_date': period.start_date.isoformat(),
-                'end_date': period.end_date.isoformat()
-            })
-        zip_file.writestr(f"{current_date}_shift_schedule_periods.json", json.dumps(shift_periods_data, indent=2, ensure_ascii=False))
-        
-        # Export Shift Schedule Weeks
-        shift_weeks = ShiftScheduleWeek.objects.all().order_by('period__shift_schedule__name', 'period__start_date', 'week_number')
-        shift_weeks_data = []
-        for week in shift_weeks:
-            shift_weeks_data.append({
-                'shift_schedule_name': week.period.shift_schedule.name,
-                'period_start_date': week.period.start_date.isoformat(),
-                'period_end_date': week.period.end_date.isoformat(),
-                'week_number': week.week_number
-            })
-        zip_file.writestr(f"{current_date}_shift_schedule_weeks.json", json.dumps(shift_weeks_data, indent=2, ensure_ascii=False))
-        
-        # Export Shift Schedule Daily Plans
-        daily_plans_shift = ShiftScheduleDailyPlan.objects.all().order_by('week__period__shift_schedule__name', 'week__period__start_date', 'week__week_number', 'weekday')
-        daily_plans_shift_data = []
-        for plan in daily_plans_shift:
-            daily_plans_shift_data.append({
-                'shift_schedule_name': plan.week.period.shift_schedule.name,
-                'period_start_date': plan.week.period.start_date.isoformat(),
-                'period_end_date': plan.week.period.end_date.isoformat(),
-                'week_number': plan.week.week_number,
-                'weekday': plan.weekday,
-                'daily_rotation_plan_designation': plan.daily_rotation_plan.designation
-            })
-        zip_file.writestr(f"{current_date}_shift_schedule_daily_plans.json", json.dumps(daily_plans_shift_data, indent=2, ensure_ascii=False))
+    return response
+
+
+@user_passes_test(is_superuser)
+@require_http_methods(["POST"])
+def global_import(request):
+    """Restore a global export ZIP file, replacing the whole planning - only accessible to superusers"""
+    import_file = request.FILES.get('import_file')
     
-    zip_buffer.seek(0)
+    if not import_file:
+        messages.error(request, 'Aucun fichier sélectionné.')
+        return redirect('admin:app_list', app_label='core')
     
-    response = HttpResponse(
-        zip_buffer.getvalue(),
-        content_type='application/zip'
-    )
-    response['Content-Disposition'] = f'attachment; filename="{current_date}_export_global_planning.zip"'
+    if not import_file.name.endswith('.zip'):
+        messages.error(request, 'Le fichier doit être une archive ZIP d\'export global.')
+        return redirect('admin:app_list', app_label='core')
     
-    return response
+    if not request.POST.get('confirm_action'):
+        messages.error(request, 'Confirmation requise pour remplacer la base de données.')
+        return redirect('admin:app_list', app_label='core')
+    
+    try:
+        timings = imports.restore(import_file)
+    except imports.ImportValidationError as e:
+        _validation_errors(request, e.errors)
+        return redirect('admin:app_list', app_label='core')
+    except Exception as e:
+        messages.error(request, f'Erreur lors de l\'importation: {str(e)}')
+        return redirect('admin:app_list', app_label='core')
+    
+    messages.success(request, f'Import global réussi en {sum(timing.seconds for timing in timings):.1f} s.')
+    for timing in timings:
+        count = '' if timing.count is None else f'{timing.count} lignes, '
+        messages.info(request, f'  • {timing.name} : {count}{timing.seconds:.2f} s')
+    return redirect('admin:app_list', app_label='core')
 
 
 # =============================================================================
@@ -3737,31 +3068,24 @@ def team_list(request):
     department_filter = request.GET.get('department', '')
     
     from django.db.models import Prefetch
+    from datetime import date
     
+    today = date.today()
     teams = Team.objects.select_related('department').prefetch_related(
-        'positions__function',
-        Prefetch('positions__agent_assignments', 
-                queryset=TeamPositionAgentAssignment.objects.select_related('agent').order_by('-start_date')),
-        Prefetch('positions__rotation_assignments', 
-                queryset=TeamPositionRotationAssignment.objects.select_related('rotation_plan').order_by('-start_date'))
+        Prefetch('positions',
+                queryset=TeamPosition.objects.select_related('function').with_assignments_as_of(today))
     ).order_by('designation')
     
     # Apply search filter
     if search_query:
-        teams = teams.filter(
-            Q(designation__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(department__name__icontains=search_query)
-        )
+        teams = search.search(teams, search_query).order_by('search_rank', 'designation')
     
     # Apply department filter
     if department_filter:
         teams = teams.filter(department_id=department_filter)
     
     departments = Department.objects.all().order_by('order', 'name')
-    current_agent = get_agent_from_user(request.user)
-    
-    from datetime import date
+    current_agent = request.agent
     
     context = {
         'teams': teams,
@@ -3769,12 +3093,92 @@ def team_list(request):
         'department_filter': department_filter,
         'departments': departments,
         'current_agent': current_agent,
-        'today': date.today(),
+        'today': today,
     }
     
     return render(request, 'core/teams/team_list.html', context)
 
 
+@login_required
+@viewer_required
+def team_planning(request, team_id):
+    """Monthly planning grid of a team: one row per position, one cell per day"""
+    import calendar
+    from .holidays import holiday_mask
+    from .planned_shifts import planned_positions
+    
+    team = get_object_or_404(Team.objects.select_related('department'), id=team_id)
+    
+    today = timezone.localdate()
+    try:
+        year, month = (int(part) for part in request.GET.get('month', '').split('-'))
+        # The previous and next months must exist too
+        if not datetime.MINYEAR < year < datetime.MAXYEAR:
+            raise ValueError(year)
+        first_day = datetime.date(year, month, 1)
+    except ValueError:
+        first_day = today.replace(day=1)
+    last_day = first_day.replace(day=calendar.monthrange(first_day.year, first_day.month)[1])
+    previous_month = (first_day - datetime.timedelta(days=1)).replace(day=1)
+    next_month = last_day + datetime.timedelta(days=1)
+    
+    positions = list(team.positions.select_related('function').order_by('order', 'id'))
+    roster = planned_positions(team.positions.all(), first_day, last_day)
+    agent_ids = {shift.agent_id for shifts in roster.values() for shift in shifts.values() if shift.agent_id}
+    agents = {agent.id: agent for agent in Agent.objects.filter(id__in=agent_ids)}
+    schedule_types = {schedule_type.id: schedule_type for schedule_type in ScheduleType.objects.all()}
+    
+    weekday_initials = ['L', 'M', 'M', 'J', 'V', 'S', 'D']
+    days = []
+    for offset, is_holiday in enumerate(holiday_mask(first_day, last_day)):
+        day = first_day + datetime.timedelta(days=offset)
+        days.append({
+            'date': day,
+            'initial': weekday_initials[day.weekday()],
+            'is_weekend': day.weekday() >= 5,
+            'is_holiday': is_holiday,
+        })
+    
+    for day in days:
+        day['css'] = 'planning-holiday' if day['is_holiday'] else 'planning-weekend' if day['is_weekend'] else ''
+    
+    # Cells are fully prepared here so the template is a single plain loop
+    rows = []
+    for position in positions:
+        shifts = roster[position.id]
+        cells = []
+        for day in days:
+            shift = shifts.get(day['date'])
+            if shift is None:
+                cells.append({'day': day, 'shift': None, 'css': day['css'], 'style': '', 'title': '', 'label': ''})
+                continue
+            schedule_type = schedule_types[shift.schedule_type_id]
+            agent = agents.get(shift.agent_id)
+            title = f"{schedule_type.designation} {shift.start:%H:%M}-{shift.end:%H:%M} - "
+            title += f"{agent.matricule} {agent.first_name} {agent.last_name}" if agent else "Poste vacant"
+            if shift.is_holiday:
+                title += " (jour férié)"
+            cells.append({
+                'day': day,
+                'shift': shift,
+                'css': 'font-semibold text-white' if agent else 'font-semibold text-white planning-vacant',
+                'style': f'background-color: {schedule_type.color}',
+                'title': title,
+                'label': schedule_type.short_designation,
+            })
+        rows.append({'position': position, 'cells': cells})
+    
+    return render(request, 'core/teams/team_planning.html', {
+        'team': team,
+        'days': days,
+        'rows': rows,
+        'month': first_day,
+        'previous_month': previous_month,
+        'next_month': next_month,
+        'is_current_month': first_day == today.replace(day=1),
+    })
+
+
 @login_required
 @admin_required
 @require_http_methods(["GET", "POST"])
@@ -4000,12 +3404,32 @@ def team_position_delete(request, position_id):
 # Team API Endpoints
 # =============================================================================
 
+# Longest span accepted by the ?from=/?to= endpoints (ten years)
+MAX_DATE_RANGE_DAYS = 3660
+
+
+def parse_date_range(request, default=None):
+    """Read the ?from= and ?to= ISO dates of a request, falling back to `default` when both are missing"""
+    start, end = request.GET.get('from'), request.GET.get('to')
+    if not start and not end and default:
+        return default
+    try:
+        start, end = datetime.date.fromisoformat(start or ''), datetime.date.fromisoformat(end or '')
+    except ValueError:
+        raise ValueError('Les paramètres "from" et "to" doivent être des dates au format AAAA-MM-JJ.')
+    if start > end:
+        raise ValueError('La date "from" doit être antérieure ou égale à la date "to".')
+    if (end - start).days >= MAX_DATE_RANGE_DAYS:
+        raise ValueError(f'La période demandée ne peut pas dépasser {MAX_DATE_RANGE_DAYS} jours.')
+    return start, end
+
+
 @login_required
 @viewer_required
 def api_team_positions(request, team_id):
     """API endpoint to get positions for a team"""
     team = get_object_or_404(Team, id=team_id)
-    positions = TeamPosition.objects.filter(team=team).select_related('function')
+    positions = TeamPosition.objects.filter(team=team).select_related('function').with_assignments_as_of()
     
     positions_data = []
     for position in positions:
@@ -4040,6 +3464,231 @@ def api_team_positions(request, team_id):
     return JsonResponse({'positions': positions_data})
 
 
+@login_required
+@viewer_required
+def api_agent_calendar(request, agent_id):
+    """API endpoint streaming every shift worked by an agent between ?from= and ?to= (ISO dates)"""
+    from django.http import StreamingHttpResponse
+    from .planned_shifts import iter_planned
+    
+    agent = get_object_or_404(Agent, id=agent_id)
+    try:
+        start, end = parse_date_range(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    positions = TeamPosition.objects.filter(
+        agent_assignments__agent=agent,
+        agent_assignments__start_date__lte=end,
+        agent_assignments__end_date__gte=start,
+    ).distinct()
+    position_labels = {
+        position.id: {
+            'id': position.id,
+            'team': position.team.designation,
+            'function': position.function.designation,
+        }
+        for position in positions.select_related('team', 'function')
+    }
+    schedule_types = {
+        schedule_type['id']: schedule_type
+        for schedule_type in ScheduleType.objects.values('id', 'designation', 'short_designation', 'color')
+    }
+    shifts = iter_planned(TeamPosition.objects.filter(id__in=position_labels), start, end, agent_id=agent.id)
+    
+    def stream(batch_size=200):
+        yield '['
+        batch = []
+        separator = ''
+        for shift in shifts:
+            batch.append(json.dumps({
+                'date': shift.date.isoformat(),
+                'start': shift.start.isoformat(),
+                'end': shift.end.isoformat(),
+                'is_holiday': shift.is_holiday,
+                'position': position_labels[shift.position_id],
+                'schedule_type': schedule_types[shift.schedule_type_id],
+                'daily_rotation_plan_id': shift.daily_rotation_plan_id,
+            }, ensure_ascii=False))
+            if len(batch) == batch_size:
+                yield separator + ','.join(batch)
+                separator = ','
+                batch = []
+        if batch:
+            yield separator + ','.join(batch)
+        yield ']'
+    
+    return StreamingHttpResponse(stream(), content_type='application/json; charset=utf-8')
+
+
+# =============================================================================
+# Report Views
+# =============================================================================
+
+def current_month_range():
+    """First and last day of the current month"""
+    import calendar
+    today = timezone.localdate()
+    return today.replace(day=1), today.replace(day=calendar.monthrange(today.year, today.month)[1])
+
+
+@login_required
+@admin_required
+def hours_report(request):
+    """Worked hours per agent and month over a date range, optionally for one team"""
+    from .hours import worked_hours
+    
+    try:
+        start, end = parse_date_range(request, default=current_month_range())
+    except ValueError as e:
+        messages.error(request, str(e))
+        start, end = current_month_range()
+    
+    team_filter = request.GET.get('team', '')
+    positions = TeamPosition.objects.filter(team_id=team_filter) if team_filter.isdigit() else None
+    report = worked_hours(start, end, positions=positions)
+    
+    agents = Agent.objects.filter(id__in=report).order_by('last_name', 'first_name')
+    months = sorted({month for hours in report.values() for month in hours['months']})
+    rows = [
+        {
+            'agent': agent,
+            'months': [report[agent.id]['months'].get(month, 0) for month in months],
+            'total': report[agent.id]['total'],
+        }
+        for agent in agents
+    ]
+    
+    return render(request, 'core/reports/hours_report.html', {
+        'rows': rows,
+        'months': months,
+        'start': start,
+        'end': end,
+        'teams': Team.objects.order_by('designation'),
+        'team_filter': team_filter,
+        'grand_total': round(sum(row['total'] for row in rows), 2),
+    })
+
+
+@login_required
+@admin_required
+def coverage_report(request):
+    """Covered positions per day and schedule type, with the list of uncovered shifts"""
+    from .coverage import coverage
+    
+    try:
+        start, end = parse_date_range(request, default=current_month_range())
+    except ValueError as e:
+        messages.error(request, str(e))
+        start, end = current_month_range()
+    
+    department_filter = request.GET.get('department', '')
+    positions = TeamPosition.objects.all()
+    if department_filter.isdigit():
+        positions = positions.filter(team__department_id=department_filter)
+    days, gaps = coverage(start, end, positions=positions)
+    
+    schedule_types = list(ScheduleType.objects.filter(
+        id__in={schedule_type_id for counts in days.values() for schedule_type_id in counts}
+    ).order_by('designation'))
+    rows = []
+    for offset in range((end - start).days + 1):
+        day = start + datetime.timedelta(days=offset)
+        counts = days.get(day, {})
+        cells = [counts.get(schedule_type.id) for schedule_type in schedule_types]
+        rows.append({
+            'date': day,
+            'cells': cells,
+            'has_gap': any(cell and cell['covered'] < cell['planned'] for cell in cells),
+        })
+    
+    positions_by_id = TeamPosition.objects.select_related('team', 'function').in_bulk({gap.position_id for gap in gaps})
+    schedule_types_by_id = {schedule_type.id: schedule_type for schedule_type in schedule_types}
+    gap_rows = [
+        {
+            'date': gap.date,
+            'position': positions_by_id[gap.position_id],
+            'schedule_type': schedule_types_by_id[gap.schedule_type_id],
+            'start': gap.start,
+            'end': gap.end,
+        }
+        for gap in gaps
+    ]
+    
+    return render(request, 'core/reports/coverage_report.html', {
+        'rows': rows,
+        'schedule_types': schedule_types,
+        'gaps': gap_rows,
+        'start': start,
+        'end': end,
+        'departments': Department.objects.all().order_by('order', 'name'),
+        'department_filter': department_filter,
+    })
+
+
+@login_required
+@admin_required
+def conflict_report(request):
+    """Agents assigned to several positions over overlapping dates"""
+    from .conflicts import find_conflicts
+    
+    conflicts = find_conflicts()
+    assignments = TeamPositionAgentAssignment.objects.select_related(
+        'agent', 'team_position__team', 'team_position__function'
+    ).in_bulk({pk for conflict in conflicts for pk in (conflict.first_id, conflict.second_id)})
+    rows = [
+        {
+            'agent': assignments[conflict.first_id].agent,
+            'first': assignments[conflict.first_id],
+            'second': assignments[conflict.second_id],
+            'start': conflict.start,
+            'end': conflict.end,
+        }
+        for conflict in conflicts
+    ]
+    
+    return render(request, 'core/reports/conflict_report.html', {'rows': rows})
+
+
+@login_required
+@admin_required
+def api_hours(request):
+    """API endpoint returning worked hours per agent between ?from= and ?to= grouped by ?group=day|week|month"""
+    try:
+        start, end = parse_date_range(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    group = request.GET.get('group', 'month')
+    if group not in ('day', 'week', 'month'):
+        return JsonResponse({'error': 'Le paramètre "group" doit valoir day, week ou month.'}, status=400)
+    
+    from .hours import worked_hours
+    
+    team_id = request.GET.get('team', '')
+    agent_id = request.GET.get('agent', '')
+    positions = TeamPosition.objects.filter(team_id=team_id) if team_id.isdigit() else None
+    report = worked_hours(start, end, positions=positions, agent_ids=[int(agent_id)] if agent_id.isdigit() else None)
+    
+    agents = Agent.objects.filter(id__in=report).order_by('last_name', 'first_name')
+    return JsonResponse({
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'group': group,
+        'agents': [
+            {
+                'id': agent.id,
+                'matricule': agent.matricule,
+                'first_name': agent.first_name,
+                'last_name': agent.last_name,
+                'total': report[agent.id]['total'],
+                'hours': {str(key): hours for key, hours in report[agent.id][f'{group}s'].items()},
+            }
+            for agent in agents
+        ],
+    })
+
+
 # Team Export/Import Functions
 
 @user_passes_test(is_superuser)
@@ -4081,65 +3730,10 @@ def team_export(request):
 @transaction.atomic
 def team_import(request):
     """Import teams from JSON file - overwrites existing database - only accessible to superusers"""
-    if request.method == 'POST':
-        import_file = request.FILES.get('import_file')
-        
-        if not import_file:
-            messages.error(request, 'Aucun fichier sélectionné.')
-            return redirect('admin:core_team_changelist')
-        
-        # Validate file type
-        if not import_file.name.endswith('.json'):
-            messages.error(request, 'Le fichier doit être au format JSON.')
-            return redirect('admin:core_team_changelist')
-        
-        try:
-            # Parse JSON content
-            file_content = import_file.read().decode('utf-8')
-            teams_data = json.loads(file_content)
-            
-            if not isinstance(teams_data, list):
-                messages.error(request, 'Le fichier JSON doit contenir une liste d\'équipes.')
-                return redirect('admin:core_team_changelist')
-            
-            # Count existing records
-            existing_count = Team.objects.count()
-            
-            # Delete existing teams
-            Team.objects.all().delete()
-            
-            # Import new teams
-            imported_count = 0
-            for team_data in teams_data:
-                try:
-                    # Get or create department
-                    department_data = team_data.get('department', {})
-                    department, created = Department.objects.get_or_create(
-                        name=department_data.get('name'),
-                        defaults={'order': department_data.get('order', 10)}
-                    )
-                    
-                    # Create team
-                    Team.objects.create(
-                        designation=team_data.get('designation'),
-                        description=team_data.get('description', ''),
-                        color=team_data.get('color'),
-                        department=department
-                    )
-                    imported_count += 1
-                    
-                except Exception as e:
-                    messages.warning(request, f'Erreur lors de l\'importation de l\'équipe "{team_data.get("designation", "Inconnue")}" : {str(e)}')
-                    continue
-            
-            messages.success(request, f'Importation terminée : {imported_count} équipe(s) importée(s), {existing_count} équipe(s) supprimée(s).')
-            
-        except json.JSONDecodeError:
-            messages.error(request, 'Erreur lors de la lecture du fichier JSON. Vérifiez le format du fichier.')
-        except Exception as e:
-            messages.error(request, f'Erreur lors de l\'importation : {str(e)}')
-    
-    return redirect('admin:core_team_changelist')
+    return _model_import(
+        request, 'teams', 'Équipe', 'admin:core_team_changelist', 'équipes',
+        'Importation terminée : {created} équipe(s) importée(s), {deleted} équipe(s) supprimée(s).',
+    )
 
 
 # TeamPosition Export/Import Functions
@@ -4200,79 +3794,10 @@ def teamposition_export(request):
 @transaction.atomic
 def teamposition_import(request):
     """Import team positions from JSON file - overwrites existing database - only accessible to superusers"""
-    if request.method == 'POST':
-        import_file = request.FILES.get('import_file')
-        
-        if not import_file:
-            messages.error(request, 'Aucun fichier sélectionné.')
-            return redirect('admin:core_teamposition_changelist')
-        
-        # Validate file type
-        if not import_file.name.endswith('.json'):
-            messages.error(request, 'Le fichier doit être au format JSON.')
-            return redirect('admin:core_teamposition_changelist')
-        
-        try:
-            # Parse JSON content
-            file_content = import_file.read().decode('utf-8')
-            positions_data = json.loads(file_content)
-            
-            if not isinstance(positions_data, list):
-                messages.error(request, 'Le fichier JSON doit contenir une liste de postes d\'équipe.')
-                return redirect('admin:core_teamposition_changelist')
-            
-            # Count existing records
-            existing_count = TeamPosition.objects.count()
-            
-            # Delete existing positions
-            TeamPosition.objects.all().delete()
-            
-            # Import new positions
-            imported_count = 0
-            for position_data in positions_data:
-                try:
-                    # Get team
-                    team_data = position_data.get('team', {})
-                    team = Team.objects.filter(
-                        designation=team_data.get('designation'),
-                        department__name=team_data.get('department_name')
-                    ).first()
-                    
-                    if not team:
-                        messages.warning(request, f'Équipe "{team_data.get("designation")}" non trouvée, position ignorée.')
-                        continue
-                    
-                    # Get function
-                    function_data = position_data.get('function', {})
-                    function = Function.objects.filter(
-                        designation=function_data.get('designation')
-                    ).first()
-                    
-                    if not function:
-                        messages.warning(request, f'Fonction "{function_data.get("designation")}" non trouvée, position ignorée.')
-                        continue
-                    
-                    # Create position (affectations se gèrent séparément)
-                    TeamPosition.objects.create(
-                        team=team,
-                        function=function,
-                        considers_holidays=position_data.get('considers_holidays', True),
-                        order=position_data.get('order', 1),
-                    )
-                    imported_count += 1
-                    
-                except Exception as e:
-                    messages.warning(request, f'Erreur lors de l\'importation du poste : {str(e)}')
-                    continue
-            
-            messages.success(request, f'Importation terminée : {imported_count} poste(s) importé(s), {existing_count} poste(s) supprimé(s).')
-            
-        except json.JSONDecodeError:
-            messages.error(request, 'Erreur lors de la lecture du fichier JSON. Vérifiez le format du fichier.')
-        except Exception as e:
-            messages.error(request, f'Erreur lors de l\'importation : {str(e)}')
-    
-    return redirect('admin:core_teamposition_changelist')
+    return _model_import(
+        request, 'team_positions', 'Poste', 'admin:core_teamposition_changelist', "postes d'équipe",
+        'Importation terminée : {created} poste(s) importé(s), {deleted} poste(s) supprimé(s).',
+    )
 
 
 # PublicHoliday Export/Import Functions
@@ -4311,61 +3836,10 @@ def publicholiday_export(request):
 @transaction.atomic
 def publicholiday_import(request):
     """Import public holidays from JSON file - overwrites existing database - only accessible to superusers"""
-    if request.method == 'POST':
-        import_file = request.FILES.get('import_file')
-        
-        if not import_file:
-            messages.error(request, 'Aucun fichier sélectionné.')
-            return redirect('admin:core_publicholiday_changelist')
-        
-        # Validate file type
-        if not import_file.name.endswith('.json'):
-            messages.error(request, 'Le fichier doit être au format JSON.')
-            return redirect('admin:core_publicholiday_changelist')
-        
-        try:
-            # Parse JSON content
-            file_content = import_file.read().decode('utf-8')
-            holidays_data = json.loads(file_content)
-            
-            if not isinstance(holidays_data, list):
-                messages.error(request, 'Le fichier JSON doit contenir une liste de jours fériés.')
-                return redirect('admin:core_publicholiday_changelist')
-            
-            # Count existing records
-            existing_count = PublicHoliday.objects.count()
-            
-            # Delete existing holidays
-            PublicHoliday.objects.all().delete()
-            
-            # Import new holidays
-            imported_count = 0
-            for holiday_data in holidays_data:
-                try:
-                    # Parse date
-                    date = None
-                    if holiday_data.get('date'):
-                        date = datetime.fromisoformat(holiday_data['date']).date()
-                    
-                    # Create holiday
-                    PublicHoliday.objects.create(
-                        designation=holiday_data.get('designation'),
-                        date=date
-                    )
-                    imported_count += 1
-                    
-                except Exception as e:
-                    messages.warning(request, f'Erreur lors de l\'importation du jour férié "{holiday_data.get("designation", "Inconnu")}" : {str(e)}')
-                    continue
-            
-            messages.success(request, f'Importation terminée : {imported_count} jour(s) férié(s) importé(s), {existing_count} jour(s) férié(s) supprimé(s).')
-            
-        except json.JSONDecodeError:
-            messages.error(request, 'Erreur lors de la lecture du fichier JSON. Vérifiez le format du fichier.')
-        except Exception as e:
-            messages.error(request, f'Erreur lors de l\'importation : {str(e)}')
-    
-    return redirect('admin:core_publicholiday_changelist')
+    return _model_import(
+        request, 'public_holidays', 'Jour férié', 'admin:core_publicholiday_changelist', 'jours fériés',
+        'Importation terminée : {created} jour(s) férié(s) importé(s), {deleted} jour(s) férié(s) supprimé(s).',
+    )
 
 
 # Team Position Assignment Views
@@ -4391,16 +3865,19 @@ def update_agent_assignment(request, assignment_id):
         
         # Check for overlapping assignments
         overlapping = TeamPositionAgentAssignment.objects.filter(
-            team_position=assignment.team_position,
-            start_date__lte=end_date_obj,
-            end_date__gte=start_date_obj
-        ).exclude(id=assignment.id)
+            team_position_id=assignment.team_position_id
+        ).exclude(id=assignment.id).first_overlapping(start_date_obj, end_date_obj)
         
-        if overlapping.exists():
+        if overlapping:
             return JsonResponse({'success': False, 'error': 'Cette période chevauche avec une autre affectation'}, status=400)
         
         assignment.start_date = start_date_obj
         assignment.end_date = end_date_obj
+        
+        # Check the agent is not assigned to another position over the same dates
+        if settings.PREVENT_AGENT_DOUBLE_BOOKING and assignment.conflicting_assignments().exists():
+            return JsonResponse({'success': False, 'error': 'L\'agent est déjà affecté à un autre poste sur cette période'}, status=400)
+        
         assignment.save()
         
         return JsonResponse({
@@ -4437,12 +3914,10 @@ def update_rotation_assignment(request, assignment_id):
         
         # Check for overlapping assignments
         overlapping = TeamPositionRotationAssignment.objects.filter(
-            team_position=assignment.team_position,
-            start_date__lte=end_date_obj,
-            end_date__gte=start_date_obj
-        ).exclude(id=assignment.id)
+            team_position_id=assignment.team_position_id
+        ).exclude(id=assignment.id).first_overlapping(start_date_obj, end_date_obj)
         
-        if overlapping.exists():
+        if overlapping:
             return JsonResponse({'success': False, 'error': 'Cette période chevauche avec une autre affectation'}, status=400)
         
         assignment.start_date = start_date_obj
@@ -4511,22 +3986,26 @@ def create_agent_assignment(request, position_id):
         
         # Check for overlapping assignments for this position
         overlapping = TeamPositionAgentAssignment.objects.filter(
-            team_position=position,
-            start_date__lte=end_date_obj,
-            end_date__gte=start_date_obj
-        )
+            team_position_id=position.id
+        ).first_overlapping(start_date_obj, end_date_obj)
         
-        if overlapping.exists():
+        if overlapping:
             return JsonResponse({'success': False, 'error': 'Cette période chevauche avec une autre affectation d\'agent'}, status=400)
         
-        # Create the new assignment
-        assignment = TeamPositionAgentAssignment.objects.create(
+        assignment = TeamPositionAgentAssignment(
             team_position=position,
             agent=agent,
             start_date=start_date_obj,
             end_date=end_date_obj
         )
         
+        # Check the agent is not assigned to another position over the same dates
+        if settings.PREVENT_AGENT_DOUBLE_BOOKING and assignment.conflicting_assignments().exists():
+            return JsonResponse({'success': False, 'error': 'L\'agent est déjà affecté à un autre poste sur cette période'}, status=400)
+        
+        # Create the new assignment
+        assignment.save()
+        
         return JsonResponse({'success': True, 'assignment_id': assignment.id})
         
     except ValueError:
@@ -4559,12 +4038,10 @@ def create_rotation_assignment(request, position_id):
         
         # Check for overlapping assignments for this position
         overlapping = TeamPositionRotationAssignment.objects.filter(
-            team_position=position,
-            start_date__lte=end_date_obj,
-            end_date__gte=start_date_obj
-        )
+            team_position_id=position.id
+        ).first_overlapping(start_date_obj, end_date_obj)
         
-        if overlapping.exists():
+        if overlapping:
             return JsonResponse({'success': False, 'error': 'Cette période chevauche avec une autre affectation de roulement'}, status=400)
         
         # Create the new assignment
@@ -18,11 +18,12 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from core.views import global_export
+from core.views import global_export, global_import
 
 # Add custom admin URLs
 admin_patterns = [
     path('global-export/', global_export, name='admin_global_export'),
+    path('global-import/', global_import, name='admin_global_import'),
 ]
 
 urlpatterns = [
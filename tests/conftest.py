@@ -0,0 +1,65 @@
+import pytest
+from datetime import date, time
+from django.core.cache import cache
+from core import planned_shifts
+from core.models import (Agent, Department, Function, ScheduleType, DailyRotationPlan, RotationPeriod,
+                         ShiftSchedule, ShiftSchedulePeriod, ShiftScheduleWeek, ShiftScheduleDailyPlan,
+                         Team, TeamPosition, TeamPositionAgentAssignment, TeamPositionRotationAssignment)
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Process-level caches outlive the per-test transaction rollback"""
+    cache.clear()
+    yield
+
+
+@pytest.fixture
+def rotation_setup():
+    """Two-week cycle: week 1 Monday day shift, week 2 Monday night shift"""
+    day_type = ScheduleType.objects.create(designation="Matin", short_designation="MAT", color="#FF0000")
+    night_type = ScheduleType.objects.create(designation="Nuit", short_designation="NUI", color="#0000FF")
+    day_plan = DailyRotationPlan.objects.create(designation="Jour", schedule_type=day_type)
+    night_plan = DailyRotationPlan.objects.create(designation="Nuit", schedule_type=night_type)
+    RotationPeriod.objects.create(daily_rotation_plan=day_plan, start_date=date(2025, 1, 1),
+                                  end_date=date(2025, 12, 31), start_time=time(8, 0), end_time=time(16, 0))
+    RotationPeriod.objects.create(daily_rotation_plan=night_plan, start_date=date(2025, 1, 1),
+                                  end_date=date(2025, 12, 31), start_time=time(22, 0), end_time=time(6, 0))
+
+    schedule = ShiftSchedule.objects.create(name="Roulement 2x8")
+    # 2025-01-06 is a Monday
+    period = ShiftSchedulePeriod.objects.create(shift_schedule=schedule, start_date=date(2025, 1, 6),
+                                                end_date=date(2025, 12, 28))
+    week1 = ShiftScheduleWeek.objects.create(period=period, week_number=1)
+    week2 = ShiftScheduleWeek.objects.create(period=period, week_number=2)
+    ShiftScheduleDailyPlan.objects.create(week=week1, weekday=1, daily_rotation_plan=day_plan)
+    ShiftScheduleDailyPlan.objects.create(week=week2, weekday=1, daily_rotation_plan=night_plan)
+
+    department = Department.objects.create(name="Production", order=10)
+    team = Team.objects.create(designation="Équipe A", color="#00FF00", department=department)
+    function = Function.objects.create(designation="Opérateur")
+    position = TeamPosition.objects.create(team=team, function=function, order=1)
+    TeamPositionRotationAssignment.objects.create(team_position=position, rotation_plan=schedule,
+                                                  start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+    agent = Agent.objects.create(matricule="A1234", first_name="Jean", last_name="Dupont", grade="Agent")
+    TeamPositionAgentAssignment.objects.create(team_position=position, agent=agent,
+                                               start_date=date(2025, 1, 1), end_date=date(2025, 1, 31))
+    # The test transaction never commits: compute the materialized roster now
+    planned_shifts.flush()
+    return {
+        'team': team, 'position': position, 'agent': agent,
+        'day_type': day_type, 'night_type': night_type,
+    }
+
+
+@pytest.fixture
+def agent_client(client):
+    """Return a factory logging the test client in as a given agent"""
+    def login(agent, permission_level=None):
+        updates = {'password_changed': True}
+        if permission_level:
+            updates['permission_level'] = permission_level
+        Agent.objects.filter(pk=agent.pk).update(**updates)
+        client.force_login(agent.user)
+        return client
+    return login
@@ -0,0 +1,49 @@
+import json
+import pytest
+from datetime import date
+from django.urls import reverse
+from core.models import TeamPositionAgentAssignment
+
+
+@pytest.mark.django_db
+class TestAgentCalendarAPI:
+
+    def _get(self, client, agent, **params):
+        response = client.get(reverse('api_agent_calendar', args=[agent.pk]), params)
+        return response, (json.loads(b''.join(response.streaming_content)) if response.streaming else None)
+
+    def test_streams_agent_shifts(self, rotation_setup, agent_client):
+        """Test that only the days worked by the agent are returned, in date order"""
+        agent = rotation_setup['agent']
+        response, shifts = self._get(agent_client(agent), agent, **{'from': '2025-01-01', 'to': '2025-03-31'})
+        assert response.status_code == 200
+        assert [shift['date'] for shift in shifts] == ['2025-01-06', '2025-01-13', '2025-01-20', '2025-01-27']
+        assert shifts[1]['schedule_type']['short_designation'] == 'NUI'
+        assert shifts[0]['position']['team'] == 'Équipe A'
+
+    def test_query_count_does_not_depend_on_range(self, rotation_setup, agent_client, django_assert_max_num_queries,
+                                                  django_capture_on_commit_callbacks):
+        """Test that a multi-year range is served with a bounded number of queries"""
+        agent = rotation_setup['agent']
+        assignment = TeamPositionAgentAssignment.objects.get(agent=agent)
+        assignment.end_date = date(2025, 12, 31)
+        with django_capture_on_commit_callbacks(execute=True):
+            assignment.save()
+        client = agent_client(agent)
+        self._get(client, agent, **{'from': '2025-01-01', 'to': '2025-01-31'})
+        with django_assert_max_num_queries(12):
+            _, shifts = self._get(client, agent, **{'from': '2020-01-01', 'to': '2029-12-31'})
+        assert len(shifts) == 51
+
+    def test_invalid_dates(self, rotation_setup, agent_client):
+        """Test that missing or inverted dates are rejected"""
+        agent = rotation_setup['agent']
+        client = agent_client(agent)
+        assert self._get(client, agent, **{'from': '2025-01-01'})[0].status_code == 400
+        assert self._get(client, agent, **{'from': '2025-02-01', 'to': '2025-01-01'})[0].status_code == 400
+
+    def test_range_is_capped(self, rotation_setup, agent_client):
+        """Test that spans longer than the maximum are rejected"""
+        agent = rotation_setup['agent']
+        response = self._get(agent_client(agent), agent, **{'from': '0001-01-01', 'to': '9999-12-31'})[0]
+        assert response.status_code == 400
@@ -0,0 +1,142 @@
+import json
+from unittest import mock
+import pytest
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from core import imports, search
+from core.models import Agent, TeamPositionAgentAssignment
+
+
+def new_agents(count, start=0):
+    return [
+        Agent(matricule=f'B{index:04d}', first_name='Prénom', last_name=f'Nom {index}', grade='Agent')
+        for index in range(start, start + count)
+    ]
+
+
+@pytest.mark.django_db
+class TestAgentBulkProvision:
+
+    def test_constant_queries_and_single_hash(self, django_assert_num_queries):
+        """Test that provisioning costs the same queries and one password hash whatever the agent count"""
+        with django_assert_num_queries(5):
+            Agent.bulk_provision(new_agents(3))
+        with mock.patch('django.contrib.auth.hashers.make_password', wraps=lambda password: 'hash') as hasher, \
+                django_assert_num_queries(5):
+            Agent.bulk_provision(new_agents(40, start=3))
+        assert hasher.call_count == 1
+        agent = Agent.objects.select_related('user').get(matricule='B0000')
+        assert agent.user.username == 'B0000' and agent.user.check_password('azerty')
+        assert User.objects.count() == 43
+
+    def test_reuses_existing_accounts(self):
+        """Test that accounts given or named after a matricule are linked and renamed instead of recreated"""
+        admin = User.objects.create_superuser('admin', password='secret')
+        orphan = User.objects.create_user('B0001', password='secret')
+        agents = new_agents(2)
+        agents[0].permission_level = 'S'
+        Agent.bulk_provision(agents, accounts={'B0000': admin})
+        admin.refresh_from_db()
+        assert Agent.objects.get(matricule='B0000').user_id == admin.pk
+        assert (admin.first_name, admin.last_name) == ('Prénom', 'Nom 0')
+        assert Agent.objects.get(matricule='B0001').user_id == orphan.pk
+        assert User.objects.count() == 2
+
+
+@pytest.mark.django_db
+class TestAgentImport:
+
+    def test_import_replaces_agents(self, rotation_setup, agent_client):
+        """Test that the import replaces the agents, keeps the importing superuser and indexes the new agents"""
+        agent = rotation_setup['agent']
+        agent.user.username = 'admin'
+        agent.user.is_staff = agent.user.is_superuser = True
+        agent.user.save()
+        client = agent_client(agent)
+        data = [
+            {'matricule': 'A1234', 'first_name': 'Jean', 'last_name': 'Dupont', 'grade': 'Agent',
+             'permission_level': 'S'},
+            {'matricule': 'C0001', 'first_name': 'Marie', 'last_name': 'Curie', 'grade': 'Cadre',
+             'hire_date': '2020-01-01'},
+        ]
+        upload = SimpleUploadedFile('agents.json', json.dumps(data).encode())
+        response = client.post(reverse('admin:core_agent_import'),
+                               {'import_file': upload, 'confirm_overwrite': 'true', 'confirm_action': 'on'}, follow=True)
+
+        assert f'🔐 Tous les mots de passe ont été réinitialisés à "{Agent.DEFAULT_PASSWORD}".' in [
+            str(message) for message in response.context['messages']
+        ]
+        assert Agent.objects.count() == 2
+        assert Agent.objects.get(matricule='A1234').user_id == agent.user_id
+        assert Agent.objects.get(matricule='C0001').permission_level == 'V'
+        assert User.objects.count() == 2
+        assert [found.matricule for found in search.search(Agent.objects.all(), 'curie')] == ['C0001']
+
+    def test_invalid_file_deletes_nothing(self, rotation_setup, agent_client):
+        """Test that the replace mode validates every row before deleting the agents"""
+        agent = rotation_setup['agent']
+        agent.user.is_staff = agent.user.is_superuser = True
+        agent.user.save()
+        data = [
+            {'matricule': 'C0001', 'first_name': 'Marie', 'last_name': 'Curie', 'grade': 'Cadre'},
+            {'matricule': 'C0001', 'first_name': 'Doublon', 'last_name': 'Curie', 'grade': 'Cadre'},
+            {'matricule': 'C0002', 'first_name': 'Pierre', 'last_name': 'Curie'},
+        ]
+        upload = SimpleUploadedFile('agents.json', json.dumps(data).encode())
+        response = agent_client(agent).post(reverse('admin:core_agent_import'), {
+            'import_file': upload, 'confirm_overwrite': 'true', 'confirm_action': 'on',
+        })
+
+        assert [str(message) for message in get_messages(response.wsgi_request)] == [
+            'Erreurs de validation (2 erreurs trouvées):',
+            '  • Agent 2: "C0001" en double dans le fichier',
+            '  • Agent 3: champ "grade" manquant ou vide',
+        ]
+        assert list(Agent.objects.values_list('matricule', flat=True)) == [agent.matricule]
+        assert TeamPositionAgentAssignment.objects.get().agent_id == agent.pk
+
+    def test_sync_updates_agents_in_place(self, rotation_setup, agent_client):
+        """Test that syncing keeps the assignments of matching agents and manages the accounts of the others"""
+        agent = rotation_setup['agent']
+        agent.user.is_staff = agent.user.is_superuser = True
+        agent.user.save()
+        gone = Agent.objects.create(matricule='B0001', first_name='Paul', last_name='Martin', grade='Agent')
+        data = [
+            {'matricule': 'A1234', 'first_name': 'Jeanne', 'last_name': 'Dupont', 'grade': 'Agent',
+             'permission_level': 'S'},
+            {'matricule': 'C0001', 'first_name': 'Marie', 'last_name': 'Curie', 'grade': 'Cadre'},
+        ]
+        upload = SimpleUploadedFile('agents.json', json.dumps(data).encode())
+        response = agent_client(agent).post(reverse('admin:core_agent_import'), {
+            'import_file': upload, 'import_mode': 'sync', 'confirm_overwrite': 'true', 'confirm_action': 'on',
+        }, follow=True)
+
+        assert [str(message) for message in response.context['messages']] == [
+            'Synchronisation réussie (agents) : 1 ajout(s), 1 modification(s), 1 suppression(s), '
+            'les autres lignes sont inchangées.'
+        ]
+        assert TeamPositionAgentAssignment.objects.get().agent_id == agent.pk
+        agent.user.refresh_from_db()
+        assert agent.user.first_name == 'Jeanne' and agent.user.is_superuser
+        created = Agent.objects.select_related('user').get(matricule='C0001')
+        assert created.permission_level == 'V' and created.user.check_password('azerty')
+        assert not User.objects.filter(pk=gone.user_id).exists()
+
+    def test_invalid_choices_are_reported(self, rotation_setup):
+        """Test that unknown grades and permission levels are row errors and that nothing is written"""
+        data = [
+            {'matricule': 'C0001', 'first_name': 'Marie', 'last_name': 'Curie', 'grade': 'Chef'},
+            {'matricule': 'C0002', 'first_name': 'Pierre', 'last_name': 'Curie', 'grade': 'Cadre',
+             'permission_level': 'X'},
+            {'matricule': 'C0003', 'first_name': 'Irène', 'last_name': 'Curie', 'grade': 'Cadre'},
+        ]
+        for mode in (imports.replace, imports.sync):
+            with pytest.raises(imports.ImportValidationError) as error:
+                mode('agents', data, 'Agent')
+            assert error.value.errors == [
+                'Agent 1: champ "grade" invalide (valeurs possibles: Agent, Maitrise, Cadre)',
+                'Agent 2: champ "permission_level" invalide (valeurs possibles: V, E, A, S)',
+            ]
+        assert list(Agent.objects.values_list('matricule', flat=True)) == [rotation_setup['agent'].matricule]
@@ -0,0 +1,45 @@
+import pytest
+from django.urls import reverse
+from core.models import Agent
+
+
+@pytest.mark.django_db
+class TestAgentMiddleware:
+
+    def test_request_agent(self, client):
+        """Test that request.agent is the logged-in agent, and None for anonymous users"""
+        agent = Agent.objects.create(matricule="B2345", first_name="Marie", last_name="Durand", grade="Agent",
+                                     permission_level='A', password_changed=True)
+        response = client.get(reverse('login'))
+        assert response.wsgi_request.agent is None
+        client.force_login(agent.user)
+        response = client.get(reverse('agent_list'))
+        assert response.status_code == 200
+        assert response.wsgi_request.agent == agent
+        assert response.context['current_agent'] is response.wsgi_request.agent
+
+    def test_agent_resolved_once(self, client, django_assert_max_num_queries):
+        """Test that decorators, context processor and view share a single agent query"""
+        agent = Agent.objects.create(matricule="B2345", first_name="Marie", last_name="Durand", grade="Agent",
+                                     permission_level='A', password_changed=True)
+        client.force_login(agent.user)
+        with django_assert_max_num_queries(20) as queries:
+            client.get(reverse('shift_schedule_list'))
+        agent_queries = [query for query in queries.captured_queries if 'FROM "core_agent"' in query['sql']]
+        assert len(agent_queries) == 1
+
+    def test_changed_password_is_kept(self, client):
+        """Test that changing the password through request.agent keeps the new hash"""
+        agent = Agent.objects.create(matricule="B2345", first_name="Marie", last_name="Durand", grade="Agent",
+                                     permission_level='A')
+        client.force_login(agent.user)
+        response = client.post(reverse('change_password'), {
+            'old_password': Agent.DEFAULT_PASSWORD,
+            'new_password1': 'Nouveau-mot-2-passe',
+            'new_password2': 'Nouveau-mot-2-passe',
+        })
+        assert response.status_code == 302
+        agent.refresh_from_db()
+        assert agent.password_changed
+        client.logout()
+        assert client.login(username="B2345", password='Nouveau-mot-2-passe')
@@ -0,0 +1,80 @@
+import pytest
+from datetime import date
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+from core.conflicts import find_conflicts
+from core.models import TeamPosition, TeamPositionAgentAssignment, TeamPositionRotationAssignment
+
+
+@pytest.fixture
+def second_position(rotation_setup):
+    position = rotation_setup['position']
+    return TeamPosition.objects.create(team=position.team, function=position.function, order=2)
+
+
+@pytest.mark.django_db
+class TestConflictDetection:
+
+    def test_overlap_on_another_position(self, rotation_setup, second_position):
+        """Test that overlapping assignments of one agent on two positions are reported"""
+        agent = rotation_setup['agent']
+        other = TeamPositionAgentAssignment.objects.create(
+            team_position=second_position, agent=agent, start_date=date(2025, 1, 20), end_date=date(2025, 2, 15)
+        )
+        conflicts = find_conflicts()
+        assert len(conflicts) == 1
+        assert conflicts[0].agent_id == agent.pk
+        assert conflicts[0].second_id == other.pk
+        assert (conflicts[0].start, conflicts[0].end) == (date(2025, 1, 20), date(2025, 1, 31))
+
+    def test_consecutive_assignments_do_not_conflict(self, rotation_setup, second_position):
+        """Test that back-to-back assignments are not reported"""
+        TeamPositionAgentAssignment.objects.create(
+            team_position=second_position, agent=rotation_setup['agent'],
+            start_date=date(2025, 2, 1), end_date=date(2025, 2, 28)
+        )
+        assert find_conflicts() == []
+
+    def test_clean_checks_when_enabled(self, rotation_setup, second_position, settings):
+        """Test that the save-time check only applies when enabled"""
+        assignment = TeamPositionAgentAssignment(
+            team_position=second_position, agent=rotation_setup['agent'],
+            start_date=date(2025, 1, 15), end_date=date(2025, 1, 20)
+        )
+        assignment.clean()
+        settings.PREVENT_AGENT_DOUBLE_BOOKING = True
+        with pytest.raises(ValidationError):
+            assignment.clean()
+
+    def test_create_view_rejects_double_booking(self, rotation_setup, second_position, agent_client, settings):
+        """Test that the AJAX creation refuses a double booking when enabled"""
+        settings.PREVENT_AGENT_DOUBLE_BOOKING = True
+        client = agent_client(rotation_setup['agent'], permission_level='A')
+        response = client.post(reverse('create_agent_assignment', args=[second_position.pk]), {
+            'agent_id': rotation_setup['agent'].pk, 'start_date': '2025-01-15', 'end_date': '2025-01-20',
+        })
+        assert response.status_code == 400
+        assert not second_position.agent_assignments.exists()
+
+    def test_rotation_update_ignores_double_booking_check(self, rotation_setup, agent_client, settings):
+        """Test that updating a rotation assignment works with the check enabled, rotations having no agent"""
+        settings.PREVENT_AGENT_DOUBLE_BOOKING = True
+        assignment = TeamPositionRotationAssignment.objects.get()
+        client = agent_client(rotation_setup['agent'], permission_level='A')
+        response = client.post(reverse('update_rotation_assignment', args=[assignment.pk]), {
+            'start_date': '2025-01-01', 'end_date': '2025-06-30',
+        })
+        assert response.status_code == 200
+        assignment.refresh_from_db()
+        assert assignment.end_date == date(2025, 6, 30)
+
+    def test_report_view(self, rotation_setup, second_position, agent_client):
+        """Test that the report lists the conflicts"""
+        TeamPositionAgentAssignment.objects.create(
+            team_position=second_position, agent=rotation_setup['agent'],
+            start_date=date(2025, 1, 20), end_date=date(2025, 2, 15)
+        )
+        client = agent_client(rotation_setup['agent'], permission_level='A')
+        response = client.get(reverse('conflict_report'))
+        assert response.status_code == 200
+        assert len(response.context['rows']) == 1
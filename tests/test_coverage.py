@@ -0,0 +1,32 @@
+import pytest
+from datetime import date
+from django.urls import reverse
+from core.coverage import coverage
+from core.models import Agent
+
+
+@pytest.mark.django_db
+class TestCoverage:
+
+    def test_covered_and_gap_days(self, rotation_setup):
+        """Test that shifts without an assigned agent are reported as gaps"""
+        days, gaps = coverage(date(2025, 1, 27), date(2025, 2, 9))
+        day_type = rotation_setup['day_type'].pk
+        night_type = rotation_setup['night_type'].pk
+        assert days[date(2025, 1, 27)][night_type] == {'planned': 1, 'covered': 1}
+        assert days[date(2025, 2, 3)][day_type] == {'planned': 1, 'covered': 0}
+        assert [gap.date for gap in gaps] == [date(2025, 2, 3)]
+
+    def test_departed_agent_does_not_cover(self, rotation_setup):
+        """Test that an agent who left no longer covers the position"""
+        Agent.objects.filter(pk=rotation_setup['agent'].pk).update(departure_date=date(2025, 1, 10))
+        _, gaps = coverage(date(2025, 1, 1), date(2025, 1, 31))
+        assert [gap.date for gap in gaps] == [date(2025, 1, 13), date(2025, 1, 20), date(2025, 1, 27)]
+
+    def test_report_view(self, rotation_setup, agent_client):
+        """Test that the report renders a row per day and lists the gaps"""
+        client = agent_client(rotation_setup['agent'], permission_level='A')
+        response = client.get(reverse('coverage_report'), {'from': '2025-01-27', 'to': '2025-02-09'})
+        assert response.status_code == 200
+        assert len(response.context['rows']) == 14
+        assert len(response.context['gaps']) == 1
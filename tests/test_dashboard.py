@@ -0,0 +1,38 @@
+import pytest
+from django.urls import reverse
+from core import dashboard
+from core.models import Function
+
+
+@pytest.mark.django_db
+class TestDashboardStats:
+
+    def test_counts_in_one_query(self, rotation_setup, django_assert_num_queries):
+        """Test that every counter comes from a single query, then from the cache"""
+        with django_assert_num_queries(1):
+            counts = dashboard.stats()
+        assert counts['agents'] == 1
+        assert counts['teams'] == 1
+        assert counts['daily_rotation_plans'] == 2
+        assert counts['rotation_periods'] == 2
+        assert counts['shift_schedules'] == 1
+        with django_assert_num_queries(0):
+            assert dashboard.stats() == counts
+
+    def test_invalidated_on_create_and_delete(self, rotation_setup):
+        """Test that creating or deleting a counted row refreshes the counters, but editing does not"""
+        assert dashboard.stats()['functions'] == 1
+        function = Function.objects.create(designation="Chef d'équipe")
+        assert dashboard.stats()['functions'] == 2
+        function.designation = "Chef"
+        function.save()
+        assert dashboard.cache.get(dashboard.CACHE_KEY) is not None
+        function.delete()
+        assert dashboard.stats()['functions'] == 1
+
+    def test_api(self, rotation_setup, agent_client):
+        """Test that the endpoint returns the counters as JSON"""
+        client = agent_client(rotation_setup['agent'], permission_level='A')
+        data = client.get(reverse('api_dashboard_stats')).json()
+        assert data == dashboard.stats()
+        assert data['functions'] == 1
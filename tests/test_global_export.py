@@ -0,0 +1,47 @@
+import io
+import json
+import zipfile
+import pytest
+from django.urls import reverse
+from core import exports
+from core.models import Agent
+
+
+@pytest.mark.django_db
+class TestGlobalExport:
+
+    def test_json_chunks_match_json_dumps(self):
+        """Test that the incremental encoder produces the same text as json.dumps(indent=2)"""
+        for items in ([], [{'a': 1}], [{'a': 1, 'b': {'c': [1, 2]}}, {'é': None}]):
+            assert ''.join(exports.json_chunks(iter(items))) == json.dumps(items, indent=2, ensure_ascii=False)
+
+    def test_streamed_archive(self, rotation_setup, agent_client):
+        """Test that the export is streamed as a valid ZIP holding one JSON file per model"""
+        user = rotation_setup['agent'].user
+        user.is_superuser = True
+        user.save()
+        response = agent_client(rotation_setup['agent']).get(reverse('global_export'))
+        assert response.streaming
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        files = {name.split('_', 2)[2]: json.loads(archive.read(name)) for name in archive.namelist()}
+        assert len(files) == len(exports.EXPORTS)
+        assert files['agents.json'][0]['matricule'] == 'A1234'
+        assert files['agents.json'][0]['departure_date'] is None
+        assert files['rotation_periods.json'][0] == {
+            'daily_rotation_plan_designation': 'Jour', 'start_date': '2025-01-01', 'end_date': '2025-12-31',
+            'start_time': '08:00:00', 'end_time': '16:00:00',
+        }
+        assert files['shift_schedule_daily_plans.json'][1]['week_number'] == 2
+
+    def test_rows_read_in_chunks(self, rotation_setup, django_assert_num_queries):
+        """Test that rows are read lazily and exported entries are flushed while the archive is written"""
+        Agent.objects.bulk_create(
+            Agent(matricule=f'B{index:04d}', first_name='Agent', last_name=str(index), grade='Agent')
+            for index in range(50)
+        )
+        export = exports.EXPORTS[0]
+        with django_assert_num_queries(1):
+            assert sum(1 for _ in exports.rows(export, chunk_size=10)) == 51
+        stream = exports.global_export('test', chunk_size=10)
+        assert len(next(stream)) > 0
+        assert sum(1 for _ in stream) > len(exports.EXPORTS)
@@ -0,0 +1,108 @@
+import io
+import json
+import zipfile
+from datetime import date
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from core import dashboard, exports, imports, search
+from core.models import (Agent, Function, PlannedShift, PublicHoliday, RotationPeriod, TeamPosition,
+                         TeamPositionAgentAssignment, TeamPositionRotationAssignment)
+
+
+def export_archive(**replaced):
+    """The bytes of a global export, with the rows of some entries replaced"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(b''.join(exports.global_export('2025-01-01_120000')))) as source, \
+            zipfile.ZipFile(buffer, 'w') as target:
+        for name in source.namelist():
+            entry = name.split('_', 2)[2][:-len('.json')]
+            content = json.dumps(replaced[entry]) if entry in replaced else source.read(name)
+            target.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.mark.django_db
+class TestGlobalImport:
+
+    def test_round_trip(self, rotation_setup):
+        """Test that restoring an export rebuilds every model, the accounts, the roster and the search index"""
+        PublicHoliday.objects.create(designation="Noël", date=date(2025, 12, 25))
+        archive = export_archive()
+        Function.objects.create(designation="Temporaire")
+        assert dashboard.stats()['functions'] == 2
+
+        timings = imports.restore(archive)
+
+        assert Function.objects.count() == 1
+        assert dashboard.stats()['functions'] == 1
+        assert RotationPeriod.objects.filter(daily_rotation_plan__designation="Nuit").get().start_time.hour == 22
+        position = TeamPosition.objects.get()
+        assert position.team.department.name == "Production"
+        assert TeamPositionAgentAssignment.objects.get().agent.matricule == "A1234"
+        assert TeamPositionRotationAssignment.objects.get(team_position=position).rotation_plan.periods.get().weeks.count() == 2
+        agent = Agent.objects.get()
+        assert agent.user.username == "A1234" and agent.user.check_password('azerty')
+        assert User.objects.count() == 1
+        assert PlannedShift.objects.filter(team_position=position, date=date(2025, 1, 6)).exists()
+        assert list(search.search(Agent.objects.all(), "dupont")) == [agent]
+        assert {timing.name for timing in timings} >= {export.name for export in exports.EXPORTS}
+
+    def test_keeps_superuser_account(self, rotation_setup):
+        """Test that the account of a superuser agent survives the restore and is linked back"""
+        user = rotation_setup['agent'].user
+        user.is_superuser = True
+        user.save()
+        imports.restore(export_archive())
+        assert Agent.objects.get().user_id == user.pk
+
+    def test_invalid_rows_leave_database_untouched(self, rotation_setup):
+        """Test that every invalid row is reported and nothing is written"""
+        archive = export_archive(rotation_periods=[
+            {'daily_rotation_plan_designation': 'Inconnu', 'start_date': '2025-01-01', 'end_date': '2025-01-31',
+             'start_time': '08:00:00', 'end_time': '16:00:00'},
+            {'daily_rotation_plan_designation': 'Jour', 'start_date': '2025-02-31', 'end_date': '2025-03-01',
+             'start_time': '08:00:00', 'end_time': '16:00:00'},
+        ])
+        with pytest.raises(imports.ImportValidationError) as error:
+            imports.restore(archive)
+        assert len(error.value.errors) == 2
+        assert 'introuvable' in error.value.errors[0]
+        assert RotationPeriod.objects.count() == 2
+
+    def test_missing_entry(self, rotation_setup):
+        """Test that an archive without every entry is rejected"""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            archive.writestr('2025-01-01_120000_agents.json', '[]')
+        with pytest.raises(imports.ImportValidationError) as error:
+            imports.restore(buffer)
+        assert len(error.value.errors) == len(exports.EXPORTS) - len(imports.OPTIONAL_ENTRIES) - 1
+
+    def test_archive_without_optional_entries(self, rotation_setup):
+        """Test that an archive made before the team entries existed restores them empty"""
+        source = zipfile.ZipFile(export_archive())
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            for name in source.namelist():
+                if name.split('_', 2)[2][:-len('.json')] not in imports.OPTIONAL_ENTRIES:
+                    archive.writestr(name, source.read(name))
+        buffer.seek(0)
+        imports.restore(buffer)
+        assert RotationPeriod.objects.count() == 2
+        assert not TeamPosition.objects.exists()
+
+    def test_view(self, rotation_setup, agent_client):
+        """Test that the admin view restores the archive and reports the timings"""
+        user = rotation_setup['agent'].user
+        user.is_superuser = True
+        user.save()
+        client = agent_client(rotation_setup['agent'])
+        archive = export_archive()
+        archive.name = 'export.zip'
+        response = client.post(reverse('admin_global_import'), {'import_file': archive, 'confirm_action': 'on'},
+                               follow=True)
+        texts = [str(message) for message in response.context['messages']]
+        assert texts[0].startswith('Import global réussi')
+        assert any('team_positions : 1 lignes' in text for text in texts)
@@ -0,0 +1,35 @@
+import pytest
+from datetime import date
+from core import holidays
+from core.models import PublicHoliday
+
+
+@pytest.mark.django_db
+class TestHolidayBitmap:
+
+    def test_mask_spans_years(self):
+        """Test that the mask flags holidays across a year boundary"""
+        PublicHoliday.objects.create(designation="Noël", date=date(2024, 12, 25))
+        PublicHoliday.objects.create(designation="Jour de l'an", date=date(2025, 1, 1))
+        mask = holidays.holiday_mask(date(2024, 12, 24), date(2025, 1, 2))
+        assert len(mask) == 10
+        assert [index for index, flag in enumerate(mask) if flag] == [1, 8]
+
+    def test_bitmaps_are_cached(self, django_assert_num_queries):
+        """Test that a range is checked with one query, then none once cached"""
+        PublicHoliday.objects.create(designation="Fête du Travail", date=date(2025, 5, 1))
+        with django_assert_num_queries(1):
+            assert holidays.holiday_mask(date(2025, 5, 1), date(2025, 5, 2)) == [True, False]
+        with django_assert_num_queries(0):
+            assert sum(holidays.holiday_mask(date(2025, 1, 1), date(2025, 12, 31))) == 1
+
+    def test_edit_and_delete_invalidate(self):
+        """Test that moving or deleting a holiday updates the cached years"""
+        holiday = PublicHoliday.objects.create(designation="Pâques", date=date(2025, 4, 21))
+        assert holidays.holiday_mask(date(2025, 4, 21), date(2025, 4, 21)) == [True]
+        holiday.date = date(2026, 4, 6)
+        holiday.save()
+        assert holidays.holiday_mask(date(2025, 4, 21), date(2025, 4, 21)) == [False]
+        assert holidays.holiday_mask(date(2026, 4, 6), date(2026, 4, 6)) == [True]
+        holiday.delete()
+        assert holidays.holiday_mask(date(2026, 4, 6), date(2026, 4, 6)) == [False]
@@ -0,0 +1,51 @@
+import pytest
+from datetime import date
+from django.urls import reverse
+from core import hours
+from core.models import PublicHoliday
+
+
+@pytest.mark.django_db
+class TestWorkedHours:
+
+    def test_hours_per_day_week_and_month(self, rotation_setup):
+        """Test that day and night shifts both count 8 hours on the day they start"""
+        agent = rotation_setup['agent']
+        report = hours.worked_hours(date(2025, 1, 1), date(2025, 1, 31))
+        assert report[agent.pk]['total'] == 32
+        assert report[agent.pk]['days'][date(2025, 1, 13)] == 8
+        assert report[agent.pk]['weeks'] == {'2025-W02': 8, '2025-W03': 8, '2025-W04': 8, '2025-W05': 8}
+        assert report[agent.pk]['months'] == {'2025-01': 32}
+
+    def test_holidays_are_subtracted(self, rotation_setup, django_capture_on_commit_callbacks):
+        """Test that a holiday removes the hours of positions that consider holidays"""
+        with django_capture_on_commit_callbacks(execute=True):
+            PublicHoliday.objects.create(designation="Férié", date=date(2025, 1, 13))
+        report = hours.worked_hours(date(2025, 1, 1), date(2025, 1, 31))
+        assert report[rotation_setup['agent'].pk]['total'] == 24
+
+    def test_agent_filter(self, rotation_setup):
+        """Test that filtering on another agent returns nothing"""
+        assert hours.worked_hours(date(2025, 1, 1), date(2025, 1, 31), agent_ids=[0]) == {}
+
+
+@pytest.mark.django_db
+class TestHoursViews:
+
+    def test_api_groups_by_week(self, rotation_setup, agent_client):
+        """Test that the JSON API returns the requested grouping"""
+        agent = rotation_setup['agent']
+        client = agent_client(agent, permission_level='A')
+        response = client.get(reverse('api_hours'), {'from': '2025-01-01', 'to': '2025-01-31', 'group': 'week'})
+        assert response.status_code == 200
+        data = response.json()['agents'][0]
+        assert data['matricule'] == agent.matricule
+        assert data['hours']['2025-W03'] == 8
+
+    def test_report_view(self, rotation_setup, agent_client):
+        """Test that the report lists agents with monthly totals"""
+        client = agent_client(rotation_setup['agent'], permission_level='A')
+        response = client.get(reverse('hours_report'), {'from': '2025-01-01', 'to': '2025-02-28'})
+        assert response.status_code == 200
+        assert response.context['months'] == ['2025-01']
+        assert response.context['rows'][0]['total'] == 32
@@ -0,0 +1,191 @@
+import json
+from datetime import date, time
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from core import exports, imports, planned_shifts
+from core.models import (DailyRotationPlan, Department, PlannedShift, RotationPeriod, ShiftScheduleDailyPlan,
+                         ShiftSchedulePeriod, Team, TeamPosition, TeamPositionAgentAssignment)
+
+
+def rotation_periods(count):
+    return [
+        {'daily_rotation_plan_designation': 'Jour' if index % 2 else 'Nuit',
+         'start_date': date(2030 + index, 1, 1).isoformat(), 'end_date': date(2030 + index, 12, 31).isoformat(),
+         'start_time': '22:00:00', 'end_time': '06:00:00'}
+        for index in range(count)
+    ]
+
+
+def exported_rows(name):
+    """The rows of an entry of the global export, as read back from its JSON"""
+    export = next(export for export in exports.EXPORTS if export.name == name)
+    return json.loads(''.join(exports.json_chunks(exports.rows(export))))
+
+
+@pytest.mark.django_db
+class TestModelImports:
+
+    def test_query_count_independent_of_row_count(self, rotation_setup):
+        """Test that references are read once per model and rows inserted in bulk, whatever their number"""
+        query_counts = []
+        for count in (3, 60):
+            with CaptureQueriesContext(connection) as queries:
+                assert imports.replace('rotation_periods', rotation_periods(count), 'Période')[0] == count
+            query_counts.append(len(queries))
+        assert query_counts[0] == query_counts[1]
+        assert RotationPeriod.objects.filter(daily_rotation_plan__designation='Jour').count() == 30
+
+    def test_invalid_rows_are_all_reported(self, rotation_setup):
+        """Test that every invalid row is reported with its label and that nothing is written"""
+        rows = [
+            {'shift_schedule_name': 'Roulement 2x8', 'period_start_date': '2025-01-06',
+             'period_end_date': '2025-12-28', 'week_number': 3, 'weekday': 1, 'daily_rotation_plan_designation': 'Jour'},
+            {'shift_schedule_name': 'Roulement 2x8', 'period_start_date': '2025-01-06',
+             'period_end_date': '2025-12-28', 'week_number': 1, 'weekday': 8, 'daily_rotation_plan_designation': 'Jour'},
+            {'shift_schedule_name': 'Roulement 2x8', 'period_start_date': '2025-01-06',
+             'period_end_date': '2025-12-28', 'week_number': 2, 'weekday': 2, 'daily_rotation_plan_designation': 'Jour'},
+        ]
+        with pytest.raises(imports.ImportValidationError) as error:
+            imports.replace('shift_schedule_daily_plans', rows, 'Plan')
+        assert [message.split(':')[0] for message in error.value.errors] == ['Plan 1', 'Plan 2']
+        assert 'introuvable' in error.value.errors[0]
+        assert ShiftScheduleDailyPlan.objects.count() == 2
+
+    def test_overlapping_rows_are_rejected(self, rotation_setup):
+        """Test that rows overlapping a sibling are reported, so the single-row overlap probe stays valid"""
+        rows = exported_rows('rotation_periods') + [
+            {'daily_rotation_plan_designation': 'Jour', 'start_date': '2025-12-01', 'end_date': '2026-01-31',
+             'start_time': '08:00:00', 'end_time': '16:00:00'},
+        ]
+        for mode in (imports.replace, imports.sync):
+            with pytest.raises(imports.ImportValidationError) as error:
+                mode('rotation_periods', rows, 'Période')
+            assert error.value.errors == ['Période 3: chevauche la ligne 1 (2025-01-01 - 2025-12-31)']
+
+    def test_daily_plans_rebuild_cycle_matrix(self, rotation_setup):
+        """Test that bulk-created daily plans rebuild the stored cycle matrix of their period"""
+        period = ShiftSchedulePeriod.objects.get()
+        rows = [{'shift_schedule_name': 'Roulement 2x8', 'period_start_date': '2025-01-06',
+                 'period_end_date': '2025-12-28', 'week_number': 2, 'weekday': 3,
+                 'daily_rotation_plan_designation': 'Jour'}]
+        imports.replace('shift_schedule_daily_plans', rows, 'Plan')
+        period.refresh_from_db()
+        day_plan_id = DailyRotationPlan.objects.get(designation='Jour').pk
+        assert period.cycle_matrix == [[None] * 7, [None, None, day_plan_id, None, None, None, None]]
+
+    def test_team_view_reads_its_export(self, rotation_setup, agent_client):
+        """Test that the team and position imports read the nested format of their per-model exports"""
+        user = rotation_setup['agent'].user
+        user.is_staff = user.is_superuser = True
+        user.save()
+        client = agent_client(rotation_setup['agent'])
+        # Importing the teams deletes their positions: export both first
+        models = ('team', 'teamposition')
+        exported = {model: b''.join(client.get(reverse(f'admin:core_{model}_export'))) for model in models}
+        for model in models:
+            upload = SimpleUploadedFile(f'{model}.json', exported[model])
+            response = client.post(reverse(f'admin:core_{model}_import'),
+                                   {'import_file': upload, 'confirm_action': 'on'}, follow=True)
+            texts = [str(message) for message in response.context['messages']]
+            assert texts == [texts[0]] and texts[0].startswith('Importation terminée : 1 ')
+        position = TeamPosition.objects.select_related('team__department', 'function').get()
+        assert (position.team.department.name, position.function.designation) == ('Production', 'Opérateur')
+        assert Team.objects.get().designation == 'Équipe A'
+
+    def test_import_forms_render(self, rotation_setup, agent_client):
+        """Test that every import form offers the sync mode, the replace warning and confirmation hidden until chosen"""
+        user = rotation_setup['agent'].user
+        user.is_staff = user.is_superuser = True
+        user.save()
+        client = agent_client(rotation_setup['agent'])
+        for model in ('agent', 'department', 'function', 'scheduletype', 'dailyrotationplan', 'rotationperiod',
+                      'shiftschedule', 'shiftscheduleperiod', 'shiftscheduleweek', 'shiftscheduledailyplan',
+                      'team', 'teamposition', 'publicholiday'):
+            response = client.get(reverse(f'admin:core_{model}_import'))
+            assert response.status_code == 200
+            assert b'name="import_mode" id="import_mode_sync" value="sync" checked' in response.content
+            assert b'<input type="submit" value="Synchroniser"' in response.content
+            assert b'<div class="replace-only" hidden>' in response.content
+            assert b'<div class="form-row replace-only" hidden>' in response.content
+
+    def test_replace_requires_confirmation(self, rotation_setup, agent_client):
+        """Test that the replace mode deletes nothing without the confirmation checkbox"""
+        user = rotation_setup['agent'].user
+        user.is_staff = user.is_superuser = True
+        user.save()
+        client = agent_client(rotation_setup['agent'])
+        upload = SimpleUploadedFile('departments.json', b'[]')
+        response = client.post(reverse('admin:core_department_import'), {'import_file': upload}, follow=True)
+        assert [str(message) for message in response.context['messages']] == [
+            'Confirmation requise pour remplacer la base de données.'
+        ]
+        assert Department.objects.exists()
+
+
+@pytest.mark.django_db
+class TestSyncImports:
+
+    def test_unchanged_import_writes_nothing(self, rotation_setup):
+        """Test that syncing the exported rows back writes nothing and keeps the dependent rows"""
+        rows = exported_rows('team_positions')
+        with CaptureQueriesContext(connection) as queries:
+            assert imports.sync('team_positions', rows, 'Poste') == (0, 0, 0)
+        assert all(query['sql'].startswith('SELECT') for query in queries.captured_queries)
+        assert TeamPosition.objects.get().pk == rotation_setup['position'].pk
+        assert TeamPositionAgentAssignment.objects.count() == 1
+
+    def test_changes_are_applied(self, rotation_setup):
+        """Test that new, changed and missing rows are created, updated in place and deleted"""
+        rows = exported_rows('rotation_periods')
+        day_period = RotationPeriod.objects.get(daily_rotation_plan__designation='Jour')
+        rows[0]['end_time'] = '17:00:00'
+        rows[1] = {'daily_rotation_plan_designation': 'Nuit', 'start_date': '2026-01-01', 'end_date': '2026-12-31',
+                   'start_time': '21:00:00', 'end_time': '05:00:00'}
+        assert imports.sync('rotation_periods', rows, 'Période') == (1, 1, 1)
+        day_period.refresh_from_db()
+        assert day_period.end_time == time(17, 0)
+        assert list(RotationPeriod.objects.filter(daily_rotation_plan__designation='Nuit')
+                    .values_list('start_date', flat=True)) == [date(2026, 1, 1)]
+
+    def test_deleted_assignment_refreshes_roster(self, rotation_setup, django_capture_on_commit_callbacks):
+        """Test that a row missing from the file is deleted with its signals"""
+        planned_shifts.rebuild()
+        assert PlannedShift.objects.filter(agent__isnull=False).exists()
+        with django_capture_on_commit_callbacks(execute=True):
+            imports.sync('team_position_agent_assignments', [], 'Affectation')
+        assert not TeamPositionAgentAssignment.objects.exists()
+        assert not PlannedShift.objects.filter(agent__isnull=False).exists()
+
+    def test_repeated_key_is_rejected(self, rotation_setup):
+        """Test that two rows with the same natural key are reported"""
+        rows = exported_rows('shift_schedule_weeks')
+        with pytest.raises(imports.ImportValidationError) as error:
+            imports.sync('shift_schedule_weeks', rows + rows[:1], 'Semaine')
+        assert error.value.errors == ['Semaine 3: "Roulement 2x8 / 2025-01-06 / 1" en double dans le fichier']
+
+    def test_period_end_date_is_updated_in_place(self, rotation_setup):
+        """Test that a period is matched on its start date, so a new end date keeps its weeks"""
+        rows = exported_rows('shift_schedule_periods')
+        rows[0]['end_date'] = '2026-06-28'
+        assert imports.sync('shift_schedule_periods', rows, 'Période') == (0, 1, 0)
+        period = ShiftSchedulePeriod.objects.get()
+        assert period.end_date == date(2026, 6, 28)
+        assert period.weeks.count() == 2
+
+    def test_view_sync_mode(self, rotation_setup, agent_client):
+        """Test that the import view syncs when asked to and reports the changes"""
+        user = rotation_setup['agent'].user
+        user.is_staff = user.is_superuser = True
+        user.save()
+        rows = exported_rows('departments') + [{'name': 'Maintenance', 'order': 20}]
+        upload = SimpleUploadedFile('departments.json', json.dumps(rows).encode())
+        response = agent_client(rotation_setup['agent']).post(
+            reverse('admin:core_department_import'), {'import_file': upload, 'import_mode': 'sync'}, follow=True
+        )
+        texts = [str(message) for message in response.context['messages']]
+        assert texts == ['Synchronisation réussie (départements) : 1 ajout(s), 0 modification(s), 0 suppression(s), '
+                         'les autres lignes sont inchangées.']
+        assert Team.objects.get().department.name == 'Production'
@@ -0,0 +1,79 @@
+import pytest
+from datetime import date, time, timedelta
+from django.core.exceptions import ValidationError
+from django.db import connection
+from core.models import (
+    DailyRotationPlan, RotationPeriod, ScheduleType, ShiftSchedulePeriod,
+    TeamPositionAgentAssignment, TeamPositionRotationAssignment,
+)
+
+
+@pytest.mark.django_db
+class TestOverlapChecks:
+
+    @pytest.fixture
+    def plan(self):
+        """A plan with one-day periods every other day from 2000-01-01"""
+        schedule_type = ScheduleType.objects.create(designation="Jour", short_designation="JOU", color="#3b82f6")
+        plan = DailyRotationPlan.objects.create(designation="Historique", schedule_type=schedule_type)
+        RotationPeriod.objects.bulk_create(
+            RotationPeriod(daily_rotation_plan=plan, start_date=date(2000, 1, 1) + timedelta(days=2 * index),
+                           end_date=date(2000, 1, 1) + timedelta(days=2 * index),
+                           start_time=time(8, 0), end_time=time(16, 0))
+            for index in range(500)
+        )
+        return plan
+
+    def period(self, plan, start, end):
+        return RotationPeriod(daily_rotation_plan=plan, start_date=start, end_date=end,
+                              start_time=time(8, 0), end_time=time(16, 0))
+
+    def test_first_overlapping(self, plan):
+        """Test that the probe finds an overlap anywhere in the history and nothing in the gaps"""
+        periods = RotationPeriod.objects.filter(daily_rotation_plan=plan)
+        assert periods.first_overlapping(date(2000, 1, 2), date(2000, 1, 2)) is None
+        assert periods.first_overlapping(date(1999, 1, 1), date(1999, 12, 31)) is None
+        assert periods.first_overlapping(date(2000, 1, 2), date(2000, 1, 3)).start_date == date(2000, 1, 3)
+        # A long range ending in a gap still hits the last period before its end
+        assert periods.first_overlapping(date(1999, 1, 1), date(2000, 3, 2)).start_date == date(2000, 3, 1)
+
+    def test_clean_uses_one_indexed_query(self, plan, django_assert_num_queries):
+        """Test that validating a period costs one query, served by the range index"""
+        middle = date(2000, 1, 1) + timedelta(days=501)
+        with django_assert_num_queries(1):
+            self.period(plan, middle, middle).clean()
+        with pytest.raises(ValidationError):
+            self.period(plan, middle, middle + timedelta(days=1)).clean()
+
+        sql, params = RotationPeriod.objects.filter(
+            daily_rotation_plan_id=plan.pk, start_date__lte=middle
+        ).order_by('-start_date')[:1].query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            assert 'rotperiod_plan_range_idx' in ' '.join(row[-1] for row in cursor.fetchall())
+
+    def test_clean_allows_editing(self, plan):
+        """Test that a period does not conflict with itself when its dates change"""
+        existing = plan.periods.order_by('-start_date').first()
+        existing.end_date = existing.end_date + timedelta(days=30)
+        existing.clean()
+
+    def test_schedule_period_and_assignments(self, rotation_setup):
+        """Test that shift schedule periods and position assignments reject overlaps"""
+        period = ShiftSchedulePeriod.objects.get()
+        with pytest.raises(ValidationError):
+            ShiftSchedulePeriod(shift_schedule=period.shift_schedule, start_date=date(2025, 12, 1),
+                                end_date=date(2026, 1, 31)).clean()
+        ShiftSchedulePeriod(shift_schedule=period.shift_schedule, start_date=date(2025, 12, 29),
+                            end_date=date(2026, 1, 31)).clean()
+
+        assignment = TeamPositionAgentAssignment.objects.get()
+        with pytest.raises(ValidationError) as error:
+            TeamPositionAgentAssignment(team_position=assignment.team_position, agent=assignment.agent,
+                                        start_date=date(2025, 1, 15), end_date=date(2025, 2, 15)).clean()
+        assert 'A1234' in str(error.value)
+
+        rotation = TeamPositionRotationAssignment.objects.get()
+        with pytest.raises(ValidationError):
+            TeamPositionRotationAssignment(team_position=rotation.team_position, rotation_plan=rotation.rotation_plan,
+                                           start_date=date(2025, 6, 1), end_date=date(2026, 6, 1)).clean()
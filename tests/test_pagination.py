@@ -0,0 +1,67 @@
+import pytest
+from datetime import date
+from django.http import QueryDict
+from django.urls import reverse
+from core.models import Agent, Function
+from core.pagination import keyset_paginate
+
+
+def walk(queryset, ordering, page_size):
+    """Follow the cursors from the first page to the last one"""
+    params = QueryDict(mutable=True)
+    rows = []
+    while True:
+        page = keyset_paginate(queryset, ordering, params, page_size=page_size)
+        rows.extend(page)
+        if not page.has_next:
+            return rows
+        params = QueryDict(page.next_query)
+
+
+@pytest.mark.django_db
+class TestKeysetPaginate:
+
+    @pytest.fixture
+    def agents(self):
+        departures = [None, date(2030, 1, 1), date(2030, 1, 1), None, date(2031, 6, 1), date(2029, 3, 1), None]
+        return [
+            Agent.objects.create(matricule=f"A{index:04d}", first_name="Jean", last_name=f"Nom{index % 3}",
+                                 grade="Agent", departure_date=departure)
+            for index, departure in enumerate(departures)
+        ]
+
+    @pytest.mark.parametrize('ordering', [
+        ['matricule'], ['-matricule'], ['last_name'], ['-last_name'], ['departure_date'], ['-departure_date'],
+    ])
+    def test_pages_match_offset_ordering(self, agents, ordering):
+        """Test that walking every page yields the same rows as a plain ORDER BY, ties and NULLs included"""
+        queryset = Agent.objects.all()
+        expected = list(keyset_paginate(queryset, ordering, page_size=100))
+        assert len(expected) == len(agents)
+        assert walk(queryset, ordering, page_size=2) == expected
+
+    def test_invalid_cursor_restarts(self, agents):
+        """Test that a malformed cursor falls back to the first page"""
+        page = keyset_paginate(Agent.objects.all(), ['matricule'], QueryDict('cursor=nope'), page_size=3)
+        assert [agent.matricule for agent in page] == ['A0000', 'A0001', 'A0002']
+        assert page.has_next
+
+
+@pytest.mark.django_db
+class TestListViewPagination:
+
+    def test_load_more_rows(self, rotation_setup, agent_client):
+        """Test that the list renders one page and the load more request only the following rows"""
+        Function.objects.bulk_create(Function(designation=f"Fonction {index:03d}") for index in range(60))
+        client = agent_client(rotation_setup['agent'], permission_level='A')
+        response = client.get(reverse('function_list'), HTTP_HX_REQUEST='true')
+        page = response.context['functions']
+        assert len(page) == 50
+        assert page.has_next
+
+        response = client.get(f"{reverse('function_list')}?{page.next_query}", HTTP_HX_REQUEST='true')
+        assert [template.name for template in response.templates][0] == 'core/functions/function_list_rows.html'
+        rest = response.context['functions']
+        assert len(rest) == 11
+        assert not rest.has_next
+        assert {function.pk for function in page}.isdisjoint(function.pk for function in rest)
@@ -0,0 +1,84 @@
+import pytest
+from datetime import date
+from unittest import mock
+from django.db import transaction
+from core import planned_shifts, signals
+from core.models import DailyRotationPlan, PlannedShift, PublicHoliday, TeamPositionAgentAssignment
+
+
+@pytest.mark.django_db
+class TestPlannedShifts:
+
+    def test_rebuild_materializes_roster(self, rotation_setup):
+        """Test that a full rebuild creates one row per planned day"""
+        created = planned_shifts.rebuild()
+        position = rotation_setup['position']
+        assert created == PlannedShift.objects.filter(team_position=position).count()
+        assert PlannedShift.objects.filter(team_position=position, date=date(2025, 1, 6)).exists()
+        assert not PlannedShift.objects.filter(team_position=position, date=date(2025, 1, 7)).exists()
+
+    def test_agent_assignment_change_refreshes_slice(self, rotation_setup, django_capture_on_commit_callbacks):
+        """Test that editing an agent assignment recomputes both the old and the new date range"""
+        planned_shifts.rebuild()
+        position = rotation_setup['position']
+        assignment = TeamPositionAgentAssignment.objects.get(team_position=position)
+        with django_capture_on_commit_callbacks(execute=True):
+            assignment.start_date = date(2025, 1, 10)
+            assignment.save()
+        assert PlannedShift.objects.get(team_position=position, date=date(2025, 1, 6)).agent is None
+        assert PlannedShift.objects.get(team_position=position, date=date(2025, 1, 13)).agent == rotation_setup['agent']
+
+    def test_public_holiday_refreshes_day(self, rotation_setup, django_capture_on_commit_callbacks):
+        """Test that creating and deleting a public holiday updates the matching day"""
+        planned_shifts.rebuild()
+        position = rotation_setup['position']
+        with django_capture_on_commit_callbacks(execute=True):
+            holiday = PublicHoliday.objects.create(designation="Férié", date=date(2025, 1, 6))
+        assert not PlannedShift.objects.filter(team_position=position, date=date(2025, 1, 6)).exists()
+        with django_capture_on_commit_callbacks(execute=True):
+            holiday.delete()
+        assert PlannedShift.objects.filter(team_position=position, date=date(2025, 1, 6)).exists()
+
+    def test_daily_plan_deletion_refreshes_period(self, rotation_setup, django_capture_on_commit_callbacks):
+        """Test that removing a daily plan from the cycle removes the matching shifts"""
+        planned_shifts.rebuild()
+        position = rotation_setup['position']
+        with django_capture_on_commit_callbacks(execute=True):
+            position.rotation_assignments.get().rotation_plan.periods.get().weeks.get(
+                week_number=2
+            ).daily_plans.get().delete()
+        assert not PlannedShift.objects.filter(team_position=position, date=date(2025, 1, 13)).exists()
+        assert PlannedShift.objects.filter(team_position=position, date=date(2025, 1, 6)).exists()
+
+    def test_expansion_fields_refresh_roster(self, rotation_setup, django_capture_on_commit_callbacks):
+        """Test that the holiday flag of a position and the schedule type of a plan refresh their shifts"""
+        position = rotation_setup['position']
+        PublicHoliday.objects.create(designation="Férié", date=date(2025, 1, 6))
+        planned_shifts.rebuild()
+        with django_capture_on_commit_callbacks(execute=True):
+            position.considers_holidays = False
+            position.save()
+        assert PlannedShift.objects.get(team_position=position, date=date(2025, 1, 6)).is_holiday
+        plan = DailyRotationPlan.objects.get(designation="Nuit")
+        with django_capture_on_commit_callbacks(execute=True):
+            plan.schedule_type = rotation_setup['day_type']
+            plan.save()
+        assert PlannedShift.objects.get(team_position=position, date=date(2025, 1, 13)).schedule_type_id == (
+            rotation_setup['day_type'].pk
+        )
+
+    def test_post_migrate_fills_empty_table(self, rotation_setup):
+        """Test that migrating a database with assignments but no planned shifts computes them"""
+        PlannedShift.objects.all().delete()
+        signals.populate_planned_shifts(sender=None)
+        assert PlannedShift.objects.filter(team_position=rotation_setup['position'], date=date(2025, 1, 6)).exists()
+
+    def test_rolled_back_slices_are_forgotten(self, rotation_setup, django_capture_on_commit_callbacks):
+        """Test that the slices of a rolled back transaction are not refreshed by the next commit"""
+        with pytest.raises(RuntimeError), transaction.atomic():
+            PublicHoliday.objects.create(designation="Annulé", date=date(2025, 1, 6))
+            raise RuntimeError
+        with mock.patch('core.planned_shifts.refresh') as refresh, django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic():
+                PublicHoliday.objects.create(designation="Férié", date=date(2025, 1, 13))
+        assert [call.args[1:] for call in refresh.call_args_list] == [(date(2025, 1, 13), date(2025, 1, 13))]
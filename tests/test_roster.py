@@ -0,0 +1,90 @@
+import pytest
+from datetime import date, time, timedelta
+from core import roster
+from core.models import PublicHoliday, ShiftScheduleDailyPlan, ShiftSchedulePeriod
+
+
+@pytest.mark.django_db
+class TestRosterExpansion:
+
+    def test_week_cycle_is_applied(self, rotation_setup):
+        """Test that consecutive Mondays alternate between the two weeks of the cycle"""
+        result = roster.expand_positions([rotation_setup['position'].pk], date(2025, 1, 6), date(2025, 1, 19))
+        shifts = result[rotation_setup['position'].pk]
+        assert list(shifts) == [date(2025, 1, 6), date(2025, 1, 13)]
+        assert shifts[date(2025, 1, 6)].schedule_type_id == rotation_setup['day_type'].pk
+        assert shifts[date(2025, 1, 13)].schedule_type_id == rotation_setup['night_type'].pk
+        assert shifts[date(2025, 1, 6)].agent_id == rotation_setup['agent'].pk
+
+    def test_night_shift_ends_next_day(self, rotation_setup):
+        """Test that a night shift ends on the following day"""
+        result = roster.expand_positions([rotation_setup['position'].pk], date(2025, 1, 13), date(2025, 1, 13))
+        shift = result[rotation_setup['position'].pk][date(2025, 1, 13)]
+        assert shift.start.time() == time(22, 0)
+        assert shift.end.date() == date(2025, 1, 14)
+        assert shift.end - shift.start == timedelta(hours=8)
+
+    def test_vacant_position_has_no_agent(self, rotation_setup):
+        """Test that shifts outside the agent assignment are vacant"""
+        result = roster.expand_positions([rotation_setup['position'].pk], date(2025, 2, 3), date(2025, 2, 3))
+        assert result[rotation_setup['position'].pk][date(2025, 2, 3)].agent_id is None
+
+    def test_holiday_removes_shift_when_considered(self, rotation_setup):
+        """Test that a public holiday cancels the shift of a position that considers holidays"""
+        PublicHoliday.objects.create(designation="Férié", date=date(2025, 1, 6))
+        result = roster.expand_positions([rotation_setup['position'].pk], date(2025, 1, 6), date(2025, 1, 6))
+        assert result[rotation_setup['position'].pk] == {}
+
+    def test_holiday_flagged_when_not_considered(self, rotation_setup):
+        """Test that positions ignoring holidays keep the shift with the holiday flag"""
+        position = rotation_setup['position']
+        position.considers_holidays = False
+        position.save()
+        PublicHoliday.objects.create(designation="Férié", date=date(2025, 1, 6))
+        result = roster.expand_positions([rotation_setup['position'].pk], date(2025, 1, 6), date(2025, 1, 6))
+        assert result[position.pk][date(2025, 1, 6)].is_holiday is True
+
+    def test_query_count_is_bounded(self, rotation_setup, django_assert_max_num_queries):
+        """Test that a full year is expanded with a fixed number of queries once cycle matrices are cached"""
+        roster.expand_positions([rotation_setup['position'].pk], date(2025, 1, 6), date(2025, 1, 6))
+        with django_assert_max_num_queries(6):
+            roster.expand_positions([rotation_setup['position'].pk], date(2025, 1, 1), date(2025, 12, 31))
+
+
+@pytest.mark.django_db
+class TestCycleMatrix:
+
+    def _period(self, rotation_setup):
+        return rotation_setup['position'].rotation_assignments.get().rotation_plan.periods.get()
+
+    def test_matrix_is_built_and_cached(self, rotation_setup, django_assert_num_queries):
+        """Test that the matrix lists the plan of each weekday and is stored on the period"""
+        period = self._period(rotation_setup)
+        matrix = period.get_cycle_matrix()
+        assert len(matrix) == 2
+        assert matrix[0][0] is not None and matrix[1][0] is not None
+        assert matrix[0][1:] == [None] * 6
+        with django_assert_num_queries(1):
+            assert ShiftSchedulePeriod.objects.get(pk=period.pk).get_cycle_matrix() == matrix
+
+    def test_daily_plan_change_rebuilds_matrix(self, rotation_setup):
+        """Test that adding a daily plan rebuilds the stored matrix of its period"""
+        period = self._period(rotation_setup)
+        matrix = period.get_cycle_matrix()
+        week = period.weeks.get(week_number=1)
+        ShiftScheduleDailyPlan.objects.create(
+            week=week, weekday=3, daily_rotation_plan_id=matrix[0][0]
+        )
+        period.refresh_from_db()
+        assert period.cycle_matrix[0][2] == matrix[0][0]
+
+    def test_read_path_never_overwrites_stored_matrix(self, rotation_setup):
+        """Test that a matrix built on read is only stored when the period has none"""
+        period = self._period(rotation_setup)
+        stored = [[None] * 7]
+        ShiftSchedulePeriod.objects.filter(pk=period.pk).update(cycle_matrix=stored)
+        ShiftSchedulePeriod.build_cycle_matrices([period.pk])
+        assert ShiftSchedulePeriod.objects.get(pk=period.pk).cycle_matrix == stored
+        ShiftSchedulePeriod.objects.filter(pk=period.pk).update(cycle_matrix=None)
+        ShiftSchedulePeriod.build_cycle_matrices([period.pk])
+        assert len(ShiftSchedulePeriod.objects.get(pk=period.pk).cycle_matrix) == 2
@@ -0,0 +1,83 @@
+import pytest
+from django.http import QueryDict
+from django.urls import reverse
+from core import search
+from core.models import Agent, DailyRotationPlan, Department, ScheduleType, Team
+from core.pagination import keyset_paginate
+
+
+def matricules(queryset):
+    return [agent.matricule for agent in queryset.order_by('search_rank', 'pk')]
+
+
+@pytest.mark.django_db
+class TestSearchIndex:
+
+    @pytest.fixture
+    def agents(self):
+        return [
+            Agent.objects.create(matricule="A1234", first_name="Hélène", last_name="Martin", grade="Agent"),
+            Agent.objects.create(matricule="B5678", first_name="Jean", last_name="Martinez", grade="Agent"),
+            Agent.objects.create(matricule="C9012", first_name="Martine", last_name="Dupont", grade="Agent"),
+        ]
+
+    def test_prefix_and_accent_insensitive_match(self, agents):
+        """Test that every word matches as a prefix of matricules and names, ignoring accents"""
+        assert matricules(search.search(Agent.objects.all(), "a12")) == ["A1234"]
+        assert matricules(search.search(Agent.objects.all(), "helene mar")) == ["A1234"]
+        assert set(matricules(search.search(Agent.objects.all(), "mart"))) == {"A1234", "B5678", "C9012"}
+        assert matricules(search.search(Agent.objects.all(), "zzz")) == []
+
+    def test_punctuation_is_ignored(self, agents):
+        """Test that FTS syntax characters in the search text cannot break the query"""
+        assert matricules(search.search(Agent.objects.all(), 'jean" (')) == ["B5678"]
+        assert search.search(Agent.objects.all(), '"*').count() == 3
+
+    def test_index_follows_changes(self, agents):
+        """Test that saves and deletes keep the index in sync"""
+        agent = agents[0]
+        agent.last_name = "Bernard"
+        agent.save()
+        assert matricules(search.search(Agent.objects.all(), "bernard")) == ["A1234"]
+        agent.delete()
+        assert matricules(search.search(Agent.objects.all(), "bernard")) == []
+
+    def test_designation_ranks_above_description(self):
+        """Test that a match on the designation ranks above a match on the description"""
+        schedule_type = ScheduleType.objects.create(designation="Matin", short_designation="MAT", color="#FF0000")
+        in_description = DailyRotationPlan.objects.create(designation="Plan A", description="Rythme de nuit",
+                                                          schedule_type=schedule_type)
+        in_designation = DailyRotationPlan.objects.create(designation="Nuit longue", schedule_type=schedule_type)
+        results = search.search(DailyRotationPlan.objects.all(), "nuit").order_by('search_rank')
+        assert list(results) == [in_designation, in_description]
+
+    def test_related_names_are_reindexed(self):
+        """Test that renaming a schedule type or department updates the plans and teams that copy it"""
+        schedule_type = ScheduleType.objects.create(designation="Matin", short_designation="MAT", color="#FF0000")
+        plan = DailyRotationPlan.objects.create(designation="Plan A", schedule_type=schedule_type)
+        department = Department.objects.create(name="Production", order=1)
+        team = Team.objects.create(designation="Équipe A", color="#00FF00", department=department)
+        schedule_type.designation = "Soirée"
+        schedule_type.save()
+        department.name = "Maintenance"
+        department.save()
+        assert list(search.search(DailyRotationPlan.objects.all(), "soiree")) == [plan]
+        assert list(search.search(Team.objects.all(), "maint")) == [team]
+        assert list(search.search(Team.objects.all(), "production")) == []
+
+    def test_keyset_pages_by_rank(self, agents):
+        """Test that ranked results can be walked with keyset pagination"""
+        queryset = search.search(Agent.objects.all(), "mart")
+        first = keyset_paginate(queryset, ['search_rank'], QueryDict(), page_size=2)
+        rest = keyset_paginate(queryset, ['search_rank'], QueryDict(first.next_query), page_size=2)
+        assert len(first) == 2 and len(rest) == 1
+        assert [agent.pk for agent in [*first, *rest]] == [agent.pk for agent in queryset.order_by('search_rank', 'pk')]
+
+
+@pytest.mark.django_db
+def test_agent_list_search(rotation_setup, agent_client):
+    """Test that the agent list searches through the index"""
+    Agent.objects.create(matricule="Z9999", first_name="Zoé", last_name="Durand", grade="Agent")
+    client = agent_client(rotation_setup['agent'], permission_level='A')
+    response = client.get(reverse('agent_list'), {'search': 'zoe'}, HTTP_HX_REQUEST='true')
+    assert [agent.matricule for agent in response.context['agents']] == ["Z9999"]
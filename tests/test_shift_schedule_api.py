@@ -0,0 +1,126 @@
+import datetime
+import pytest
+from django.urls import reverse
+from core.models import ShiftScheduleWeek
+
+
+@pytest.mark.django_db
+class TestShiftSchedulePeriodWeeksAPI:
+
+    def _period(self, rotation_setup):
+        return rotation_setup['position'].rotation_assignments.get().rotation_plan.periods.get()
+
+    def test_dictionary_encoded_payload(self, rotation_setup, agent_client):
+        """Test that plans are listed once and weeks reference them by id"""
+        period = self._period(rotation_setup)
+        ShiftScheduleWeek.objects.create(period=period, week_number=3)
+        client = agent_client(rotation_setup['agent'], permission_level='A')
+        data = client.get(reverse('api_shift_schedule_period_weeks', args=[period.pk])).json()
+        assert data['count'] == 3
+        assert [week['week_number'] for week in data['weeks']] == [1, 2, 3]
+        assert data['weeks'][2]['daily_plans'] == []
+        _, weekday, plan_id = data['weeks'][0]['daily_plans'][0]
+        assert weekday == 1
+        assert data['plans'][str(plan_id)]['designation'] == "Jour"
+        assert data['plans'][str(plan_id)]['schedule_type_color'] == rotation_setup['day_type'].color
+
+    def test_query_count_does_not_depend_on_weeks(self, rotation_setup, agent_client, django_assert_max_num_queries):
+        """Test that the payload is built with a single query whatever the cycle length"""
+        period = self._period(rotation_setup)
+        for week_number in range(3, 30):
+            ShiftScheduleWeek.objects.create(period=period, week_number=week_number)
+        client = agent_client(rotation_setup['agent'], permission_level='A')
+        url = reverse('api_shift_schedule_period_weeks', args=[period.pk])
+        with django_assert_max_num_queries(4) as queries:
+            client.get(url)
+        assert sum('core_shiftscheduleweek' in query['sql'] for query in queries.captured_queries) == 1
+
+    def test_unknown_period(self, rotation_setup, agent_client):
+        """Test that an unknown period returns 404"""
+        client = agent_client(rotation_setup['agent'], permission_level='A')
+        assert client.get(reverse('api_shift_schedule_period_weeks', args=[9999])).status_code == 404
+
+
+@pytest.mark.django_db
+class TestShiftScheduleTreeAPI:
+
+    def _schedule(self, rotation_setup):
+        return rotation_setup['position'].rotation_assignments.get().rotation_plan
+
+    def test_tree_payload(self, rotation_setup, agent_client):
+        """Test that the schedule comes with its periods, weeks and daily plans"""
+        schedule = self._schedule(rotation_setup)
+        period = schedule.periods.get()
+        client = agent_client(rotation_setup['agent'], permission_level='A')
+        data = client.get(reverse('api_shift_schedule_tree', args=[schedule.pk])).json()
+        assert data['schedule']['id'] == schedule.pk
+        [period_data] = data['schedule']['periods']
+        assert period_data['id'] == period.pk
+        assert period_data['weeks_count'] == 2
+        assert [week['week_number'] for week in period_data['weeks']] == [1, 2]
+        _, weekday, plan_id = period_data['weeks'][0]['daily_plans'][0]
+        assert weekday == 1
+        assert data['plans'][str(plan_id)]['designation'] == "Jour"
+
+    def test_query_count_does_not_depend_on_tree_size(self, rotation_setup, agent_client, django_assert_max_num_queries):
+        """Test that the tree is built with a fixed number of queries"""
+        schedule = self._schedule(rotation_setup)
+        for year in range(2026, 2036):
+            period = schedule.periods.create(
+                start_date=datetime.date(year, 1, 1), end_date=datetime.date(year, 12, 31)
+            )
+            for week_number in range(1, 6):
+                ShiftScheduleWeek.objects.create(period=period, week_number=week_number)
+        client = agent_client(rotation_setup['agent'], permission_level='A')
+        with django_assert_max_num_queries(6):
+            data = client.get(reverse('api_shift_schedules_tree') + f'?ids={schedule.pk}').json()
+        assert data['count'] == 1
+        assert len(data['schedules'][0]['periods']) == 11
+
+    def test_unknown_schedule(self, rotation_setup, agent_client):
+        """Test that an unknown schedule returns 404 and invalid ids return 400"""
+        client = agent_client(rotation_setup['agent'], permission_level='A')
+        assert client.get(reverse('api_shift_schedule_tree', args=[9999])).status_code == 404
+        assert client.get(reverse('api_shift_schedules_tree') + '?ids=a,b').status_code == 400
+
+
+@pytest.mark.django_db
+class TestShiftSchedulePeriodsAPI:
+
+    def _schedule(self, rotation_setup):
+        return rotation_setup['position'].rotation_assignments.get().rotation_plan
+
+    def test_annotated_fields(self, rotation_setup, agent_client):
+        """Test that weeks count, duration and status are computed for each period"""
+        schedule = self._schedule(rotation_setup)
+        period = schedule.periods.get()
+        client = agent_client(rotation_setup['agent'], permission_level='A')
+        url = reverse('api_shift_schedule_periods', args=[schedule.pk])
+        [data] = client.get(url, {'date': period.start_date.isoformat()}).json()['periods']
+        assert data['weeks_count'] == 2
+        assert data['duration_days'] == (period.end_date - period.start_date).days + 1
+        assert data['is_active'] is True
+        assert data['status_text'] == 'Actif'
+        later = period.end_date + datetime.timedelta(days=1)
+        [data] = client.get(url, {'date': later.isoformat()}).json()['periods']
+        assert data['is_active'] is False
+        assert data['status_text'] == 'Expiré'
+
+    def test_single_query(self, rotation_setup, agent_client, django_assert_max_num_queries):
+        """Test that the periods are loaded with one query whatever their number"""
+        schedule = self._schedule(rotation_setup)
+        for year in range(2026, 2036):
+            schedule.periods.create(start_date=datetime.date(year, 1, 1), end_date=datetime.date(year, 12, 31))
+        client = agent_client(rotation_setup['agent'], permission_level='A')
+        url = reverse('api_shift_schedule_periods', args=[schedule.pk])
+        with django_assert_max_num_queries(4) as queries:
+            data = client.get(url).json()
+        assert data['count'] == 11
+        assert sum('core_shiftscheduleperiod' in query['sql'] for query in queries.captured_queries) == 1
+
+    def test_invalid_date_and_unknown_schedule(self, rotation_setup, agent_client):
+        """Test that a malformed date returns 400 and an unknown schedule 404"""
+        schedule = self._schedule(rotation_setup)
+        client = agent_client(rotation_setup['agent'], permission_level='A')
+        assert client.get(reverse('api_shift_schedule_periods', args=[schedule.pk]), {'date': 'x'}).status_code == 400
+        assert client.get(reverse('api_shift_schedule_periods', args=[9999])).status_code == 404
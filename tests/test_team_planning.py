@@ -0,0 +1,39 @@
+import pytest
+from django.urls import reverse
+from core.models import TeamPosition
+
+
+@pytest.mark.django_db
+class TestTeamPlanningView:
+
+    def test_grid_shows_schedule_types(self, rotation_setup, agent_client):
+        """Test that planned days show the schedule type short designation"""
+        client = agent_client(rotation_setup['agent'])
+        response = client.get(reverse('team_planning', args=[rotation_setup['team'].pk]), {'month': '2025-01'})
+        assert response.status_code == 200
+        rows = response.context['rows']
+        assert len(rows) == 1
+        assert len(rows[0]['cells']) == 31
+        planned = [cell['day']['date'].day for cell in rows[0]['cells'] if cell['shift']]
+        assert planned == [6, 13, 20, 27]
+        assert b'NUI' in response.content
+
+    def test_query_count_does_not_depend_on_positions(self, rotation_setup, agent_client, django_assert_max_num_queries):
+        """Test that the grid is loaded with a fixed number of queries"""
+        position = rotation_setup['position']
+        for order in range(2, 12):
+            TeamPosition.objects.create(team=position.team, function=position.function, order=order)
+        client = agent_client(rotation_setup['agent'])
+        url = reverse('team_planning', args=[rotation_setup['team'].pk])
+        client.get(url, {'month': '2025-01'})
+        with django_assert_max_num_queries(15):
+            client.get(url, {'month': '2025-01'})
+
+    def test_invalid_month_falls_back_to_current(self, rotation_setup, agent_client):
+        """Test that an invalid month parameter shows the current month"""
+        client = agent_client(rotation_setup['agent'])
+        url = reverse('team_planning', args=[rotation_setup['team'].pk])
+        for month in ('abc', '9999-12', '0001-01'):
+            response = client.get(url, {'month': month})
+            assert response.status_code == 200
+            assert response.context['is_current_month']
@@ -0,0 +1,37 @@
+import pytest
+from datetime import date
+from django.urls import reverse
+from core.models import Team, TeamPosition, TeamPositionAgentAssignment
+
+
+@pytest.mark.django_db
+class TestAssignmentsAsOf:
+
+    def test_properties_use_prefetched_assignments(self, rotation_setup, django_assert_num_queries):
+        """Test that current agent and rotation come from the prefetch cache"""
+        positions = list(TeamPosition.objects.with_assignments_as_of(date(2025, 1, 15)))
+        with django_assert_num_queries(0):
+            assert positions[0].current_agent == rotation_setup['agent']
+            assert positions[0].current_rotation_plan.name == "Roulement 2x8"
+
+    def test_as_of_another_date(self, rotation_setup):
+        """Test that the prefetch follows the requested date"""
+        position = TeamPosition.objects.with_assignments_as_of(date(2025, 2, 15)).get()
+        assert position.current_agent is None
+        assert position.current_rotation_plan is not None
+
+    def test_team_list_query_count_is_constant(self, rotation_setup, agent_client, django_assert_max_num_queries):
+        """Test that the team page does not issue queries per team or position"""
+        position = rotation_setup['position']
+        client = agent_client(rotation_setup['agent'], permission_level='A')
+        TeamPositionAgentAssignment.objects.filter(team_position=position).update(end_date=date(2099, 12, 31))
+
+        with django_assert_max_num_queries(12) as baseline:
+            client.get(reverse('team_list'))
+        for index in range(5):
+            team = Team.objects.create(designation=f"Équipe {index}", color="#000000", department=position.team.department)
+            for order in range(1, 4):
+                TeamPosition.objects.create(team=team, function=position.function, order=order)
+        with django_assert_max_num_queries(len(baseline.captured_queries)):
+            response = client.get(reverse('team_list'))
+        assert response.status_code == 200
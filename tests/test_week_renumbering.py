@@ -0,0 +1,70 @@
+import pytest
+from datetime import date
+from django.urls import reverse
+from core import planned_shifts
+from core.models import PlannedShift, ShiftSchedulePeriod, ShiftScheduleWeek
+
+
+@pytest.mark.django_db
+class TestWeekRenumbering:
+
+    @pytest.fixture
+    def period(self, rotation_setup):
+        period = ShiftSchedulePeriod.objects.get()
+        ShiftScheduleWeek.objects.bulk_create(
+            ShiftScheduleWeek(period=period, week_number=week_number) for week_number in range(3, 21)
+        )
+        return period
+
+    def week_updates(self, queries):
+        return sum(query['sql'].startswith('UPDATE "core_shiftscheduleweek"') for query in queries.captured_queries)
+
+    def test_delete_renumbers_in_constant_updates(self, period, rotation_setup, agent_client,
+                                                  django_assert_max_num_queries):
+        """Test that deleting a week shifts the following ones with two UPDATEs, whatever their count"""
+        client = agent_client(rotation_setup['agent'], permission_level='A')
+        week = period.weeks.get(week_number=2)
+        with django_assert_max_num_queries(40) as queries:
+            client.post(reverse('shift_schedule_week_delete', args=[week.pk]))
+        assert self.week_updates(queries) == 2
+        assert list(period.weeks.values_list('week_number', flat=True)) == list(range(1, 20))
+
+    def test_delete_several_weeks(self, period, rotation_setup, agent_client):
+        """Test that several weeks are deleted at once and the remaining ones closed up"""
+        client = agent_client(rotation_setup['agent'], permission_level='A')
+        kept = period.weeks.get(week_number=3).pk
+        week_ids = period.weeks.filter(week_number__in=[1, 2, 10]).values_list('pk', flat=True)
+        response = client.post(reverse('shift_schedule_weeks_delete', args=[period.pk]),
+                               {'week_ids': ','.join(map(str, week_ids))}, HTTP_ACCEPT='application/json')
+        assert response.json() == {'deleted': 3}
+        assert list(period.weeks.values_list('week_number', flat=True)) == list(range(1, 18))
+        assert period.weeks.get(week_number=1).pk == kept
+
+    def test_reorder_refreshes_cycle(self, period, rotation_setup, agent_client, django_capture_on_commit_callbacks):
+        """Test that reordering weeks rewrites the numbers, the cycle matrix and the planned shifts"""
+        planned_shifts.rebuild()
+        position = rotation_setup['position']
+        assert period.get_cycle_matrix()[0][0] is not None
+        client = agent_client(rotation_setup['agent'], permission_level='A')
+        week_ids = list(period.weeks.values_list('pk', flat=True))
+        week_ids[0], week_ids[19] = week_ids[19], week_ids[0]
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(reverse('shift_schedule_weeks_reorder', args=[period.pk]), {'week_ids': week_ids})
+        assert response.json()['renumbered'] == 2
+        assert [week['id'] for week in response.json()['weeks']] == week_ids
+        period.refresh_from_db()
+        matrix = period.get_cycle_matrix()
+        assert matrix[0][0] is None
+        assert matrix[19][0] is not None
+        # 2025-01-06 is now the first Monday of an empty week
+        assert not PlannedShift.objects.filter(team_position=position, date=date(2025, 1, 6)).exists()
+        assert PlannedShift.objects.get(team_position=position, date=date(2025, 1, 13)).schedule_type == rotation_setup['night_type']
+
+    def test_reorder_rejects_partial_order(self, period, rotation_setup, agent_client):
+        """Test that an order missing weeks, or with malformed ids, is rejected without changes"""
+        client = agent_client(rotation_setup['agent'], permission_level='A')
+        url = reverse('shift_schedule_weeks_reorder', args=[period.pk])
+        week_ids = list(period.weeks.values_list('pk', flat=True))
+        assert client.post(url, {'week_ids': week_ids[:-1]}).status_code == 400
+        assert client.post(url, {'week_ids': ['abc']}).status_code == 400
+        assert list(period.weeks.values_list('pk', flat=True)) == week_ids